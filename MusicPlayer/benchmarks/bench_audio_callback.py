@@ -0,0 +1,100 @@
+# bench_audio_callback.py
+
+# Per-callback cost of the real-time path: time percentiles and bytes allocated
+#   legacy   — slice, per-band lfilter equalizer (copy, volume multiply, astype), assign to outdata
+#   in-place — source reads into outdata, the fused equalizer works in place
+# The callback is driven directly (no device); the source is a decoded track in memory.
+# Usage: python benchmarks/bench_audio_callback.py [blocksize] [callbacks]
+
+import sys, os, time, tempfile, tracemalloc
+import numpy as np
+from common import make_audio
+from core.audio_source import MemorySource
+from core.equalizer import Equalizer
+from core.playback import Playback
+from core.latency import EngineStats
+from bench_equalizer import LegacyEqualizer
+
+
+# Just the state _audio_callback touches
+class CallbackHost(Playback):
+    def __init__(self, source):
+        self._source = source
+        self._samplerate = source.samplerate
+        self.is_playing = True
+        self.is_paused = False
+        self._next_source = None
+        self._auto_next_enabled = False
+        self.equalizer = Equalizer()
+        self.equalizer.set_volume(80)
+        self.legacy_equalizer = LegacyEqualizer({})
+        self._stats = EngineStats()
+
+    def _take_next_source(self):
+        return None
+
+    # The seed callback, before the in-place path
+    def legacy_callback(self, outdata, frames, time_info, status):
+        data = self._source._data
+        pos = self._source._pos
+        chunk = data[pos:pos + frames]
+        outdata[:len(chunk)] = self.legacy_equalizer.process(chunk, self._samplerate)
+        self._source._pos = pos + frames
+
+
+def percentiles(samples):
+    values = np.percentile(np.array(samples) * 1e6, [50, 90, 99, 99.9])
+    return "  ".join(f"p{q:<4} {v:7.1f} us" for q, v in zip(("50", "90", "99", "99.9"), values)) \
+        + f"  max {max(samples) * 1e6:7.1f} us"
+
+
+# Loop the track so every measured callback processes real audio
+def rewind(host, blocksize):
+    if host._source.position + blocksize > host._source.frames:
+        host._source.seek(0)
+    host.is_playing = True
+
+
+def run(host, callback, blocksize, count):
+    outdata = np.zeros((blocksize, 2), dtype=np.float32)
+    host._source.seek(0)
+    for _ in range(50): # warm up caches and filter state
+        callback(outdata, blocksize, None, None)
+
+    times = []
+    for _ in range(count):
+        rewind(host, blocksize)
+        start = time.perf_counter()
+        callback(outdata, blocksize, None, None)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[1]
+    for _ in range(100):
+        rewind(host, blocksize)
+        callback(outdata, blocksize, None, None)
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return times, peak
+
+
+def main():
+    blocksize = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        source = MemorySource(make_audio(os.path.join(tmp, "track.flac"), 120))
+    host = CallbackHost(source)
+
+    for label, bands in (("flat EQ", {}), ("3 bands", {60: 4.0, 1000: -3.0, 15000: 2.0})):
+        host.equalizer.set_all({freq: 0.0 for freq in Equalizer.BANDS})
+        host.equalizer.set_all(bands)
+        host.legacy_equalizer = LegacyEqualizer(bands)
+        print(f"--- {label}, blocksize {blocksize} ---")
+        for name, callback in (("legacy", host.legacy_callback), ("in-place", host._audio_callback)):
+            times, peak = run(host, callback, blocksize, count)
+            print(f"{name:>9}: {percentiles(times)}  peak alloc {peak / 1024:6.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
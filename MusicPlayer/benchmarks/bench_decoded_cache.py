@@ -0,0 +1,57 @@
+# bench_decoded_cache.py
+
+# Replay latency with and without the decoded cache (core/decoded_cache.py)
+# Time from opening a track's source until its first 1024-frame buffer is read:
+#   stream — StreamDecoder, first block decoded in start()
+#   memory — MemorySource, the whole file decoded and resampled
+#   cached — MemorySource over the array kept by the cache (prev, replay, repeat)
+# Tracks are recorded at 48 kHz and played at 44.1 kHz, so every decode resamples.
+# Usage: python benchmarks/bench_decoded_cache.py [seconds ...]
+
+import sys, os, time, tempfile, statistics
+import numpy as np
+from common import make_audio
+from core.audio_source import MemorySource, StreamDecoder
+from core.decoded_cache import DecodedCache
+
+OUTPUT_RATE = 44100
+REPEATS = 5
+
+
+def first_buffer(make_source) -> float:
+    out = np.zeros((1024, 2), dtype=np.float32)
+    start = time.perf_counter()
+    source = make_source()
+    source.start()
+    while not source.read(out):
+        time.sleep(0.0005)
+    elapsed = time.perf_counter() - start
+    source.close()
+    return elapsed
+
+
+def main():
+    lengths = [float(s) for s in sys.argv[1:]] or [60.0, 300.0, 900.0]
+    print(f"{'length':>7} | {'stream ms':>9} | {'memory ms':>9} | {'cached ms':>9} | {'entry MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in lengths:
+            path = make_audio(os.path.join(tmp, f"{seconds:.0f}.flac"), seconds, samplerate=48000)
+            cache = DecodedCache()
+            MemorySource(path, OUTPUT_RATE, decoded=cache)
+            pcm = cache.get(path, OUTPUT_RATE)
+
+            times = {
+                'stream': [first_buffer(lambda: StreamDecoder(path, OUTPUT_RATE)) for _ in range(REPEATS)],
+                'memory': [first_buffer(lambda: MemorySource(path, OUTPUT_RATE)) for _ in range(REPEATS)],
+            }
+            if pcm is not None:
+                times['cached'] = [first_buffer(lambda: MemorySource(path, OUTPUT_RATE, pcm=pcm))
+                                   for _ in range(REPEATS)]
+            med = {name: statistics.median(values) * 1000 for name, values in times.items()}
+            cached = f"{med['cached']:9.3f}" if pcm is not None else f"{'over budget':>9}"
+            print(f"{seconds:6.0f}s | {med['stream']:9.2f} | {med['memory']:9.1f} | {cached} | "
+                  f"{cache.stats()['mb']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
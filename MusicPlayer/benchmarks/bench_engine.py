@@ -0,0 +1,147 @@
+# bench_engine.py
+
+# Playback engine benchmark on the null output backend (no sound card needed)
+# Every file length / EQ setting runs in its own process: a MusicPlayer with
+# output_backend "null" plays generated tracks and reports
+#   callback — time per output buffer while streaming (p50 / p99 / p99.9 / max)
+#   switch   — play_track() until the new track's first samples are rendered
+#   seek     — seek() until samples from the new position are rendered
+#   RSS      — peak resident memory of the process
+# The null sink is paced at `speed` times real time (0: as fast as possible),
+# so switch and seek times include the wait for the next buffer.
+# Usage: python benchmarks/bench_engine.py [speed] [seconds ...]
+
+import sys, os, json, time, tempfile, resource, subprocess
+from threading import Event
+from time import perf_counter
+import numpy as np
+import soundfile as sf
+from common import make_audio
+from core.player import MusicPlayer
+from core.equalizer import MODES
+from core.waveform import WaveformStore
+from core.seek_index import SeekIndexStore
+
+EQ_SETTINGS = ("flat", "parametric", "graphic31", "graphic31+fir")
+MEASURED_SECONDS = 60 # audio rendered for the callback percentiles
+SWITCHES = 6
+SEEKS = (0.1, 0.5, 0.9, 0.3, 0.7, 0.05)
+
+
+# MusicPlayer that times its callback and signals when the wanted audio is rendered
+class BenchPlayer(MusicPlayer):
+    def __init__(self, cache_dir: str, speed: float):
+        super().__init__()
+        self.output_backend = "null"
+        self.output_options = {"speed": speed}
+        self._waveforms = WaveformStore(os.path.join(cache_dir, "waveforms"))
+        self._seek_indexes = SeekIndexStore(os.path.join(cache_dir, "seek_index"))
+        self.times = []
+        self.rendered = Event()
+        self.wanted = None # (path, first frame)
+
+    def _audio_callback(self, outdata, frames, time_info, status):
+        start = perf_counter()
+        super()._audio_callback(outdata, frames, time_info, status)
+        self.times.append(perf_counter() - start)
+        wanted, source = self.wanted, self._source
+        if wanted is not None and source is not None and source.path == wanted[0] \
+                and source.position >= wanted[1] and outdata.any():
+            self.rendered.set()
+
+    def wait_rendered(self, path: str, frame: int, action) -> float:
+        self.rendered.clear()
+        self.wanted = (path, frame)
+        start = perf_counter()
+        action()
+        self.rendered.wait(10)
+        self.wanted = None
+        return perf_counter() - start
+
+
+def setup_eq(player: MusicPlayer, setting: str, fir_path: str):
+    eq = player.equalizer
+    if setting == "parametric":
+        eq.set_all({60: 4.0, 1000: -3.0, 15000: 2.0})
+    elif setting.startswith("graphic31"):
+        eq.set_mode("graphic31")
+        eq.set_all({freq: float((i % 5) - 2) for i, freq in enumerate(MODES["graphic31"])})
+        if setting.endswith("+fir"):
+            eq.load_fir(fir_path)
+
+
+def run_one(paths, setting: str, speed: float, fir_path: str) -> dict:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        player = BenchPlayer(cache_dir, speed)
+        setup_eq(player, setting, fir_path)
+
+        first = player.wait_rendered(paths[0], 0, lambda: player.play_track(playlist=list(paths)))
+        samplerate = player._samplerate
+        blocksize = player._stream.blocksize
+
+        # Callback times over MEASURED_SECONDS of audio
+        player.times.clear()
+        start_frames = player._stream.frames
+        while player._stream.frames - start_frames < MEASURED_SECONDS * samplerate:
+            time.sleep(0.05)
+        times = np.array(player.times) * 1e6
+
+        switches = [player.wait_rendered(paths[(i + 1) % 2], 0, lambda i=i: player.play_track(index=(i + 1) % 2))
+                    for i in range(SWITCHES)]
+        path = player._source.path
+        seeks = []
+        for pos in SEEKS:
+            frame = int(player._source.frames * pos)
+            seeks.append(player.wait_rendered(path, frame, lambda: player.seek(frame / samplerate)))
+
+        info = player.get_playback_info()['engine']
+        player.stop_engine()
+
+    return {
+        'first_ms': first * 1000,
+        'callback_us': [float(v) for v in np.percentile(times, [50, 99, 99.9])] + [float(times.max())],
+        'buffer_us': blocksize / samplerate * 1e6,
+        'switch_ms': [float(np.median(switches) * 1000), float(max(switches) * 1000)],
+        'seek_ms': [float(np.median(seeks) * 1000), float(max(seeks) * 1000)],
+        'underruns': info['underflows'] + info['decoder_underruns'],
+        'rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    speed = float(sys.argv[1]) if len(sys.argv) > 1 else 8.0
+    lengths = [float(s) for s in sys.argv[2:]] or [60.0, 600.0, 3600.0]
+    print(f"null output at {speed:g}x real time" if speed else "null output, as fast as possible")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fir_path = os.path.join(tmp, "room.wav")
+        rng = np.random.default_rng(1)
+        sf.write(fir_path, rng.standard_normal((22050, 2)) * np.exp(-np.arange(22050) / 2000)[:, None] * 0.05, 44100)
+
+        print(f"{'length':>7} {'EQ':>14} | {'callback p50/p99/p99.9/max us':>31} | "
+              f"{'switch ms':>11} | {'seek ms':>11} | {'underruns':>9} | {'RSS MiB':>7}")
+        for seconds in lengths:
+            paths = [make_audio(os.path.join(tmp, f"{seconds:.0f}_{i}.flac"), seconds) for i in range(2)]
+            for setting in EQ_SETTINGS:
+                # One process per run: peak RSS and caches start from scratch
+                out = subprocess.run([sys.executable, __file__, "--run", json.dumps(
+                    {'paths': paths, 'setting': setting, 'speed': speed, 'fir': fir_path})],
+                    capture_output=True, text=True)
+                lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+                if out.returncode or not lines:
+                    print(f"{seconds:6.0f}s {setting:>14} | failed: {out.stderr.strip()[-200:]}")
+                    continue
+                r = json.loads(lines[-1])
+                cb = "/".join(f"{v:.0f}" for v in r['callback_us'])
+                print(f"{seconds:6.0f}s {setting:>14} | {cb:>31} | "
+                      f"{r['switch_ms'][0]:5.1f}/{r['switch_ms'][1]:5.1f} | {r['seek_ms'][0]:5.1f}/{r['seek_ms'][1]:5.1f} | "
+                      f"{r['underruns']:9d} | {r['rss_mib']:7.1f}")
+        print(f"(buffer period {r['buffer_us']:.0f} us; switch/seek: median/max)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        args = json.loads(sys.argv[2])
+        print(json.dumps(run_one(args['paths'], args['setting'], args['speed'], args['fir'])))
+    else:
+        main()
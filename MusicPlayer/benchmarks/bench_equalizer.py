@@ -0,0 +1,91 @@
+# bench_equalizer.py
+
+# CPU per block: the original per-band lfilter equalizer (coefficients recomputed
+# every block, one lfilter pass per band) vs the fused SOS cascade
+# Usage: python benchmarks/bench_equalizer.py [blocks]
+
+import sys, math, time
+import numpy as np
+import scipy.signal as signal
+import common # noqa: F401 (sys.path)
+from core.equalizer import Equalizer
+
+SAMPLERATE = 44100
+
+
+# The equalizer as it was: cache checked under (freq, sr) but stored under freq
+class LegacyEqualizer:
+    BANDS = Equalizer.BANDS
+
+    def __init__(self, gains):
+        self.gains = {freq: float(gains.get(freq, 0.0)) for freq in self.BANDS}
+        self.filters_state = {}
+        self._cache = {}
+        self._volume = 0.8
+
+    def _get_coefficients(self, freq, sr, gain_db):
+        a_gain = math.pow(10, gain_db / 40)
+        w0 = 2 * math.pi * freq / sr
+        alpha = math.sin(w0) / 2
+        b0, b1, b2 = 1 + alpha * a_gain, -2 * math.cos(w0), 1 - alpha * a_gain
+        a0, a1, a2 = 1 + alpha / a_gain, -2 * math.cos(w0), 1 - alpha / a_gain
+        return np.array([b0/a0, b1/a0, b2/a0]), np.array([1.0, a1/a0, a2/a0])
+
+    def process(self, data, samplerate):
+        output = data.copy()
+        if not all(g == 0 for g in self.gains.values()):
+            for freq in self.BANDS:
+                gain = self.gains[freq]
+                if gain == 0: continue
+                if (freq, samplerate) not in self._cache:
+                    self._cache[freq] = self._get_coefficients(freq, samplerate, gain)
+                b, a = self._cache[freq]
+                if freq not in self.filters_state or self.filters_state[freq].shape[1] != data.shape[1]:
+                    self.filters_state[freq] = np.zeros((2, data.shape[1]))
+                output, self.filters_state[freq] = signal.lfilter(b, a, output, axis=0, zi=self.filters_state[freq])
+        if self._volume != 1.0:
+            output = output * self._volume
+        return output.astype('float32')
+
+
+def per_block(fn, blocks, blocksize):
+    data = np.random.default_rng(0).standard_normal((blocksize, 2)).astype(np.float32)
+    for _ in range(20):
+        fn(data)
+    times = []
+    for _ in range(blocks):
+        start = time.perf_counter()
+        fn(data)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1e6
+    return np.median(times), np.percentile(times, 99)
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    presets = {
+        "1 band": {1000: 3.0},
+        "3 bands": {60: 4.0, 1000: -3.0, 15000: 2.0},
+        "6 bands": {60: 4.0, 150: 2.0, 400: -1.0, 1000: -3.0, 2400: 1.5, 15000: 2.0},
+    }
+    for blocksize in (256, 512, 1024):
+        print(f"--- blocksize {blocksize} ---")
+        for name, gains in presets.items():
+            legacy = LegacyEqualizer(gains)
+            fused = Equalizer()
+            fused.set_volume(80)
+            fused.set_all(gains)
+            old = per_block(lambda d: legacy.process(d, SAMPLERATE), blocks, blocksize)
+            buf = np.empty((blocksize, 2), dtype=np.float32)
+
+            def run_fused(d):
+                buf[:] = d
+                fused.process_into(buf, SAMPLERATE)
+
+            new = per_block(run_fused, blocks, blocksize)
+            print(f"{name:>8}: legacy {old[0]:7.1f} us (p99 {old[1]:7.1f})   "
+                  f"fused {new[0]:7.1f} us (p99 {new[1]:7.1f})   x{old[0] / new[0]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
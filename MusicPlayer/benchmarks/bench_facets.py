@@ -0,0 +1,41 @@
+# bench_facets.py
+
+# Browsing by artist / album: filtering the global list (precomputed keys) vs the facet indexes
+# Usage: python benchmarks/bench_facets.py [tracks]
+
+import sys
+from bench_playlist_queries import build_host, bench
+from core.utils import fold
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    host = build_host(n)
+    artists = host.get_artists()
+    artist = artists[len(artists) // 2]["name"]
+    album = host._by_path[next(iter(host._facets.get("artist", artist).tracks))].album
+
+    def old_filter(field, value):
+        key = fold(value)
+        return [t for t in host._library if getattr(t, field + '_key') == key]
+
+    cases = {
+        "artist": ({"type": "artist", "value": artist}, lambda: old_filter("artist", artist)),
+        "album": ({"type": "album", "value": album}, lambda: old_filter("album", album)),
+        "artist+album": ({"type": "facets", "value": {"artist": artist, "album": album}},
+                         lambda: [t for t in old_filter("artist", artist) if t.album_key == fold(album)]),
+    }
+
+    print(f"{n} tracks, {len(artists)} artists, {len(host.get_albums())} albums")
+    for name, (query, old) in cases.items():
+        assert {t.path for t in host._resolve_query(query)} == {t.path for t in old()}
+        new_ms = bench(lambda: host._resolve_query(query))
+        old_ms = bench(old)
+        print(f"{name:>13}: facets {new_ms:8.3f} ms   filter {old_ms:8.2f} ms")
+
+    print(f"  artist list: {bench(host.get_artists):8.2f} ms")
+    print(f"  albums of artist: {bench(lambda: host.get_albums(artist)):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_graphic_eq.py
+
+# CPU per block for the graphic EQ modes: every band as a peaking biquad in one
+# SOS cascade (the parametric engine stretched to 10/31 bands) vs the combined
+# FIR run by the partitioned FFT convolver; plus a convolver with a loaded
+# 0.5 s room-correction filter.
+# Usage: python benchmarks/bench_graphic_eq.py [blocks]
+
+import sys, os, tempfile
+import numpy as np
+import soundfile as sf
+import common # noqa: F401 (sys.path)
+from core.equalizer import Equalizer, MODES, peaking_sos, _sosfilt
+from bench_equalizer import per_block
+
+SAMPLERATE = 44100
+
+
+def curve(bands):
+    return {freq: float((i % 5) - 2) or 1.0 for i, freq in enumerate(bands)}
+
+
+# Reference: one biquad per band, one compiled sosfilt pass per block
+def cascade_runner(bands, gains):
+    sos = np.array([peaking_sos(f, gains[f], SAMPLERATE) for f in bands if f < SAMPLERATE / 2])
+    zi = np.zeros((2, len(sos), 2))
+    work = np.zeros(0)
+    buf = np.zeros(0, dtype=np.float32)
+
+    def run(data):
+        nonlocal work, buf
+        frames = len(data)
+        if len(work) < 2 * frames:
+            work = np.zeros(2 * frames)
+            buf = np.empty_like(data)
+        w = work[:2 * frames].reshape(2, frames)
+        np.copyto(w, data.T)
+        _sosfilt(sos, w, zi)
+        np.copyto(buf, w.T, casting='same_kind')
+    return run
+
+
+def equalizer_runner(eq):
+    buf = np.zeros(0, dtype=np.float32)
+
+    def run(data):
+        nonlocal buf
+        if buf.shape != data.shape:
+            buf = np.empty_like(data)
+        np.copyto(buf, data)
+        eq.process_into(buf, SAMPLERATE)
+    return run
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        fir_path = os.path.join(tmp, "room.wav")
+        rng = np.random.default_rng(1)
+        room = rng.standard_normal((SAMPLERATE // 2, 2)) * np.exp(-np.arange(SAMPLERATE // 2) / 2000)[:, None]
+        sf.write(fir_path, room * 0.05, SAMPLERATE)
+
+        for blocksize in (256, 512, 1024):
+            print(f"--- blocksize {blocksize} ---")
+            for mode in ("graphic10", "graphic31"):
+                gains = curve(MODES[mode])
+                eq = Equalizer()
+                eq.set_format(SAMPLERATE)
+                eq.set_mode(mode)
+                eq.set_all(gains)
+                sos = per_block(cascade_runner(MODES[mode], gains), blocks, blocksize)
+                fft = per_block(equalizer_runner(eq), blocks, blocksize)
+                print(f"{mode:>10}: SOS cascade {sos[0]:7.1f} us (p99 {sos[1]:7.1f})   "
+                      f"partitioned FFT {fft[0]:7.1f} us (p99 {fft[1]:7.1f})")
+
+            eq = Equalizer()
+            eq.set_format(SAMPLERATE)
+            eq.set_mode("graphic31")
+            eq.set_all(curve(MODES["graphic31"]))
+            eq.load_fir(fir_path)
+            fir = per_block(equalizer_runner(eq), blocks, blocksize)
+            print(f"{'+0.5s FIR':>10}: partitioned FFT {fir[0]:7.1f} us (p99 {fir[1]:7.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench_loudness.py
+
+# Loudness analysis throughput
+#   naive      — decode the whole file, K-weight it, loop over the 400 ms gating blocks in Python
+#   vectorized — analyze_file: block-wise decode, one sosfilt per block, numpy segment energies
+#   pool       — LoudnessAnalyzer running vectorized jobs on its worker pool
+# Usage: python benchmarks/bench_loudness.py [tracks] [seconds]
+
+import sys, os, time, math, tempfile, tracemalloc
+from threading import Event
+import numpy as np
+import soundfile as sf
+from scipy.signal import sosfilt
+from common import make_audio
+from core.loudness import analyze_file, k_weighting, LoudnessAnalyzer, LOUDNESS_WORKERS
+
+
+def naive_loudness(path: str) -> float:
+    data, samplerate = sf.read(path, dtype='float64', always_2d=True)
+    filtered = sosfilt(k_weighting(samplerate), data, axis=0)
+    step = int(samplerate * 0.1)
+    energies = []
+    for start in range(0, len(filtered) - 4 * step + 1, step):
+        block = filtered[start:start + 4 * step]
+        energies.append(sum(float(np.mean(block[:, c] ** 2)) for c in range(block.shape[1])))
+    blocks = np.array(energies)
+    levels = -0.691 + 10 * np.log10(np.maximum(blocks, 1e-20))
+    blocks = blocks[levels > -70]
+    threshold = -0.691 + 10 * math.log10(blocks.mean()) - 10
+    blocks = blocks[-0.691 + 10 * np.log10(blocks) > threshold]
+    return -0.691 + 10 * math.log10(blocks.mean())
+
+
+def timed(fn, paths):
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = [fn(p) for p in paths]
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, results
+
+
+def main():
+    tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 240
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [make_audio(os.path.join(tmp, f"track_{i}.flac"), seconds) for i in range(tracks)]
+        audio = tracks * seconds
+
+        naive, naive_mem, naive_values = timed(naive_loudness, paths)
+        vec, vec_mem, vec_values = timed(lambda p: analyze_file(p)['loudness'], paths)
+        diff = max(abs(a - b) for a, b in zip(naive_values, vec_values))
+
+        done = Event()
+        analyzer = LoudnessAnalyzer(lambda batch: None if analyzer.pending else done.set())
+        start = time.perf_counter()
+        analyzer.submit(paths)
+        done.wait()
+        pool = time.perf_counter() - start
+
+    print(f"{tracks} tracks x {seconds:.0f} s ({audio / 60:.0f} min of audio)")
+    print(f"     naive: {naive:6.2f} s  ({audio / naive:6.0f}x realtime)  peak {naive_mem / 2**20:7.1f} MiB")
+    print(f"vectorized: {vec:6.2f} s  ({audio / vec:6.0f}x realtime)  peak {vec_mem / 2**20:7.1f} MiB")
+    print(f"  pool x{LOUDNESS_WORKERS:<2}: {pool:6.2f} s  ({audio / pool:6.0f}x realtime)")
+    print(f"max difference naive vs vectorized: {diff:.4f} LU")
+
+
+if __name__ == "__main__":
+    main()
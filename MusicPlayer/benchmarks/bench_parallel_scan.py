@@ -0,0 +1,29 @@
+# bench_parallel_scan.py
+
+# Cold scan throughput for different worker counts / pool types
+# Usage: python benchmarks/bench_parallel_scan.py [tracks]
+
+import os, sys, tempfile
+from unittest import mock
+from common import generate_library, LibraryHost, timed
+from core.library_index import LibraryIndex
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = os.path.join(tmp, "PlayerMusic")
+        generate_library(base_dir, n)
+
+        for mode, workers in [("thread", 1), ("thread", 4), ("thread", 16), ("process", 4)]:
+            store = LibraryIndex(os.path.join(tmp, f"library_{mode}_{workers}.db"))
+            host = LibraryHost(base_dir, store)
+            settings = {"workers": workers, "mode": mode}
+            with mock.patch("core.playlist.get_scan_settings", return_value=settings):
+                elapsed = timed(host.build_library_index)
+            print(f"{mode:>7} x{workers:<3} {elapsed:.3f} s  {n / elapsed:.0f} files/s")
+
+
+if __name__ == "__main__":
+    main()
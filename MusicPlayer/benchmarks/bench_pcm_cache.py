@@ -0,0 +1,59 @@
+# bench_pcm_cache.py
+
+# Cost of one play: decoding on every play versus the memory-mapped PCM cache
+# The whole track is pulled through source.read() in 1024-frame buffers, as the
+# output callback would, and the CPU time of the process is measured:
+#   stream  — StreamDecoder (decode + resample on its thread)
+#   int16   — MemorySource over a memmap of the int16 cache file
+#   float32 — MemorySource over a memmap of the float32 cache file
+# Also: time to the first buffer, and the cache file size.
+# Usage: python benchmarks/bench_pcm_cache.py [seconds] [audio file]
+
+import sys, os, time, tempfile
+import numpy as np
+from common import make_audio
+from core.audio_source import MemorySource, StreamDecoder
+from core.pcm_cache import PcmCache
+
+OUTPUT_RATE = 44100
+
+
+def play_through(make_source):
+    out = np.zeros((1024, 2), dtype=np.float32)
+    cpu, start = time.process_time(), time.perf_counter()
+    source = make_source()
+    source.start()
+    first = None
+    while not source.finished:
+        if not source.read(out):
+            time.sleep(0.001) # decoder behind: wait like the callback would
+        elif first is None:
+            first = time.perf_counter() - start
+    source.close()
+    return time.process_time() - cpu, first
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 600
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sys.argv[2] if len(sys.argv) > 2 else \
+            make_audio(os.path.join(tmp, "track.flac"), seconds, samplerate=48000)
+
+        caches = {}
+        for fmt in ("int16", "float32"):
+            cache = PcmCache(os.path.join(tmp, fmt), fmt=fmt, min_plays=1)
+            cache.samplerate = OUTPUT_RATE
+            start = time.perf_counter()
+            cache._fill(path)
+            caches[fmt] = (cache, time.perf_counter() - start)
+
+        print(f"{'source':>8} | {'CPU s/play':>10} | {'first buffer ms':>15} | {'file MiB':>8} | {'fill s':>6}")
+        cpu, first = play_through(lambda: StreamDecoder(path, OUTPUT_RATE))
+        print(f"{'stream':>8} | {cpu:10.3f} | {first * 1000:15.2f} | {'':>8} | {'':>6}")
+        for fmt, (cache, fill) in caches.items():
+            cpu, first = play_through(lambda: MemorySource(path, OUTPUT_RATE, pcm=cache.open(path, OUTPUT_RATE)))
+            print(f"{fmt:>8} | {cpu:10.3f} | {first * 1000:15.2f} | {cache.get_stats()['mb']:8.1f} | {fill:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
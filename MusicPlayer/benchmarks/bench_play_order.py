@@ -0,0 +1,58 @@
+# bench_play_order.py
+
+# Playback-order operations on large playlists: plain list vs PlayOrder
+# Usage: python benchmarks/bench_play_order.py [tracks ...]
+
+import sys, time, random
+import common # noqa: F401 (puts the app on sys.path)
+from core.play_order import PlayOrder
+
+
+def bench(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [40_000, 200_000]
+    for n in sizes:
+        paths = [f"/music/playlist_{i % 50:03d}/track_{i:07d}.mp3" for i in range(n)]
+        plain = list(paths)
+        order = PlayOrder(paths)
+        clicks = random.sample(paths, 200)
+        click = iter(clicks * 1000)
+        print(f"--- {n} tracks ---")
+
+        # play_track(path): find the clicked track in the queue
+        old = bench(lambda: plain.index(next(click)), 200)
+        new = bench(lambda: order.index(next(click)), 200)
+        print(f"play (path -> index):  list {old:8.3f} ms   PlayOrder {new:8.4f} ms")
+
+        # next_track(): current path -> index -> following path
+        old = bench(lambda: plain[plain.index(next(click)) + 1], 200)
+        new = bench(lambda: order[order.index(next(click)) + 1], 200)
+        print(f"next:                  list {old:8.3f} ms   PlayOrder {new:8.4f} ms")
+
+        # toggle_shuffle(): shuffle with the current track in front, find its index
+        def old_shuffle():
+            current = next(click)
+            shuffled = list(paths)
+            random.shuffle(shuffled)
+            shuffled.remove(current)
+            shuffled.insert(0, current)
+            return shuffled.index(current)
+
+        def new_shuffle():
+            current = next(click)
+            shuffled = PlayOrder.shuffled(order, first=current)
+            return 0 if shuffled[0] == current else shuffled.index(current)
+
+        old = bench(old_shuffle, 10)
+        new = bench(new_shuffle, 10)
+        print(f"shuffle toggle:        list {old:8.3f} ms   PlayOrder {new:8.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# bench_playlist_queries.py
+
+# Query cost: old resolve + lambda sort vs presorted rank runs + k-way merge
+# Usage: python benchmarks/bench_playlist_queries.py [tracks]
+
+import sys, time
+from common import LibraryHost
+from core.track_info import TrackInfo
+from core.sort_orders import SORT_KEYS
+
+
+def build_host(n: int, folders: int = 50) -> LibraryHost:
+    host = LibraryHost("/music", index_store=None)
+    for i in range(n):
+        track = TrackInfo.from_dict({
+            'path': f"/music/playlist_{i % folders:03d}/track_{i:07d}.mp3",
+            'title': f"Track {(i * 7919) % n}",
+            'artist': f"Artist {i % 2000}",
+            'album': f"Album {(i * 31) % 6000}" if i % 17 else "",
+            'duration': float(i % 600),
+            'mtime': i,
+        })
+        host._add_track(track, f"playlist_{i % folders:03d}")
+    host._library_ready = True
+    return host
+
+
+# The pre-index query path: copy + sort with a lambda on every call
+def old_query(host, query):
+    tracks = host._resolve_query(query)
+    tracks.sort(key=lambda t: (
+        (t.album if t.album and t.album.strip() else "ZZZZZ"),
+        (t.title if t.title else "")
+    ))
+    return tracks
+
+
+def bench(fn, runs=10) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    host = build_host(n)
+    queries = {
+        "global": {"type": "global"},
+        "playlist": {"type": "playlist", "value": "playlist_007"},
+        "custom x10": {"type": "custom", "value": [f"playlist_{i:03d}" for i in range(0, 50, 5)]},
+    }
+
+    for order in SORT_KEYS:
+        host.sort_order = order
+        print(f"--- order: {order} ---")
+        for name, query in queries.items():
+            host.current_query = query
+            host._run_query() # fill the order / run caches
+            new_ms = bench(host._run_query)
+            line = f"{name:>11}: runs+merge {new_ms:8.2f} ms"
+            if order == "album":
+                old_ms = bench(lambda: old_query(host, query))
+                line += f"   old sort {old_ms:8.2f} ms"
+            # Merge result must equal a plain sort with the same key
+            assert host.playlist == sorted(host.playlist, key=SORT_KEYS[order])
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# bench_playlist_window.py
+
+# Cost of handing a playlist to the UI: every track as a dict vs one window + album groups
+# Usage: python benchmarks/bench_playlist_window.py [tracks]
+
+import sys, json
+from bench_playlist_queries import build_host, bench
+from core.playlist import PAGE_SIZE
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    host = build_host(n)
+    host.current_query = {"type": "global"}
+    host._run_query()
+
+    full_ms = bench(host.get_playlist_dicts)
+    full_kb = len(json.dumps(host.get_playlist_dicts())) / 1024
+
+    def select():
+        host._playlist_groups = None
+        return host.select_playlist({"type": "global"}, PAGE_SIZE)
+
+    window_ms = bench(select)
+    window = select()
+    window_kb = len(json.dumps(window)) / 1024
+    page_ms = bench(lambda: host.get_playlist_window(n // 2, PAGE_SIZE))
+
+    assert window["total"] == n and len(window["tracks"]) == PAGE_SIZE
+    assert sum(group["count"] for group in window["groups"]) == n
+    assert host.get_playlist_window_from(window["tracks"][5]["path"])["offset"] == 5
+
+    print(f"{n} tracks")
+    print(f"  full list:       {full_ms:8.2f} ms  {full_kb:10.1f} KiB")
+    print(f"  select + groups: {window_ms:8.2f} ms  {window_kb:10.1f} KiB ({len(window['groups'])} groups)")
+    print(f"  next window:     {page_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench_position.py
+
+# Position queries while tracks load, on the null output backend
+# A thread keeps calling get_playback_info() while the main thread loads tracks
+# with play_track() in "memory"-style loading (the whole file decoded under the
+# player lock). Reported: query latency (p50 / max), the longest gap between two
+# answers, and the progress updates pushed per second while playing and paused.
+# Usage: python benchmarks/bench_position.py [seconds per track]
+
+import sys, os, time, tempfile
+from threading import Thread, Event
+import numpy as np
+from common import make_audio
+from core.player import MusicPlayer
+from core.audio_source import MemorySource
+
+LOADS = 6
+
+
+class LoadingPlayer(MusicPlayer):
+    """Opens every track as a MemorySource, like the "memory" playback mode."""
+    def _open_source(self, path: str):
+        return MemorySource(path, self._samplerate)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [make_audio(os.path.join(tmp, f"{i}.flac"), seconds, samplerate=48000) for i in range(2)]
+        player = LoadingPlayer()
+        player.output_backend = "null"
+        pushed = []
+        player.set_progress_callback(lambda info: pushed.append(time.perf_counter()))
+
+        done = Event()
+        latencies, stamps = [], []
+
+        def poll():
+            while not done.is_set():
+                start = time.perf_counter()
+                player.get_playback_info()
+                end = time.perf_counter()
+                latencies.append(end - start)
+                stamps.append(end)
+                time.sleep(0.01)
+
+        poller = Thread(target=poll)
+        poller.start()
+        loads = []
+        for i in range(LOADS):
+            start = time.perf_counter()
+            player.play_track(playlist=[paths[i % 2]])
+            loads.append(time.perf_counter() - start)
+        done.set()
+        poller.join()
+
+        lat = np.array(latencies) * 1000
+        gap = np.diff(stamps).max() * 1000
+        print(f"track load (whole decode): median {np.median(loads) * 1000:.0f} ms")
+        print(f"get_playback_info during loads: p50 {np.median(lat):.3f} ms, max {lat.max():.2f} ms, "
+              f"longest gap between answers {gap:.0f} ms")
+
+        pushed.clear()
+        time.sleep(2)
+        playing = len(pushed) / 2
+        player.toggle_pause()
+        time.sleep(0.5)
+        pushed.clear()
+        time.sleep(2)
+        print(f"progress updates: {playing:.1f}/s playing, {len(pushed) / 2:.1f}/s paused "
+              f"(progress_hz {player.progress_hz:g})")
+        player.stop_engine()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# bench_render.py
+
+# Offline render throughput (core.render) on generated FLAC tracks
+#   whole    — the file read at once, equalized with process(), written at once
+#   streamed — render_file: blocks of RENDER_BLOCK_FRAMES in, blocks out
+#   pool     — render_files over all tracks with 1..N worker processes
+# Each single-file run is its own process so peak RSS is its own.
+# Usage: python benchmarks/bench_render.py [minutes per track] [tracks]
+
+import sys, os, json, time, tempfile, resource, subprocess
+import soundfile as sf
+from common import make_audio
+from core.equalizer import Equalizer, MODES
+from core.render import render_file, render_files, RENDER_WORKERS
+
+EQ_STATE = {"mode": "graphic31", **{str(freq): float((i % 5) - 2) for i, freq in enumerate(MODES["graphic31"])}}
+
+
+def render_whole(src: str, dst: str):
+    data, samplerate = sf.read(src, dtype='float32', always_2d=True)
+    eq = Equalizer()
+    eq.set_format(samplerate, data.shape[1])
+    eq.set_all(EQ_STATE)
+    eq.settle()
+    sf.write(dst, eq.process(data, samplerate), samplerate)
+
+
+def run_one(mode: str, src: str, dst: str) -> dict:
+    start = time.perf_counter()
+    if mode == "whole":
+        render_whole(src, dst)
+    else:
+        render_file(src, dst, EQ_STATE)
+    return {'elapsed': time.perf_counter() - start,
+            'rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [make_audio(os.path.join(tmp, f"track_{i}.flac"), minutes * 60) for i in range(tracks)]
+        seconds = minutes * 60
+
+        print(f"{minutes:g} min tracks, graphic31 EQ")
+        print(f"{'mode':>9} | {'time s':>7} | {'realtime':>8} | {'RSS MiB':>7}")
+        for mode in ("whole", "streamed"):
+            out = subprocess.run([sys.executable, __file__, "--run", mode, paths[0], os.path.join(tmp, f"{mode}.flac")],
+                                 capture_output=True, text=True)
+            r = json.loads(out.stdout.splitlines()[-1])
+            print(f"{mode:>9} | {r['elapsed']:7.2f} | {seconds / r['elapsed']:7.0f}x | {r['rss_mib']:7.1f}")
+
+        print(f"\n{tracks} tracks, render_files")
+        print(f"{'workers':>7} | {'time s':>7} | {'realtime':>8}")
+        for workers in sorted({1, 2, RENDER_WORKERS}):
+            report = render_files(paths, os.path.join(tmp, f"out_{workers}"), EQ_STATE, workers=workers)
+            print(f"{report['workers']:7d} | {report['elapsed']:7.2f} | {report['realtime']:7.0f}x")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 4 and sys.argv[1] == "--run":
+        print(json.dumps(run_one(sys.argv[2], sys.argv[3], sys.argv[4])))
+    else:
+        main()
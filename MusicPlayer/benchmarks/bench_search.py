@@ -0,0 +1,45 @@
+# bench_search.py
+
+# Search index build time and per-query latency on a synthetic library
+# Usage: python benchmarks/bench_search.py [tracks]
+
+import sys, time
+import common # noqa: F401 (puts the app on sys.path)
+from core.search_index import SearchIndex
+from core.track_info import TrackInfo
+
+WORDS = ["love", "night", "Ночі", "зоря", "Café", "dream", "fire", "Ёлка", "river", "moon"]
+QUERIES = ["lo", "ёлка fire", "ночі", "cafe", "елка", "artist 12", "zzz"]
+
+
+def synthetic_tracks(n: int):
+    for i in range(n):
+        yield TrackInfo.from_dict({
+            'path': f"/music/track_{i:07d}.mp3",
+            'title': f"{WORDS[i % 10]} {WORDS[(i * 7) % 10]} {i}",
+            'artist': f"Artist {i % 2000}",
+            'album': f"{WORDS[(i * 3) % 10]} Album {i % 6000}",
+        })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    tracks = list(synthetic_tracks(n))
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.rebuild(tracks)
+    print(f"Index build: {n} tracks in {time.perf_counter() - start:.2f} s")
+
+    for query in QUERIES:
+        index.search(query) # warm the sorted token list
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            hits = index.search(query)
+        elapsed = (time.perf_counter() - start) / runs * 1000
+        print(f"{query!r:>16}: {len(hits):4d} hits  {elapsed:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
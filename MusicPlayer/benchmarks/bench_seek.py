@@ -0,0 +1,87 @@
+# bench_seek.py
+
+# Seek latency into a long MP3 (an hour-long DJ mix by default)
+#   libsndfile — seek_frames on a freshly opened file (what a new decoder pays)
+#                and on a file that already seeked once (its frame walk is kept)
+#   indexed    — SeekIndex: open at the checkpoint before the target, drop
+#                the frames up to it
+# Each time includes decoding the first 4096-frame block after the seek, read
+# the way StreamDecoder reads it (read_frames).
+# Usage: python benchmarks/bench_seek.py [minutes] [mp3 file]
+
+import sys, os, time, tempfile
+import numpy as np
+import soundfile as sf
+import common # noqa: F401 (sys.path)
+from core.seek_index import SeekIndexStore
+from core.audio_source import BLOCK_FRAMES, read_frames, seek_frames, skip_frames
+
+SAMPLERATE = 44100
+POSITIONS = (0.02, 0.25, 0.5, 0.75, 0.98)
+
+
+# Noise through a slowly moving low-pass, written as MP3 block by block
+def make_mix(path: str, minutes: float) -> str:
+    rng = np.random.default_rng(0)
+    with sf.SoundFile(path, 'w', SAMPLERATE, 2, format='MP3') as f:
+        for _ in range(int(minutes * 6)):
+            noise = rng.standard_normal((SAMPLERATE * 10, 2)).astype(np.float32)
+            f.write(0.1 * np.cumsum(noise, axis=0) / np.sqrt(np.arange(1, len(noise) + 1))[:, None])
+    return path
+
+
+def ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 2:
+            path = sys.argv[2]
+        else:
+            print(f"encoding a {minutes:.0f} min MP3 ...")
+            path = make_mix(os.path.join(tmp, "mix.mp3"), minutes)
+        store = SeekIndexStore(os.path.join(tmp, "index"))
+
+        build = ms(lambda: store.build(path))
+        start = time.perf_counter()
+        index = store.load(path)
+        load = (time.perf_counter() - start) * 1000
+        frames = sf.info(path).frames
+
+        print(f"{os.path.getsize(path) / 2**20:.1f} MiB, {frames / SAMPLERATE / 60:.1f} min, "
+              f"{index.frames} MPEG frames")
+        print(f"index: built in {build:.0f} ms, {index.nbytes / 1024:.1f} KiB, loaded in {load:.2f} ms")
+        print(f"{'position':>9} {'fresh':>10} {'warm':>10} {'indexed':>10}")
+
+        warm = sf.SoundFile(path)
+        block = np.zeros((BLOCK_FRAMES, warm.channels), dtype=np.float32)
+        warm.seek(frames - 1)
+        for pos in POSITIONS:
+            target = int(frames * pos)
+
+            def fresh():
+                with sf.SoundFile(path) as f:
+                    seek_frames(f, target, block)
+                    read_frames(f, block)
+
+            def warmed():
+                seek_frames(warm, target, block)
+                read_frames(warm, block)
+
+            def indexed():
+                handle, view, skip = index.open_at(path, target)
+                skip_frames(handle, skip, block)
+                read_frames(handle, block)
+                handle.close()
+                view.close()
+
+            print(f"{pos * 100:8.0f}% {ms(fresh):8.2f}ms {ms(warmed):8.2f}ms {ms(indexed):8.2f}ms")
+        warm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_skip_latency.py
+
+# Skip-to-audio latency: time from a skip until the output callback delivers the
+# new track's first samples.
+#   reopen     — the old path: decode the file, open and start a new OutputStream
+#   persistent — the engine path: swap the source of the already running stream
+# Needs a working output device (PortAudio); the audio is played at low volume.
+# Usage: python benchmarks/bench_skip_latency.py [skips]
+
+import sys, os, time, tempfile, statistics
+from threading import Event
+import numpy as np
+import sounddevice as sd
+import soundfile as sf
+from common import make_audio
+from core.player import MusicPlayer
+
+
+def reopen_latency(path: str) -> float:
+    heard = Event()
+
+    def callback(outdata, frames, time_info, status):
+        chunk = data[pos[0]:pos[0] + frames]
+        outdata[:len(chunk)] = chunk
+        outdata[len(chunk):].fill(0)
+        pos[0] += len(chunk)
+        heard.set()
+
+    start = time.perf_counter()
+    data, samplerate = sf.read(path, dtype='float32', always_2d=True)
+    pos = [0]
+    stream = sd.OutputStream(samplerate=samplerate, channels=data.shape[1], callback=callback)
+    stream.start()
+    heard.wait()
+    elapsed = time.perf_counter() - start
+    stream.stop()
+    stream.close()
+    return elapsed
+
+
+# Player whose callback reports when the wanted track becomes audible
+class ProbedPlayer(MusicPlayer):
+    def __init__(self):
+        super().__init__()
+        self.heard = Event()
+        self.wanted_path = None
+
+    def _audio_callback(self, outdata, frames, time_info, status):
+        super()._audio_callback(outdata, frames, time_info, status)
+        source = self._source
+        if source is not None and source.path == self.wanted_path and np.any(outdata):
+            self.heard.set()
+
+
+def persistent_latency(player: ProbedPlayer, index: int) -> float:
+    player.heard.clear()
+    player.wanted_path = player.playlist_playback[index]
+    start = time.perf_counter()
+    player.play_track(index=index)
+    player.heard.wait()
+    return time.perf_counter() - start
+
+
+def main():
+    skips = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [make_audio(os.path.join(tmp, f"track_{i}.flac"), 60,
+                            samplerate=48000 if i % 2 else 44100) for i in range(4)]
+
+        reopen = [reopen_latency(paths[i % len(paths)]) for i in range(skips)]
+
+        player = ProbedPlayer()
+        player.equalizer.set_volume(10)
+        player.play_track(playlist=paths)
+        persistent = [persistent_latency(player, (i + 1) % len(paths)) for i in range(skips)]
+        player.stop_engine()
+
+    for name, values in (("reopen", reopen), ("persistent", persistent)):
+        print(f"{name:>10}: median {statistics.median(values) * 1000:7.1f} ms   "
+              f"max {max(values) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
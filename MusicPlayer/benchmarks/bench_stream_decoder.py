@@ -0,0 +1,43 @@
+# bench_stream_decoder.py
+
+# Time-to-first-sample and peak memory: whole-file decode vs streaming ring buffer
+# Usage: python benchmarks/bench_stream_decoder.py [minutes]
+
+import sys, os, time, tempfile, tracemalloc
+import numpy as np
+from common import make_audio
+from core.audio_source import MemorySource, StreamDecoder
+
+
+def measure(cls, path, frames=512):
+    out = np.zeros((frames, 2), dtype=np.float32)
+    tracemalloc.start()
+    start = time.perf_counter()
+    source = cls(path)
+    source.start()
+    while source.read(out) == 0: # first callback with audio
+        time.sleep(0.0005)
+    first = time.perf_counter() - start
+
+    # Drain a few seconds like the callback would
+    for _ in range(int(source.samplerate * 3 / frames)):
+        while source.read(out) == 0 and not source.finished:
+            time.sleep(0.0005)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    source.close()
+    return first, peak
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_audio(os.path.join(tmp, "mix.flac"), minutes * 60)
+        print(f"{minutes:g} min stereo 44.1 kHz FLAC")
+        for name, cls in (("memory", MemorySource), ("stream", StreamDecoder)):
+            first, peak = measure(cls, path)
+            print(f"  {name:>6}: first sample {first * 1000:8.1f} ms   peak memory {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
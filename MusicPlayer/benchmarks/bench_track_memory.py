@@ -0,0 +1,66 @@
+# bench_track_memory.py
+
+# Memory of the in-memory library: plain __dict__ records (old layout)
+# vs slotted TrackInfo with interned artist/album strings
+# Usage: python benchmarks/bench_track_memory.py [tracks ...]
+
+import sys, gc, tracemalloc
+from common import timed
+from core.track_info import TrackInfo
+from core.utils import fold
+
+ROW_KEYS = {'added': 'mtime'} # TrackInfo fields stored under another name in index rows
+
+
+# Old record layout: per-instance __dict__ holding the fields of TrackInfo
+# (taken from its __slots__, so both always carry the same data), strings not shared
+class DictTrack:
+    cover_path = TrackInfo.cover_path
+    as_dict = TrackInfo.as_dict
+
+    def __init__(self, data):
+        for name in TrackInfo.__slots__:
+            setattr(self, name, data.get(ROW_KEYS.get(name, name)))
+        self.title_key = fold(self.title or '')
+        self.artist_key = fold(self.artist or '')
+        self.album_key = fold(self.album) if self.album and self.album.strip() else None
+
+
+def synthetic_rows(n: int):
+    for i in range(n):
+        # Fresh string objects, like values decoded from tags or SQLite rows
+        yield {
+            'path': f"/music/PlayerMusic/playlist_{i % 50:03d}/track_{i:07d}.mp3",
+            'title': f"Track {i}",
+            'artist': f"Artist {i % 2000}",
+            'album': f"Album {i % 6000}",
+            'cover_key': f"{i % 6000:040x}.jpg",
+            'duration': 120.0 + i % 300,
+            'mtime': 1_700_000_000_000_000_000 + i,
+            'loudness': -14.0 - (i % 100) / 10,
+            'peak': 0.5 + (i % 50) / 100,
+        }
+
+
+def measure(factory, n: int):
+    gc.collect()
+    tracemalloc.start()
+    records = [factory(row) for row in synthetic_rows(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, size
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 500_000]
+    for n in sizes:
+        print(f"--- {n} tracks ---")
+        for name, factory in [("dict records", DictTrack), ("slotted TrackInfo", TrackInfo.from_dict)]:
+            records, size = measure(factory, n)
+            elapsed = timed(lambda: [t.as_dict() for t in records])
+            print(f"{name:>18}: {size / 2**20:8.1f} MiB  ({size / n:.0f} B/track)  serialize {elapsed:.3f} s")
+            del records
+
+
+if __name__ == "__main__":
+    main()
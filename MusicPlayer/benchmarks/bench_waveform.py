@@ -0,0 +1,71 @@
+# bench_waveform.py
+
+# Cost of building waveform peaks
+#   naive       — decode the whole file, loop over the bins in Python
+#   separate    — a second block-wise decode just for the peaks (what a
+#                 standalone waveform pass would cost on top of playback)
+#   tap         — PeakBuilder fed with blocks the decoder reads anyway:
+#                 only the reduction is paid, per 4096-frame decoder block
+# Usage: python benchmarks/bench_waveform.py [seconds]
+
+import sys, os, time, tempfile
+import numpy as np
+import soundfile as sf
+from common import make_audio
+from core.waveform import PeakBuilder, quantize
+from core.audio_source import BLOCK_FRAMES
+
+
+def naive_peaks(path: str, frames_per_bin: int) -> np.ndarray:
+    data, _ = sf.read(path, dtype='float32', always_2d=True)
+    bins = -(-len(data) // frames_per_bin)
+    out = np.zeros((bins, 2), dtype=np.float32)
+    for i in range(bins):
+        chunk = data[i * frames_per_bin:(i + 1) * frames_per_bin]
+        out[i] = chunk.min(), chunk.max()
+    return quantize(out)
+
+
+def separate_peaks(path: str) -> PeakBuilder:
+    with sf.SoundFile(path) as f:
+        builder = PeakBuilder(f.frames, f.samplerate)
+        for block in f.blocks(blocksize=BLOCK_FRAMES, dtype='float32', always_2d=True):
+            builder.feed(block)
+    builder.finish()
+    return builder
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 600
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_audio(os.path.join(tmp, "track.flac"), seconds)
+
+        start = time.perf_counter()
+        builder = separate_peaks(path)
+        separate = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = naive_peaks(path, builder.frames_per_bin)
+        naive = time.perf_counter() - start
+
+        # The decoder's blocks, already in memory: only the reduction is timed
+        data, samplerate = sf.read(path, dtype='float32', always_2d=True)
+        blocks = [data[i:i + BLOCK_FRAMES] for i in range(0, len(data), BLOCK_FRAMES)]
+        tap_builder = PeakBuilder(len(data), samplerate)
+        start = time.perf_counter()
+        for block in blocks:
+            tap_builder.feed(block)
+        tap_builder.finish()
+        tap = time.perf_counter() - start
+
+    same = np.array_equal(reference, builder.peaks()) and np.array_equal(reference, tap_builder.peaks())
+    print(f"{seconds:.0f} s track, {builder.bins} bins of {builder.frames_per_bin} frames "
+          f"({builder.bins * 2 / 1024:.1f} KiB cached)")
+    print(f"   naive: {naive * 1000:8.1f} ms")
+    print(f"separate: {separate * 1000:8.1f} ms  (second decode)")
+    print(f"     tap: {tap * 1000:8.1f} ms  ({tap / len(blocks) * 1e6:.1f} us per decoder block)")
+    print(f"identical envelopes: {same}")
+
+
+if __name__ == "__main__":
+    main()
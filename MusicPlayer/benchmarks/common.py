@@ -0,0 +1,105 @@
+# common.py
+
+# Shared helpers for the benchmark scripts: synthetic library generation
+# and a lightweight host for the library/query code (no audio device needed)
+
+import os, sys, time
+from threading import RLock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutagen.id3 import ID3, TIT2, TPE1, TALB
+from core.playlist import PlaylistManager
+from core.search_index import SearchIndex
+from core.facet_index import FacetIndex
+from core.play_order import PlayOrder
+
+# One MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, no padding (417 bytes)
+MP3_FRAME = b'\xff\xfb\x90\x00' + b'\x00' * 413
+
+
+# Write a tiny but valid tagged mp3
+def make_mp3(path: str, title: str, artist: str, album: str, frames: int = 8):
+    with open(path, 'wb') as f:
+        f.write(MP3_FRAME * frames)
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text=title))
+    tags.add(TPE1(encoding=3, text=artist))
+    tags.add(TALB(encoding=3, text=album))
+    tags.save(path)
+
+
+# Generate n tracks spread over playlist folders inside base_dir
+def generate_library(base_dir: str, n: int, playlists: int = 20, artists: int = 200) -> list:
+    paths = []
+    for i in range(n):
+        folder = os.path.join(base_dir, f"playlist_{i % playlists:03d}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"track_{i:06d}.mp3")
+        make_mp3(path, f"Track {i}", f"Artist {i % artists}", f"Album {i % (artists * 3)}")
+        paths.append(path)
+    return paths
+
+
+# Write a test tone (stereo sweep-ish sine) as an audio file soundfile can decode
+def make_audio(path: str, seconds: float, samplerate: int = 44100, channels: int = 2) -> str:
+    import numpy as np
+    import soundfile as sf
+    block = samplerate * 10
+    with sf.SoundFile(path, 'w', samplerate, channels) as f:
+        done = 0
+        total = int(seconds * samplerate)
+        while done < total:
+            n = min(block, total - done)
+            t = (np.arange(done, done + n) / samplerate).astype(np.float32)
+            tone = 0.3 * np.sin(2 * np.pi * (220 + 20 * np.sin(t)) * t)
+            f.write(np.repeat(tone[:, None], channels, axis=1))
+            done += n
+    return path
+
+
+# Scan benchmarks measure indexing only: loudness jobs are accepted, never run
+class IdleAnalyzer:
+    pending = 0
+    stats = {}
+
+    def submit(self, paths):
+        pass
+
+    def cancel(self):
+        pass
+
+
+# Minimal PlaylistManager host with the state MusicPlayer normally provides
+class LibraryHost(PlaylistManager):
+    def __init__(self, base_dir: str, index_store):
+        self.base_dir = base_dir
+        self._index_store = index_store
+        self._loudness = IdleAnalyzer()
+        self._lock = RLock()
+        self._library = []
+        self._facets = FacetIndex()
+        self._by_playlist = {}
+        self._by_path = {}
+        self._library_ready = False
+        self._library_watcher = None
+        self._library_change_callback = None
+        self._search_index = SearchIndex()
+        self._query_before_search = None
+        self._sorted_runs = {}
+        self.sort_order = "album"
+        self.current_query = None
+        self.current_track = None
+        self.current_index = -1
+        self.playlist = []
+        self.playlist_playback = PlayOrder()
+        self._playlist_order = PlayOrder()
+        self._playlist_groups = None
+        self._shuffle_mode = False
+
+
+# Run fn once and return elapsed seconds
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
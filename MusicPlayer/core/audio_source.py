@@ -0,0 +1,395 @@
+# audio_source.py
+
+# Audio sources the output callback pulls frames from
+# MemorySource holds a fully decoded track, StreamDecoder decodes blocks on a
+# background thread into a fixed-size ring buffer, so memory per track stays
+# bounded and the first samples are ready after one block, whatever the length.
+# Both deliver stereo float32 at the output rate: tracks recorded at another
+# rate go through the polyphase resampler. Frame counts and positions are in
+# output frames. Sources do not apply their normalization gain: the callback
+# passes source.gain to the equalizer, which folds it into the volume multiply
+# (one pass over the buffer). Given a WaveformStore, a source also
+# feeds the track's peak envelope from the blocks it decodes. A StreamDecoder
+# over an MP3 seeks through a cached byte-offset index (see core/seek_index.py),
+# built in the decoder's idle time. Given a DecodedCache,
+# a MemorySource stores its decode there and a StreamDecoder that decodes a
+# track from start to end stores the blocks it produced; a MemorySource can
+# then be built from the cached array without decoding again. It also plays
+# int16 or float32 maps of the on-disk PCM cache (see core/pcm_cache.py).
+# pysoundfile seeks back to its own frame count after every read. On MP3 that
+# seek restarts libmpg123 without the bit reservoir, garbling the first MPEG
+# frame after each block, so MP3 blocks are read from libsndfile directly
+# (read_frames) and seeks start SEEK_PREROLL frames early (seek_frames).
+
+import numpy as np
+import soundfile as sf
+try:
+    from soundfile import _snd, _ffi # libsndfile under pysoundfile, for read_frames
+except ImportError:
+    _snd = _ffi = None
+from threading import Thread, Event
+from typing import Optional
+from core.resampler import PolyphaseResampler, resample_whole
+
+BLOCK_FRAMES = 4096 # frames decoded per read
+RING_SECONDS = 2.0 # decoded audio kept ahead of the output
+OUTPUT_CHANNELS = 2
+SEQUENTIAL_FORMATS = ('MP3',) # formats pysoundfile's read/seek pairs corrupt
+SEEK_PREROLL = 10 * 1152 # frames decoded and dropped before an MP3 seek target (bit reservoir)
+
+
+# Mono is played on both channels, extra channels beyond stereo are dropped
+def to_stereo(data: np.ndarray) -> np.ndarray:
+    if data.shape[1] == OUTPUT_CHANNELS:
+        return data
+    if data.shape[1] == 1:
+        return np.repeat(data, OUTPUT_CHANNELS, axis=1)
+    return data[:, :OUTPUT_CHANNELS]
+
+
+# Whether a file can be decoded in blocks (and seeked) without corrupting the audio:
+# an MP3 only when libsndfile can be called directly
+def decodes_in_blocks(path: str) -> bool:
+    return _snd is not None or not path.lower().endswith('.mp3')
+
+
+# Read into out (C-contiguous float32, frames x file channels) from the current position
+def read_frames(f: sf.SoundFile, out: np.ndarray) -> int:
+    if f.format in SEQUENTIAL_FORMATS and _snd is not None:
+        return _snd.sf_readf_float(f._file, _ffi.from_buffer('float[]', out), len(out))
+    return f.read(out=out, dtype='float32', always_2d=True).shape[0]
+
+
+# Decode and drop count frames through scratch (float32, file channels); returns the count left
+def skip_frames(f: sf.SoundFile, count: int, scratch: np.ndarray) -> int:
+    while count > 0:
+        n = read_frames(f, scratch[:min(count, len(scratch))])
+        if not n:
+            break
+        count -= n
+    return count
+
+
+# Seek to frame; an MP3 is positioned SEEK_PREROLL frames early and decoded up to it
+def seek_frames(f: sf.SoundFile, frame: int, scratch: np.ndarray):
+    start = max(0, frame - SEEK_PREROLL) if f.format in SEQUENTIAL_FORMATS else frame
+    f.seek(start)
+    skip_frames(f, frame - start, scratch)
+
+
+# float32 blocks of an open file from its current position. Given out, blocks are views of it.
+def read_blocks(f: sf.SoundFile, blocksize: int, out: Optional[np.ndarray] = None):
+    if _snd is None and f.format in SEQUENTIAL_FORMATS:
+        # No direct reads: only one whole-file read decodes correctly
+        data = f.read(dtype='float32', always_2d=True)
+        for start in range(0, len(data), blocksize):
+            yield data[start:start + blocksize]
+        return
+    while True:
+        buf = out if out is not None else np.empty((blocksize, f.channels), dtype=np.float32)
+        n = read_frames(f, buf[:blocksize])
+        if not n:
+            break
+        yield buf[:n]
+
+
+class RingBuffer:
+    """
+    Single-producer / single-consumer ring of float32 frames.
+    Only the producer moves the write counter, only the consumer moves the
+    read counter, so no lock is needed between the decoder and the callback.
+    """
+    def __init__(self, capacity: int, channels: int):
+        self.capacity = capacity
+        self._buf = np.zeros((capacity, channels), dtype=np.float32)
+        self.written = 0 # total frames written (producer)
+        self.read_count = 0 # total frames read (consumer)
+        self._discard_until = 0 # frames before this counter are stale (after a seek)
+
+    @property
+    def available(self) -> int:
+        return self.written - max(self.read_count, self._discard_until)
+
+    # Stale frames (before a discard) may be overwritten right away
+    @property
+    def free(self) -> int:
+        return self.capacity - (self.written - max(self.read_count, self._discard_until))
+
+    def write(self, data: np.ndarray) -> int:
+        n = min(len(data), self.free)
+        if n <= 0:
+            return 0
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        if n > first:
+            self._buf[:n - first] = data[first:n]
+        self.written += n
+        return n
+
+    def read(self, out: np.ndarray) -> int:
+        if self.read_count < self._discard_until:
+            self.read_count = self._discard_until
+        n = min(len(out), self.written - self.read_count)
+        if n <= 0:
+            return 0
+        start = self.read_count % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        if n > first:
+            out[first:n] = self._buf[:n - first]
+        self.read_count += n
+        return n
+
+    # Producer side: drop everything written so far (the consumer skips it)
+    def discard(self):
+        self._discard_until = self.written
+
+
+class MemorySource:
+    """
+    Whole track decoded up front (the classic playback path), or played from
+    pcm, an array decoded earlier (stereo at out_rate, gain not applied):
+    float32, or int16 full scale, e.g. a memory map of the PCM cache.
+    """
+    def __init__(self, path: str, out_rate: Optional[int] = None, gain: float = 1.0, waveforms=None,
+                 pcm: Optional[np.ndarray] = None, decoded=None):
+        self.path = path
+        if pcm is not None:
+            self.samplerate = out_rate
+            self._data = pcm
+        else:
+            data, file_rate = sf.read(path, dtype='float32', always_2d=True)
+            peaks = waveforms.builder(path, len(data), file_rate) if waveforms is not None else None
+            if peaks is not None:
+                peaks.feed(data)
+                peaks.finish()
+            self.samplerate = out_rate or file_rate
+            self._data = resample_whole(to_stereo(data), file_rate, self.samplerate)
+            if decoded is not None:
+                decoded.put(path, self.samplerate, self._data)
+        # int16 is brought to full scale in the copy to out, before the equalizer's filters
+        self._scale = np.float32(1 / 32768.0) if self._data.dtype == np.int16 else None
+        self.gain = np.float32(gain)
+        self.channels = OUTPUT_CHANNELS
+        self.frames = len(self._data)
+        self._pos = 0
+
+    def start(self):
+        pass
+
+    def read(self, out: np.ndarray) -> int:
+        chunk = self._data[self._pos:self._pos + len(out)]
+        n = len(chunk)
+        if self._scale is not None:
+            np.multiply(chunk, self._scale, out=out[:n])
+        else:
+            out[:n] = chunk
+        self._pos += n
+        return n
+
+    @property
+    def position(self) -> int:
+        return self._pos
+
+    @property
+    def finished(self) -> bool:
+        return self._pos >= self.frames
+
+    def seek(self, frame: int) -> bool:
+        if 0 <= frame < self.frames:
+            self._pos = frame
+            return True
+        return False
+
+    # The callback may still hold this source for one buffer — data is left to the GC
+    def close(self):
+        pass
+
+
+class StreamDecoder:
+    """
+    Decodes a track block by block on a daemon thread into a ring buffer.
+    Only for formats that decode in blocks (see decodes_in_blocks).
+    """
+    def __init__(self, path: str, out_rate: Optional[int] = None,
+                 block_frames: int = BLOCK_FRAMES, ring_seconds: float = RING_SECONDS,
+                 gain: float = 1.0, waveforms=None, seek_indexes=None, decoded=None):
+        self.path = path
+        self.gain = np.float32(gain)
+        self._file = sf.SoundFile(path)
+        self.file_rate = self._file.samplerate
+        self._file_frames = self._file.frames
+        self._view = None # byte view under _file after an indexed seek
+        self._left = None # file frames still to play after an indexed seek (encoder padding is not trimmed)
+        self._peaks = waveforms.builder(path, self._file_frames, self.file_rate) if waveforms is not None else None
+        self._seek_index = None
+        self._scanner = None
+        if seek_indexes is not None and self._file.format == 'MP3':
+            self._seek_index = seek_indexes.load(path)
+            if self._seek_index is None:
+                self._scanner = seek_indexes.scanner(path)
+        self.samplerate = out_rate or self.file_rate
+        self.channels = OUTPUT_CHANNELS
+        self.block_frames = block_frames
+
+        self._resampler = None
+        if self.samplerate != self.file_rate:
+            self._resampler = PolyphaseResampler(self.file_rate, self.samplerate, self.channels)
+            self.frames = self._resampler.output_length(self._file_frames)
+        else:
+            self.frames = self._file_frames
+
+        # Output frames one decoded block can turn into (resampler tail included)
+        self._room = -(-block_frames * self.samplerate // self.file_rate) + 256
+        capacity = max(self._room * 2, int(self.samplerate * ring_seconds))
+        self._ring = RingBuffer(capacity, self.channels)
+        self._block = np.zeros((block_frames, self._file.channels), dtype=np.float32)
+        # Whole-track copy for the decoded cache, filled while decoding from the start
+        self._decoded = decoded
+        self._capture = None
+        self._captured = 0
+        if decoded is not None and decoded.admits(self.frames * self.channels * 4):
+            self._capture = np.empty((self.frames, self.channels), dtype=np.float32)
+        # (ring counter, file frame) — maps ring position to track position
+        self._origin = (0, 0)
+        self._seek_to = None
+        self._eof = False
+        self._wake = Event()
+        self._stopped = Event()
+        self._thread = None
+
+    # Decode the first block right away so output can begin without waiting
+    def start(self):
+        self._decode_block()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # Wake up often enough to refill before the ring runs dry
+        interval = self.block_frames / self.file_rate / 4
+        try:
+            while not self._stopped.is_set():
+                if self._seek_to is not None:
+                    self._do_seek()
+                if self._eof or self._ring.free < self._room:
+                    # Idle: walk the seek index a step at a time
+                    if self._scanner is not None and self._scanner.step():
+                        self._seek_index, self._scanner = self._scanner.index, None
+                    self._wake.wait(interval)
+                    self._wake.clear()
+                    continue
+                self._decode_block()
+        except Exception as e:
+            print(f"⚠️ Decoder error ({self.path}): {e}")
+            self._eof = True
+        finally:
+            self._close_file()
+            if self._peaks is not None:
+                self._peaks.abandon()
+            if self._scanner is not None:
+                self._scanner.abandon()
+
+    def _close_file(self):
+        self._file.close()
+        if self._view is not None:
+            self._view.close()
+            self._view = None
+
+    def _decode_block(self):
+        n = read_frames(self._file, self._block)
+        if self._left is not None:
+            n = min(n, self._left)
+            self._left -= n
+        if n:
+            if self._peaks is not None:
+                self._peaks.feed(self._block[:n])
+            data = to_stereo(self._block[:n])
+            if self._resampler is not None:
+                data = self._resampler.process(data)
+            self._capture_block(data)
+            self._ring.write(data)
+        if n < self.block_frames:
+            if self._resampler is not None:
+                tail = self._resampler.flush()
+                self._capture_block(tail)
+                self._ring.write(tail)
+            self._eof = True
+            if self._capture is not None:
+                self._decoded.put(self.path, self.samplerate, self._capture[:self._captured])
+                self._capture = None
+            # Decoded to the end once: the envelope is done (seeks back add nothing)
+            if self._peaks is not None:
+                self._peaks.finish()
+                self._peaks = None
+
+    def _capture_block(self, data: np.ndarray):
+        if self._capture is None:
+            return
+        end = self._captured + len(data)
+        if end > len(self._capture):
+            self._capture = None # longer than the header said: not cached
+            return
+        self._capture[self._captured:end] = data
+        self._captured = end
+
+    def _do_seek(self):
+        frame = self._seek_to
+        self._capture = None # the copy would have a hole
+        target = min(self._file_frames, frame * self.file_rate // self.samplerate)
+        if self._seek_index is not None:
+            self._seek_indexed(target)
+        else:
+            seek_frames(self._file, target, self._block)
+        if self._resampler is not None:
+            self._resampler.reset()
+        if self._peaks is not None:
+            self._peaks.seek(target)
+        self._ring.discard()
+        self._origin = (self._ring.written, frame)
+        self._eof = False
+        # Cleared last: until here the consumer must not read stale frames
+        if self._seek_to == frame:
+            self._seek_to = None
+
+    # Reopen the stream at the index checkpoint before target and drop the frames up to it
+    def _seek_indexed(self, target: int):
+        handle, view, skip = self._seek_index.open_at(self.path, target)
+        self._close_file()
+        self._file, self._view = handle, view
+        skip_frames(handle, skip, self._block)
+        self._left = self._file_frames - target
+
+    # Consumer side (audio callback): copy up to len(out) frames, return count
+    def read(self, out: np.ndarray) -> int:
+        if self._seek_to is not None:
+            return 0
+        return self._ring.read(out)
+
+    @property
+    def position(self) -> int:
+        if self._seek_to is not None:
+            return self._seek_to
+        counter, frame = self._origin
+        return frame + max(0, self._ring.read_count - counter)
+
+    @property
+    def finished(self) -> bool:
+        return self._eof and self._seek_to is None and self._ring.available == 0
+
+    def seek(self, frame: int) -> bool:
+        if 0 <= frame < self.frames:
+            self._seek_to = frame
+            self._wake.set()
+            return True
+        return False
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is None:
+            self._close_file()
+            if self._peaks is not None:
+                self._peaks.abandon()
+            if self._scanner is not None:
+                self._scanner.abandon()
@@ -0,0 +1,209 @@
+# convolver.py
+
+# FIR equalization by uniformly partitioned FFT convolution
+# The graphic-EQ curve (and an optional room-correction FIR loaded from an audio
+# file) is turned into one combined impulse response. That response is cut into
+# partitions of PARTITION_FRAMES; every input partition costs one FFT, one
+# multiply-accumulate against the stored spectra of the previous inputs and one
+# inverse FFT, whatever the number of bands. Latency is fixed at one partition.
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import fftconvolve
+from core.resampler import resample_whole
+
+PARTITION_FRAMES = 512 # convolution block = added latency (11.6 ms at 44.1 kHz)
+EQ_FIR_SECONDS = 0.1 # length of the designed graphic-EQ response
+MAX_FIR_SECONDS = 1.0 # loaded FIR filters are cut to this length
+MAX_FIR_CHANNELS = 2
+
+
+# Gain curve through the band points, interpolated in log-frequency
+def interpolate_gains(bands, gains, freqs) -> np.ndarray:
+    freqs = np.maximum(np.asarray(freqs, dtype=float), 1.0)
+    return np.interp(np.log10(freqs), np.log10(np.asarray(bands, dtype=float)), np.asarray(gains, dtype=float))
+
+
+# Minimum-phase FIR following the graphic-EQ curve (no pre-ringing, minimal delay)
+def graphic_response(bands, gains, samplerate: int) -> np.ndarray:
+    if not any(gains):
+        return np.ones(1)
+    taps = int(samplerate * EQ_FIR_SECONDS)
+    nfft = 1 << (4 * taps - 1).bit_length() # dense grid keeps cepstral aliasing low
+    freqs = np.fft.rfftfreq(nfft, 1.0 / samplerate)
+    log_mag = interpolate_gains(bands, gains, freqs) * (np.log(10) / 20)
+
+    # Homomorphic method: fold the real cepstrum onto positive quefrencies
+    cepstrum = np.fft.irfft(log_mag, nfft)
+    fold = np.zeros(nfft)
+    fold[0] = 1.0
+    fold[1:nfft // 2] = 2.0
+    fold[nfft // 2] = 1.0
+    ir = np.fft.irfft(np.exp(np.fft.rfft(cepstrum * fold)), nfft)[:taps]
+
+    # Fade the tail out so the truncation does not ripple the response
+    fade = taps // 8
+    ir[-fade:] *= np.hanning(2 * fade)[fade:]
+    return ir
+
+
+# Room-correction FIR from an audio file: (frames, channels) float64 and its rate
+def read_fir(path: str):
+    data, samplerate = sf.read(path, dtype='float64', always_2d=True)
+    data = data[:int(samplerate * MAX_FIR_SECONDS), :MAX_FIR_CHANNELS]
+    if not len(data):
+        raise ValueError("empty filter")
+    return data, samplerate
+
+
+# Combined impulse response, shape (channels, taps)
+def combined_response(bands, gains, fir, samplerate: int, channels: int) -> np.ndarray:
+    ir = graphic_response(bands, gains, samplerate) if bands else np.ones(1)
+    if fir is None:
+        return np.repeat(ir[None, :], channels, axis=0)
+
+    data, fir_rate = fir
+    data = resample_whole(data, fir_rate, samplerate).astype(np.float64)
+    per_channel = [data[:, min(c, data.shape[1] - 1)] for c in range(channels)]
+    return np.stack([fftconvolve(ir, h) if len(ir) > 1 else h for h in per_channel])
+
+
+# Filter spectra per partition, shape (partitions, channels, partition + 1)
+def partition_spectra(ir: np.ndarray, partition: int) -> np.ndarray:
+    channels, taps = ir.shape
+    count = -(-taps // partition)
+    padded = np.zeros((channels, count * partition))
+    padded[:, :taps] = ir
+    spectra = np.fft.rfft(padded.reshape(channels, count, partition), n=2 * partition, axis=-1)
+    return np.ascontiguousarray(spectra.transpose(1, 0, 2))
+
+
+class PartitionedConvolver:
+    """
+    Uniformly partitioned overlap-save convolution with a frequency-domain delay
+    line. set_filter may be called from another thread: the new spectra are
+    picked up at the next partition and crossfaded in over it.
+    """
+    def __init__(self, partition: int, channels: int):
+        self.partition = partition
+        self.channels = channels
+        self._window = np.zeros((channels, 2 * partition)) # previous + current input partition
+        # Input spectra, newest first; stored twice so a contiguous slice is always in order
+        self._fdl = np.zeros((2, channels, partition + 1), dtype=complex)
+        self._slot = 0
+        self._product = np.zeros((0, channels, partition + 1), dtype=complex)
+        self._acc = np.zeros((channels, partition + 1), dtype=complex)
+        self._active = None
+        self._target = None
+        self._fade_in = np.linspace(0.0, 1.0, partition, endpoint=False)
+
+    def set_filter(self, spectra: np.ndarray):
+        self._target = spectra
+
+    # Keep the newest history when a longer filter arrives
+    def _grow(self, count: int):
+        size = len(self._fdl) // 2
+        history = self._fdl[self._slot:self._slot + size]
+        fdl = np.zeros((2 * count, self.channels, self.partition + 1), dtype=complex)
+        fdl[:size] = history
+        fdl[count:count + size] = history
+        self._fdl = fdl
+        self._slot = 0
+
+    def _output(self, spectra: np.ndarray, history: np.ndarray) -> np.ndarray:
+        count = len(spectra)
+        if len(self._product) < count:
+            self._product = np.zeros_like(spectra)
+        product = self._product[:count]
+        np.multiply(history[:count], spectra, out=product)
+        np.add.reduce(product, axis=0, out=self._acc)
+        return np.fft.irfft(self._acc, 2 * self.partition, axis=-1)[:, self.partition:]
+
+    # One partition: block (partition, channels) -> out (partition, channels)
+    def process(self, block: np.ndarray, out: np.ndarray):
+        target = self._target
+        if target is not None and len(target) > len(self._fdl) // 2:
+            self._grow(len(target))
+
+        p = self.partition
+        self._window[:, :p] = self._window[:, p:]
+        self._window[:, p:] = block.T
+        size = len(self._fdl) // 2
+        self._slot = (self._slot - 1) % size
+        spectrum = np.fft.rfft(self._window, axis=-1)
+        self._fdl[self._slot] = spectrum
+        self._fdl[self._slot + size] = spectrum
+        history = self._fdl[self._slot:self._slot + size]
+
+        active = self._active
+        if target is not active:
+            y = self._output(target, history)
+            if active is not None:
+                old = self._output(active, history)
+                y = old + (y - old) * self._fade_in
+            self._active = target
+        else:
+            y = self._output(active, history)
+        out[:] = y.T
+
+
+class ConvolutionEqualizer:
+    """
+    Runs the combined response on buffers of any size at a fixed latency of
+    one partition. Built for one rate and channel count: the response is
+    designed on the caller's thread, the audio callback only swaps in the new
+    spectra. Audio in another format passes through unfiltered.
+    """
+    def __init__(self, samplerate: int, channels: int, partition: int = PARTITION_FRAMES):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.partition = partition
+        self._bands = ()
+        self._gains = ()
+        self._fir = None
+        self._conv = PartitionedConvolver(partition, channels)
+        self._conv.set_filter(partition_spectra(np.ones((channels, 1)), partition))
+        self._in = np.zeros((partition, channels), dtype=np.float32)
+        self._in_fill = 0
+        self._out = np.zeros((3 * partition, channels), dtype=np.float32)
+        self._out_fill = partition # the fixed latency
+
+    @property
+    def latency(self) -> int:
+        return self.partition
+
+    def set_response(self, bands, gains, fir=None):
+        self._bands = tuple(bands)
+        self._gains = tuple(gains)
+        self._fir = fir
+        self._conv.set_filter(self._design())
+
+    def _design(self) -> np.ndarray:
+        ir = combined_response(self._bands, self._gains, self._fir, self.samplerate, self.channels)
+        return partition_spectra(ir, self.partition)
+
+    def process_into(self, buf: np.ndarray, samplerate: int):
+        frames, channels = buf.shape
+        if samplerate != self.samplerate or channels != self.channels:
+            return
+        conv = self._conv
+        p = self.partition
+        if len(self._out) < frames + 2 * p:
+            out = np.zeros((frames + 2 * p, channels), dtype=np.float32)
+            out[:self._out_fill] = self._out[:self._out_fill]
+            self._out = out
+
+        pos = 0
+        while pos < frames:
+            take = min(p - self._in_fill, frames - pos)
+            self._in[self._in_fill:self._in_fill + take] = buf[pos:pos + take]
+            self._in_fill += take
+            pos += take
+            if self._in_fill == p:
+                conv.process(self._in, self._out[self._out_fill:self._out_fill + p])
+                self._out_fill += p
+                self._in_fill = 0
+
+        buf[:] = self._out[:frames]
+        self._out_fill -= frames
+        self._out[:self._out_fill] = self._out[frames:frames + self._out_fill]
@@ -0,0 +1,56 @@
+# cover_cache.py
+
+# Content-addressed cover art cache
+# Embedded APIC images are identified by the hash of their bytes, so albums
+# sharing artwork are stored once. Images are written only when the UI asks.
+
+import os, hashlib
+from typing import Optional
+from mutagen.id3 import ID3, APIC
+from core.database import COVER_CACHE_DIR
+
+
+# First embedded picture of a tag set (same choice the player always made)
+def find_apic(tags) -> Optional[APIC]:
+    for frame in tags.values():
+        if isinstance(frame, APIC):
+            return frame
+    return None
+
+
+# Cache key: sha1 of the image bytes + extension from the mime type
+def cover_key(frame: APIC) -> str:
+    mime = getattr(frame, 'mime', 'image/jpeg') or 'image/jpeg'
+    ext = '.jpg' if 'jpeg' in mime.lower() or 'jpg' in mime.lower() else '.png'
+    return hashlib.sha1(frame.data).hexdigest() + ext
+
+
+# Where the image for a key lives (it may not be extracted yet)
+def cover_file(key: str) -> str:
+    return f"{COVER_CACHE_DIR}{os.sep}{key}"
+
+
+# Make sure the cover of a track is on disk and return its path
+def extract_cover(track_path: str) -> Optional[str]:
+    try:
+        frame = find_apic(ID3(track_path))
+    except Exception:
+        return None
+    if frame is None:
+        return None
+
+    path = cover_file(cover_key(frame))
+    if os.path.exists(path):
+        return path
+
+    try:
+        os.makedirs(COVER_CACHE_DIR, exist_ok=True)
+        # Write to a temp name first so a half-written image is never served
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(frame.data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Could not cache cover: {e}")
+        return None
+    return path
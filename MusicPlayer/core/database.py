@@ -15,6 +15,11 @@ def get_project_root():
 PROJECT_ROOT = os.path.dirname(get_project_root()) if get_project_root().endswith('core') else get_project_root()
 DATABASE_DIR = os.path.join(PROJECT_ROOT, "database")
 SETTINGS_FILE = os.path.join(DATABASE_DIR, "settings.json")
+LIBRARY_INDEX_FILE = os.path.join(DATABASE_DIR, "library.db")
+COVER_CACHE_DIR = os.path.join(DATABASE_DIR, "covers")
+WAVEFORM_CACHE_DIR = os.path.join(DATABASE_DIR, "waveforms")
+SEEK_INDEX_DIR = os.path.join(DATABASE_DIR, "seek_index")
+PCM_CACHE_DIR = os.path.join(DATABASE_DIR, "pcm_cache")
 
 os.makedirs(DATABASE_DIR, exist_ok=True)
 
@@ -111,6 +116,8 @@ def set_cover_settings(cover_settings: dict):
 def get_equalizer_settings() -> dict:
     settings = load_settings()
     return settings.get("equalizer", {
+        "mode": "parametric",
+        "fir": "",
         "60": 0,
         "150": 0,
         "400": 0,
@@ -157,3 +164,55 @@ def set_tray_mode(state: bool):
     settings = load_settings()
     settings["tray_mode"] = state
     save_settings(settings)
+
+# Library scan settings (workers: 0 = auto, mode: "thread" or "process")
+def get_scan_settings() -> dict:
+    settings = load_settings()
+    return settings.get("library_scan", {
+        "workers": 0,
+        "mode": "thread"
+    })
+
+def set_scan_settings(scan_settings: dict):
+    settings = load_settings()
+    settings["library_scan"] = scan_settings
+    save_settings(settings)
+
+# Playback settings (mode: "stream" decodes on the fly, "memory" decodes the whole track;
+# gapless: prepare the next track and switch to it without a pause;
+# output_rate: device rate in Hz, 0 = default rate of the output device;
+# latency_profile: "low-latency", "balanced" or "power-saver" (blocksize and device latency);
+# normalization: "off", "track" or "album" loudness gain, normalization_preamp: extra gain in dB;
+# decoded_cache_mb: memory for recently decoded tracks, 0 = off, always off in lite mode;
+# pcm_cache_mb: disk for decoded copies of the most played tracks, 0 = off,
+# pcm_cache_format: "int16" or "float32" samples in those copies;
+# progress_hz: position updates pushed to the UI per second while playing)
+def get_playback_settings() -> dict:
+    settings = load_settings()
+    return settings.get("playback", {
+        "mode": "stream",
+        "gapless": True,
+        "output_rate": 0,
+        "latency_profile": "balanced",
+        "normalization": "track",
+        "normalization_preamp": 0.0,
+        "decoded_cache_mb": 256,
+        "pcm_cache_mb": 1024,
+        "pcm_cache_format": "int16",
+        "progress_hz": 4
+    })
+
+def set_playback_settings(playback_settings: dict):
+    settings = load_settings()
+    settings["playback"] = playback_settings
+    save_settings(settings)
+
+# Playlist sort order ("album", "title", "artist", "added", "duration")
+def get_sort_order() -> str:
+    settings = load_settings()
+    return settings.get("sort_order", "album")
+
+def set_sort_order(order: str):
+    settings = load_settings()
+    settings["sort_order"] = order
+    save_settings(settings)
@@ -0,0 +1,96 @@
+# decoded_cache.py
+
+# Recently decoded tracks kept in memory (LRU, bounded by a byte budget)
+# An entry is a whole track as the output callback plays it: stereo float32 at
+# the output rate, before the normalization gain (applied by the source), so a
+# changed gain does not invalidate it. Entries are keyed by path, mtime and
+# rate, and are read-only: several sources may play the same array. Evicting
+# an entry only drops the cache's reference; a source still playing it keeps
+# the data until it is closed.
+
+import os
+import numpy as np
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+DEFAULT_DECODED_CACHE_MB = 256
+BYTES_PER_MB = 1 << 20
+
+
+class DecodedCache:
+    def __init__(self, budget_bytes: int = DEFAULT_DECODED_CACHE_MB * BYTES_PER_MB):
+        self.budget = max(0, int(budget_bytes))
+        self._entries = OrderedDict() # (path, mtime, rate) -> array, least recently used first
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(path: str, samplerate: int):
+        try:
+            return path, os.stat(path).st_mtime_ns, samplerate
+        except OSError:
+            return None
+
+    def get(self, path: str, samplerate: int) -> Optional[np.ndarray]:
+        key = self._key(path, samplerate)
+        with self._lock:
+            data = self._entries.get(key) if key is not None else None
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    # Whether a track of nbytes would be kept (decoders skip capturing it otherwise)
+    def admits(self, nbytes: int) -> bool:
+        return 0 < nbytes <= self.budget
+
+    def put(self, path: str, samplerate: int, data: np.ndarray) -> bool:
+        key = self._key(path, samplerate)
+        if key is None or not self.admits(data.nbytes):
+            return False
+        data.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = data
+            self._bytes += data.nbytes
+            self._evict()
+        return True
+
+    # Shrinking the budget evicts right away; 0 empties and disables the cache
+    def set_budget(self, budget_bytes: int):
+        with self._lock:
+            self.budget = max(0, int(budget_bytes))
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        while self._bytes > self.budget and self._entries:
+            _, data = self._entries.popitem(last=False)
+            self._bytes -= data.nbytes
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'mb': round(self._bytes / BYTES_PER_MB, 1),
+                'budget_mb': round(self.budget / BYTES_PER_MB, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
@@ -1,16 +1,107 @@
 # equalizer.py
 
+# Peaking-filter equalizer
+# The active bands run as one second-order-sections cascade (a single sosfilt
+# call per block) whose state survives gain changes; gains glide to their new
+# value over a few blocks instead of jumping, so slider moves do not click.
+# The cascade runs in place on a preallocated (channels, frames) work buffer
+# through scipy's compiled sosfilt kernel, and a glide rewrites preallocated
+# coefficient and state buffers, so a block costs no allocations.
+# The 10- and 31-band graphic modes (and loaded room-correction FIR filters)
+# run through the partitioned FFT convolver instead, whose cost does not grow
+# with the number of bands.
+
 import math
 import numpy as np
 import scipy.signal as signal
+from functools import lru_cache
+from core.convolver import ConvolutionEqualizer, interpolate_gains, read_fir
+
+try:
+    # In-place kernel behind scipy.signal.sosfilt (skips its per-call validation);
+    # private, so it is only used while it filters like sosfilt (see kernel_matches)
+    from scipy.signal._sosfilt import _sosfilt
+except ImportError:
+    _sosfilt = None
+
+Q = 1.0
+GAIN_STEP_DB = 0.1 # gains are quantized for the coefficient cache
+SMOOTHING_DB_PER_SEC = 60.0 # how fast a band glides to its new gain
+
+PARAMETRIC = "parametric"
+MODES = {
+    PARAMETRIC: [60, 150, 400, 1000, 2400, 15000],
+    "graphic10": [31, 62, 125, 250, 500, 1000, 2000, 4000, 8000, 16000],
+    "graphic31": [20, 25, 31, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315, 400, 500, 630,
+                  800, 1000, 1250, 1600, 2000, 2500, 3150, 4000, 5000, 6300, 8000, 10000,
+                  12500, 16000, 20000],
+}
+
+
+# Biquad peaking filter as one SOS row [b0, b1, b2, 1, a1, a2], cached per (band, gain, samplerate)
+@lru_cache(maxsize=1024)
+def peaking_sos(freq: int, gain_db: float, samplerate: int) -> tuple:
+    a_gain = math.pow(10, gain_db / 40)
+    w0 = 2 * math.pi * freq / samplerate
+    alpha = math.sin(w0) / (2 * Q)
+
+    # Coefficients for peaking EQ filter
+    b0 = 1 + alpha * a_gain
+    b1 = -2 * math.cos(w0)
+    b2 = 1 - alpha * a_gain
+    a0 = 1 + alpha / a_gain
+    a1 = -2 * math.cos(w0)
+    a2 = 1 - alpha / a_gain
+
+    return (b0/a0, b1/a0, b2/a0, 1.0, a1/a0, a2/a0)
+
+
+def quantize_gain(gain_db: float) -> float:
+    return round(gain_db / GAIN_STEP_DB) * GAIN_STEP_DB
+
+
+# Whether kernel(sos, x, zi) filters x in place like signal.sosfilt with the same state
+def kernel_matches(kernel) -> bool:
+    sos = np.array([peaking_sos(1000, 6.0, 44100), peaking_sos(60, -3.0, 44100)])
+    x = np.random.default_rng(0).standard_normal((2, 256))
+    zi = np.random.default_rng(1).standard_normal((2, len(sos), 2))
+    expected, zf = signal.sosfilt(sos, x, axis=-1, zi=zi.transpose(1, 0, 2))
+    try:
+        kernel(sos, x, zi)
+    except Exception:
+        return False
+    return np.allclose(x, expected) and np.allclose(zi, zf.transpose(1, 0, 2))
+
+
+if _sosfilt is not None and not kernel_matches(_sosfilt):
+    _sosfilt = None
 
 class Equalizer:
-    BANDS = [60, 150, 400, 1000, 2400, 15000]
+    BANDS = MODES[PARAMETRIC]
 
     def __init__(self):
-        self.gains = {freq: 0.0 for freq in self.BANDS}
-        self.filters_state = {}
-        self._cache = {}
+        self.mode = PARAMETRIC
+        # Target gains (what the user set) per mode; keys never change, so the
+        # audio callback can read them while the mode is switched
+        self._mode_gains = {mode: {freq: 0.0 for freq in bands} for mode, bands in MODES.items()}
+        self._current = {freq: 0.0 for freq in self.BANDS} # gains applied right now (gliding)
+        self._gliding = False
+        self._sos = None # cascade of the bands with a gain (rows as in peaking_sos)
+        self._sos_bands = ()
+        self._sos_key = None
+        self._sos_rate = None
+        self._zi = None # (channels, sections, 2) filter state, kept across gain changes
+        # Preallocated coefficient rows and state (plus a spare for reordering it):
+        # _sos and _zi are views, rewritten in place while gains glide
+        self._sos_buf = np.zeros((len(self.BANDS), 6))
+        self._zi_buf = np.zeros(0)
+        self._zi_spare = np.zeros(0)
+        self._work = np.zeros(0) # float64 work buffer, viewed as (channels, frames)
+
+        self.fir_path = ""
+        self._fir = None # (data, samplerate) of the loaded room-correction filter
+        self._convolver = None # set in graphic modes or while a FIR is loaded
+        self._format = (0, 2) # (samplerate, channels) of the audio to come, see set_format
 
         self._volume = 1.0
         self._is_muted = False
@@ -32,61 +123,224 @@ class Equalizer:
             self._is_muted = False
         return self._is_muted
 
-    def set_band(self, freq: int, gain_db: float):
+    # Volume in percent as the user set it (mute not included)
+    @property
+    def volume(self) -> int:
+        return round((self._prev_volume if self._is_muted else self._volume) * 100)
+
+    @property
+    def gains(self) -> dict:
+        return self._mode_gains[self.mode]
+
+    @property
+    def bands(self) -> list:
+        return MODES[self.mode]
+
+    # Frames the equalizer delays the audio by (one partition in convolution modes)
+    @property
+    def latency(self) -> int:
+        convolver = self._convolver
+        return convolver.latency if convolver is not None else 0
+
+    def _set_gain(self, freq: int, gain_db: float) -> bool:
         freq = int(freq)
-        if freq in self.gains:
-            self.gains[freq] = float(gain_db)
-            self._cache.pop(freq, None)
+        if freq not in self.gains:
+            return False
+        self.gains[freq] = float(gain_db)
+        return True
+
+    def set_band(self, freq: int, gain_db: float):
+        if self._set_gain(freq, gain_db):
+            self._apply_gains()
 
+    # Accepts the get_state() format: band gains keyed by frequency,
+    # plus optional "mode" and "fir" (path of a room-correction filter, "" for none)
     def set_all(self, bands: dict):
+        bands = dict(bands)
+        mode = bands.pop("mode", None)
+        if mode is not None:
+            self.set_mode(mode)
+        fir_path = bands.pop("fir", None)
+        if fir_path is not None and fir_path != self.fir_path:
+            if fir_path:
+                self.load_fir(fir_path)
+            else:
+                self.clear_fir()
         for freq_str, gain in bands.items():
-            self.set_band(int(freq_str), float(gain))
+            self._set_gain(int(float(freq_str)), float(gain))
+        self._apply_gains()
 
     def get_state(self) -> dict:
-        return dict(self.gains)
-
-    # Biquad filter coefficients calculation
-    def _get_coefficients(self, freq, sr, gain_db):
-        q = 1.0
-        a_gain = math.pow(10, gain_db / 40)
-        w0 = 2 * math.pi * freq / sr
-        alpha = math.sin(w0) / (2 * q)
-        
-        # Coefficients for peaking EQ filter
-        b0 = 1 + alpha * a_gain
-        b1 = -2 * math.cos(w0)
-        b2 = 1 - alpha * a_gain
-        a0 = 1 + alpha / a_gain
-        a1 = -2 * math.cos(w0)
-        a2 = 1 - alpha / a_gain
-
-        return np.array([b0/a0, b1/a0, b2/a0]), np.array([1.0, a1/a0, a2/a0])
-
-    # Apply equalizer to audio data
+        state = {"mode": self.mode, "fir": self.fir_path}
+        state.update((str(freq), gain) for freq, gain in self.gains.items())
+        return state
+
+    # Switch band set; the current curve is carried over to the new bands
+    def set_mode(self, mode: str):
+        if mode not in MODES or mode == self.mode:
+            return
+        curve = interpolate_gains(self.bands, list(self.gains.values()), MODES[mode])
+        gains = self._mode_gains[mode]
+        for freq, gain in zip(MODES[mode], curve):
+            gains[freq] = round(float(gain), 1)
+
+        if mode == PARAMETRIC:
+            # The cascade starts from rest and glides in
+            self._current = {freq: 0.0 for freq in self.BANDS}
+            self._sos = None
+            self._sos_bands = ()
+            self._sos_key = None
+            self._zi = None
+            self._gliding = True
+        self.mode = mode
+        self._update_convolver()
+
+    def load_fir(self, path: str) -> bool:
+        try:
+            self._fir = read_fir(path)
+        except Exception as e:
+            print(f"⚠️ Cannot load FIR filter ({path}): {e}")
+            return False
+        self.fir_path = path
+        self._update_convolver()
+        return True
+
+    def clear_fir(self):
+        self._fir = None
+        self.fir_path = ""
+        self._update_convolver()
+
+    # Apply the target gains right away instead of gliding to them (offline rendering)
+    def settle(self):
+        self._current = dict(self._mode_gains[PARAMETRIC])
+        self._gliding = True
+
+    def _apply_gains(self):
+        if self.mode == PARAMETRIC:
+            self._gliding = True
+        else:
+            self._update_convolver()
+
+    # Rate and channel count the audio will come in (the output stream, a rendered
+    # file). The convolution response is designed here, never in the audio callback.
+    def set_format(self, samplerate: int, channels: int = 2):
+        if (samplerate, channels) == self._format:
+            return
+        self._format = (samplerate, channels)
+        self._size_state(channels)
+        self._update_convolver()
+
+    def _size_state(self, channels: int):
+        size = channels * len(self.BANDS) * 2
+        if len(self._zi_buf) != size:
+            self._zi_buf = np.zeros(size)
+            self._zi_spare = np.zeros(size)
+
+    # Redesign the convolution response (graphic curve and/or loaded FIR) for the
+    # current format; the callback picks up a new convolver with its next buffer
+    def _update_convolver(self):
+        graphic = self.mode != PARAMETRIC
+        samplerate, channels = self._format
+        if not graphic and self._fir is None or not samplerate:
+            self._convolver = None
+            return
+        convolver = self._convolver
+        if convolver is None or (convolver.samplerate, convolver.channels) != self._format:
+            convolver = ConvolutionEqualizer(samplerate, channels)
+        if graphic:
+            convolver.set_response(self.bands, list(self.gains.values()), self._fir)
+        else:
+            convolver.set_response((), (), self._fir)
+        self._convolver = convolver
+
+    # Move the applied gains one block closer to the targets
+    def _glide(self, frames: int, samplerate: int):
+        step = SMOOTHING_DB_PER_SEC * frames / samplerate
+        targets = self._mode_gains[PARAMETRIC]
+        done = True
+        for freq in self.BANDS:
+            current, target = self._current[freq], targets[freq]
+            if current == target:
+                continue
+            if abs(target - current) <= step:
+                self._current[freq] = target
+            else:
+                self._current[freq] = current + math.copysign(step, target - current)
+                done = False
+        self._gliding = not done
+
+    # SOS cascade of the bands that currently have a gain (rebuilt only when it changes)
+    def _rebuild(self, samplerate: int):
+        gains = tuple(quantize_gain(self._current[f]) for f in self.BANDS)
+        key = (gains, samplerate)
+        if key == self._sos_key:
+            return
+
+        active = [(f, g) for f, g in zip(self.BANDS, gains) if g != 0]
+        bands = tuple(f for f, _ in active)
+        if bands != self._sos_bands and self._zi is not None:
+            # Bands that stay keep their state, new ones start from rest
+            channels = self._zi.shape[0]
+            old = self._zi_spare[:self._zi.size].reshape(self._zi.shape)
+            np.copyto(old, self._zi)
+            self._zi = self._zi_buf[:channels * len(bands) * 2].reshape(channels, len(bands), 2)
+            for i, freq in enumerate(bands):
+                if freq in self._sos_bands:
+                    self._zi[:, i] = old[:, self._sos_bands.index(freq)]
+                else:
+                    self._zi[:, i] = 0.0
+
+        for i, (freq, gain) in enumerate(active):
+            self._sos_buf[i] = peaking_sos(freq, gain, samplerate)
+        self._sos = self._sos_buf[:len(bands)] if bands else None
+        self._sos_bands = bands
+        self._sos_key = key
+        self._sos_rate = samplerate
+
+    # Apply equalizer to audio data (returns a new float32 array)
     def process(self, data: np.ndarray, samplerate: int) -> np.ndarray:
-        output = data.copy()
-        
-        if not all(g == 0 for g in self.gains.values()):
-            for freq in self.BANDS:
-                gain = self.gains[freq]
-                if gain == 0: continue
-                
-                if (freq, samplerate) not in self._cache:
-                    self._cache[freq] = self._get_coefficients(freq, samplerate, gain)
-
-                b, a = self._cache[freq]
-                
-                if freq not in self.filters_state or self.filters_state[freq].shape[1] != data.shape[1]:
-                    n_order = max(len(a), len(b)) - 1
-                    self.filters_state[freq] = np.zeros((n_order, data.shape[1]))
-
-                output, self.filters_state[freq] = signal.lfilter(
-                    b, a, output, axis=0, zi=self.filters_state[freq]
-                )
-
-        # 2. Apply Software Volume Control
-        # Multiplying the array by volume coefficient
-        if self._volume != 1.0:
-            output = output * self._volume
-            
-        return output.astype('float32')
\ No newline at end of file
+        output = np.array(data, dtype=np.float32)
+        self.process_into(output, samplerate)
+        return output
+
+    # Real-time path: equalize and scale a float32 buffer in place (e.g. the
+    # callback's outdata). All active bands run in one sosfilt call; gain (the
+    # source's normalization) is folded into the volume multiply.
+    def process_into(self, buf: np.ndarray, samplerate: int, gain: float = 1.0):
+        if self.mode == PARAMETRIC:
+            self._process_cascade(buf, samplerate)
+        convolver = self._convolver
+        if convolver is not None:
+            convolver.process_into(buf, samplerate)
+
+        # 2. Apply Software Volume Control and the gain (in place, one pass)
+        scale = self._volume * gain
+        if scale != 1.0:
+            np.multiply(buf, scale, out=buf, casting='same_kind')
+
+    def _process_cascade(self, buf: np.ndarray, samplerate: int):
+        if self._gliding or samplerate != self._sos_rate:
+            if self._gliding:
+                self._glide(len(buf), samplerate)
+            self._rebuild(samplerate)
+
+        if self._sos_bands:
+            frames, channels = buf.shape
+            if self._zi is None or self._zi.shape[0] != channels:
+                # First block (or a new channel count): the cascade starts from rest
+                self._size_state(channels)
+                self._zi = self._zi_buf[:channels * len(self._sos_bands) * 2].reshape(channels, len(self._sos_bands), 2)
+                self._zi.fill(0.0)
+            if len(self._work) < channels * frames:
+                self._work = np.zeros(channels * frames)
+
+            # Contiguous (channels, frames) view for any block size
+            work = self._work[:channels * frames].reshape(channels, frames)
+            np.copyto(work, buf.T)
+            if _sosfilt is not None:
+                _sosfilt(self._sos, work, self._zi)
+            else:
+                out, zf = signal.sosfilt(self._sos, work, axis=-1, zi=self._zi.transpose(1, 0, 2))
+                work[:] = out
+                self._zi[:] = zf.transpose(1, 0, 2)
+            np.copyto(buf, work.T, casting='same_kind')
@@ -0,0 +1,115 @@
+# facet_index.py
+
+# Artist and album facets of the library
+# Every facet value keeps its tracks, count and total duration up to date as
+# tracks are added, retagged or removed, so browsing never filters the whole library.
+# Values are grouped by their folded form ("AC/DC" and "ac/dc" are one artist).
+
+from typing import Dict, List, Optional
+from core.utils import fold
+
+FACETS = ('artist', 'album')
+
+# Shown for tracks whose tag is empty
+UNKNOWN_NAMES = {'artist': 'Unknown Artist', 'album': 'Unknown Album'}
+
+
+def facet_key(value: Optional[str]) -> str:
+    return fold(value.strip()) if value and value.strip() else ''
+
+
+class Facet:
+    __slots__ = ('name', 'tracks', 'duration')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.tracks: Dict[str, object] = {} # path -> TrackInfo, insertion ordered
+        self.duration = 0.0
+
+    def as_dict(self) -> Dict:
+        return {'name': self.name, 'count': len(self.tracks), 'duration': self.duration}
+
+
+class FacetIndex:
+    def __init__(self):
+        self._facets: Dict[str, Dict[str, Facet]] = {field: {} for field in FACETS}
+        # path -> (facet keys, duration) as indexed; a retagged track is removed with its old values
+        self._doc_keys: Dict[str, tuple] = {}
+
+    def clear(self):
+        for values in self._facets.values():
+            values.clear()
+        self._doc_keys.clear()
+
+    def add(self, track):
+        if track.path in self._doc_keys:
+            self.remove(track.path)
+
+        keys = []
+        for field in FACETS:
+            value = getattr(track, field)
+            key = facet_key(value)
+            facet = self._facets[field].get(key)
+            if facet is None:
+                name = value.strip() if key else UNKNOWN_NAMES[field]
+                facet = self._facets[field][key] = Facet(name)
+            facet.tracks[track.path] = track
+            facet.duration += track.duration or 0.0
+            keys.append(key)
+        self._doc_keys[track.path] = (tuple(keys), track.duration or 0.0)
+
+    def remove(self, path: str):
+        entry = self._doc_keys.pop(path, None)
+        if entry is None:
+            return
+        keys, duration = entry
+        for field, key in zip(FACETS, keys):
+            values = self._facets[field]
+            facet = values.get(key)
+            if facet is None:
+                continue
+            if facet.tracks.pop(path, None) is not None:
+                facet.duration -= duration
+            if not facet.tracks:
+                del values[key]
+
+    def get(self, field: str, value: str) -> Optional[Facet]:
+        return self._facets[field].get(facet_key(value))
+
+    # Facet values with counts and durations, sorted by name
+    def values(self, field: str) -> List[Dict]:
+        values = self._facets[field]
+        return [values[key].as_dict() for key in sorted(values)]
+
+    # Tracks matching every given facet ({"artist": ..., "album": ...});
+    # walks the smallest facet and checks membership in the others
+    def intersect(self, selection: Dict[str, str]) -> List:
+        facets = []
+        for field, value in selection.items():
+            if field not in self._facets:
+                continue
+            facet = self.get(field, value)
+            if facet is None:
+                return []
+            facets.append(facet)
+        if not facets:
+            return []
+
+        facets.sort(key=lambda f: len(f.tracks))
+        smallest, rest = facets[0], facets[1:]
+        return [t for p, t in smallest.tracks.items() if all(p in f.tracks for f in rest)]
+
+    # Values of one facet inside another, e.g. the albums of an artist
+    def values_within(self, field: str, within: str, value: str) -> List[Dict]:
+        outer = self.get(within, value)
+        if outer is None:
+            return []
+        grouped: Dict[str, Facet] = {}
+        for track in outer.tracks.values():
+            key = facet_key(getattr(track, field))
+            facet = grouped.get(key)
+            if facet is None:
+                facet = grouped[key] = Facet(self._facets[field][key].name)
+            facet.tracks[track.path] = track
+            facet.duration += track.duration or 0.0
+        return [grouped[key].as_dict() for key in sorted(grouped)]
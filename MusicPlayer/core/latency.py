@@ -0,0 +1,87 @@
+# latency.py
+
+# Output latency profiles and real-time statistics of the audio callback
+# A profile fixes the callback blocksize and the latency asked from PortAudio.
+# EngineStats is written by the audio callback only (plain counters, no locks)
+# and read as a snapshot by get_playback_info; when output underflows repeat,
+# it asks the engine to step up to the next, larger profile.
+
+from time import monotonic
+
+# Ordered from the smallest to the largest buffer
+LATENCY_PROFILES = {
+    "low-latency": {"blocksize": 256, "latency": "low"},
+    "balanced": {"blocksize": 1024, "latency": "high"},
+    "power-saver": {"blocksize": 4096, "latency": 0.25},
+}
+DEFAULT_LATENCY_PROFILE = "balanced"
+
+UNDERRUN_WINDOW = 10.0 # seconds in which underflows are counted for a step-up
+UNDERRUN_STEP_UP = 3 # underflows within the window that trigger it
+SMOOTHING = 0.05 # weight of the newest callback in the running average
+
+
+def next_profile(name: str):
+    names = list(LATENCY_PROFILES)
+    index = names.index(name) if name in names else names.index(DEFAULT_LATENCY_PROFILE)
+    return names[index + 1] if index + 1 < len(names) else None
+
+
+class EngineStats:
+    __slots__ = ("underflows", "overflows", "decoder_underruns", "callbacks",
+                 "callback_avg", "callback_max", "load_avg",
+                 "_window_start", "_window_count", "step_up_requested")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.underflows = 0 # output underflows reported by PortAudio
+        self.overflows = 0
+        self.decoder_underruns = 0 # buffers the decoder could not fill in time
+        self.callbacks = 0
+        self.callback_avg = 0.0 # seconds
+        self.callback_max = 0.0
+        self.load_avg = 0.0 # callback time / buffer duration
+        self.reset_window()
+
+    def reset_window(self):
+        self._window_start = 0.0
+        self._window_count = 0
+        self.step_up_requested = False
+
+    # Callback side: status flags of the current buffer
+    def record_status(self, status):
+        if status.output_overflow:
+            self.overflows += 1
+        if status.output_underflow:
+            self.underflows += 1
+            now = monotonic()
+            if now - self._window_start > UNDERRUN_WINDOW:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count >= UNDERRUN_STEP_UP:
+                self.step_up_requested = True
+
+    # Callback side: how long this buffer took to render
+    def record_callback(self, seconds: float, frames: int, samplerate: int):
+        self.callbacks += 1
+        if seconds > self.callback_max:
+            self.callback_max = seconds
+        load = seconds * samplerate / frames if frames and samplerate else 0.0
+        if self.callbacks == 1:
+            self.callback_avg, self.load_avg = seconds, load
+        else:
+            self.callback_avg += (seconds - self.callback_avg) * SMOOTHING
+            self.load_avg += (load - self.load_avg) * SMOOTHING
+
+    def snapshot(self) -> dict:
+        return {
+            'underflows': self.underflows,
+            'overflows': self.overflows,
+            'decoder_underruns': self.decoder_underruns,
+            'callback_ms': round(self.callback_avg * 1000, 3),
+            'callback_max_ms': round(self.callback_max * 1000, 3),
+            'cpu_load': round(self.load_avg, 4),
+        }
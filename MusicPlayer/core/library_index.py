@@ -0,0 +1,121 @@
+# library_index.py
+
+# Persistent on-disk library index (SQLite)
+# Stores parsed track metadata keyed by path together with file size and mtime,
+# so a rescan only has to re-parse files that are new or were changed
+# Loudness analysis results live in the same rows; re-parsing a changed file
+# clears them, so it is analyzed again, as does a new ANALYSIS_VERSION
+
+import os, sqlite3
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterable, List
+from core.database import LIBRARY_INDEX_FILE
+
+# Bump when the table layout changes — old index is dropped and rebuilt
+SCHEMA_VERSION = 4
+# Bump when loudness is measured differently — stored results are cleared and analyzed again
+# (2: MP3 measured on a whole-file decode)
+ANALYSIS_VERSION = 2
+
+TRACK_COLUMNS = ('path', 'size', 'mtime', 'title', 'artist', 'album', 'cover_key', 'duration',
+                 'loudness', 'peak')
+
+
+class LibraryIndex:
+    def __init__(self, db_path: str = LIBRARY_INDEX_FILE):
+        self.db_path = db_path
+        self._lock = Lock()
+        self._init_schema()
+
+    # Short-lived connection: commits on success, always closed
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        with self._lock, self._connect() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS tracks")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tracks (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime INTEGER NOT NULL,
+                    title TEXT,
+                    artist TEXT,
+                    album TEXT,
+                    cover_key TEXT,
+                    duration REAL,
+                    loudness REAL,
+                    peak REAL
+                )
+            """)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'analysis_version'").fetchone()
+            if row is None or row[0] != ANALYSIS_VERSION:
+                conn.execute("UPDATE tracks SET loudness = NULL, peak = NULL")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('analysis_version', ?)", (ANALYSIS_VERSION,))
+
+    # Load all cached rows located under base_dir: {path: row_dict}
+    def load(self, base_dir: str) -> Dict[str, Dict]:
+        prefix = os.path.join(base_dir, '')
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(TRACK_COLUMNS)} FROM tracks").fetchall()
+        return {row['path']: dict(row) for row in rows if row['path'].startswith(prefix)}
+
+    # Insert or replace rows and drop removed paths in one transaction
+    def update(self, rows: Iterable[Dict], removed: Iterable[str] = ()):
+        values = [tuple(row.get(col) for col in TRACK_COLUMNS) for row in rows]
+        removed = [(path,) for path in removed]
+        if not values and not removed:
+            return
+        placeholders = ', '.join('?' for _ in TRACK_COLUMNS)
+        with self._lock, self._connect() as conn:
+            if values:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO tracks ({', '.join(TRACK_COLUMNS)}) VALUES ({placeholders})",
+                    values
+                )
+            if removed:
+                conn.executemany("DELETE FROM tracks WHERE path = ?", removed)
+
+    # Store loudness results; rows whose file changed since the analysis are left alone
+    def set_loudness(self, results: Iterable[Dict]):
+        values = [(r['loudness'], r['peak'], r['path'], r['size'], r['mtime']) for r in results]
+        if not values:
+            return
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE tracks SET loudness = ?, peak = ? WHERE path = ? AND size = ? AND mtime = ?",
+                values
+            )
+
+    def remove(self, paths: List[str]):
+        self.update((), removed=paths)
+
+    # Wipe the whole index (forces a cold scan next time)
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM tracks")
+
+
+# Build an index row from parsed track metadata and its os.stat() result
+def make_row(data: Dict, st: os.stat_result) -> Dict:
+    row = dict(data)
+    row['size'] = st.st_size
+    row['mtime'] = st.st_mtime_ns
+    return row
+
+
+# True when the cached row still matches the file on disk
+def is_fresh(row: Dict, st: os.stat_result) -> bool:
+    return row['size'] == st.st_size and row['mtime'] == st.st_mtime_ns
@@ -0,0 +1,234 @@
+# loudness.py
+
+# Integrated loudness (ITU-R BS.1770 / EBU R128) and sample peak per track,
+# and the ReplayGain-style gain derived from them.
+# A file is decoded in blocks (read_blocks); each block is K-weighted with one sosfilt call
+# (filter state carried over) and reduced to 100 ms energy segments with
+# numpy, so the gating at the end works on a few thousand numbers per hour.
+# LoudnessAnalyzer runs files on a thread pool (decoding and filtering release
+# the GIL) and reports results in batches. The same decode feeds the waveform
+# peaks of files that have none cached yet; a file whose loudness is already
+# known is decoded for its peaks alone (submit_peaks), with no result reported.
+
+import os, math, time
+import numpy as np
+import soundfile as sf
+from scipy.signal import sosfilt
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional
+from core.audio_source import read_blocks
+
+REFERENCE_LUFS = -18.0 # ReplayGain 2.0 reference level
+MAX_GAIN_DB = 12.0 # quiet tracks are never boosted more than this
+SEGMENT_SECONDS = 0.1 # gating blocks are 4 segments (400 ms) with 75% overlap
+SEGMENTS_PER_READ = 50 # 5 s decoded per read
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+SILENCE_LUFS = -70.0 # reported for tracks with no block above the absolute gate
+LOUDNESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+RESULT_BATCH = 32 # results handed over (and stored) together
+
+
+# K-weighting (pre-filter shelf + RLB high-pass) as SOS for any samplerate
+def k_weighting(samplerate: int) -> np.ndarray:
+    # High shelf, +4 dB above ~1.7 kHz
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / samplerate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    # High-pass at ~38 Hz
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / samplerate)
+    a0 = 1 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.array([shelf, highpass])
+
+
+# Gated integrated loudness from the 100 ms segment energies, shape (segments,)
+def integrated_loudness(segments: np.ndarray) -> float:
+    if len(segments) < 4:
+        # Shorter than one gating block: measure it as a whole
+        blocks = np.array([segments.mean()]) if len(segments) else np.zeros(1)
+    else:
+        csum = np.concatenate(([0.0], np.cumsum(segments)))
+        blocks = (csum[4:] - csum[:-4]) / 4
+
+    with np.errstate(divide='ignore'):
+        levels = -0.691 + 10 * np.log10(blocks)
+    blocks = blocks[levels > ABSOLUTE_GATE]
+    if not len(blocks):
+        return SILENCE_LUFS
+    threshold = -0.691 + 10 * math.log10(blocks.mean()) + RELATIVE_GATE
+    with np.errstate(divide='ignore'):
+        blocks = blocks[-0.691 + 10 * np.log10(blocks) > threshold]
+    return float(-0.691 + 10 * math.log10(blocks.mean()))
+
+
+# {'loudness': LUFS, 'peak': linear sample peak} of one file
+def analyze_file(path: str, waveforms=None) -> Dict:
+    with sf.SoundFile(path) as f:
+        samplerate, channels = f.samplerate, f.channels
+        peaks = waveforms.builder(path, f.frames, samplerate) if waveforms is not None else None
+        seg = max(1, int(round(samplerate * SEGMENT_SECONDS)))
+        sos = k_weighting(samplerate)
+        zi = np.zeros((len(sos), 2, channels))
+        parts = []
+        peak = 0.0
+        try:
+            for block in read_blocks(f, seg * SEGMENTS_PER_READ):
+                if len(block):
+                    peak = max(peak, float(np.abs(block).max()))
+                    if peaks is not None:
+                        peaks.feed(block)
+                filtered, zi = sosfilt(sos, block, axis=0, zi=zi)
+                whole = len(filtered) // seg * seg
+                if whole:
+                    # Channel weights are 1 for front channels; energies summed over channels
+                    energy = np.square(filtered[:whole]).reshape(-1, seg, channels).mean(axis=1)
+                    parts.append(energy.sum(axis=1))
+            if peaks is not None:
+                peaks.finish()
+        finally:
+            if peaks is not None:
+                peaks.abandon()
+    segments = np.concatenate(parts) if parts else np.zeros(0)
+    return {'loudness': integrated_loudness(segments), 'peak': peak}
+
+
+# Decode a file only to feed its waveform peaks (nothing to do when cached or being built)
+def build_peaks(path: str, waveforms):
+    with sf.SoundFile(path) as f:
+        peaks = waveforms.builder(path, f.frames, f.samplerate)
+        if peaks is None:
+            return
+        try:
+            for block in read_blocks(f, int(f.samplerate * SEGMENT_SECONDS) * SEGMENTS_PER_READ):
+                peaks.feed(block)
+            peaks.finish()
+        finally:
+            peaks.abandon()
+
+
+# Linear gain bringing a track (or album) to the reference, clipping prevented by its peak
+def replay_gain(loudness: float, peak: float, preamp_db: float = 0.0) -> float:
+    gain_db = min(REFERENCE_LUFS - loudness + preamp_db, MAX_GAIN_DB)
+    if peak > 0:
+        gain_db = min(gain_db, -20 * math.log10(peak))
+    return 10 ** (gain_db / 20)
+
+
+# Album loudness as the duration-weighted energy mean of its tracks, album peak as the max
+def album_loudness(tracks: Iterable) -> Optional[tuple]:
+    energy = duration = peak = 0.0
+    for track in tracks:
+        if track.loudness is None:
+            continue
+        weight = track.duration or 1.0
+        energy += weight * 10 ** (track.loudness / 10)
+        duration += weight
+        peak = max(peak, track.peak or 0.0)
+    if not duration:
+        return None
+    return 10 * math.log10(energy / duration), peak
+
+
+class LoudnessAnalyzer:
+    """
+    Background loudness analysis on a thread pool.
+    on_results receives lists of {'path', 'size', 'mtime', 'loudness', 'peak'};
+    size and mtime are taken before decoding, so a result for a file that has
+    changed since can be told apart.
+    """
+    def __init__(self, on_results: Callable[[List[Dict]], None], workers: int = LOUDNESS_WORKERS, waveforms=None):
+        self._on_results = on_results
+        self.workers = workers
+        self.waveforms = waveforms
+        self._pool = None
+        self._lock = Lock()
+        self._pending = set()
+        self._peaks_pending = set()
+        self._batch = []
+        self.stats = {'queued': 0, 'analyzed': 0, 'failed': 0, 'seconds': 0.0}
+
+    def submit(self, paths: Iterable[str]):
+        with self._lock:
+            fresh = [p for p in paths if p not in self._pending]
+            if not fresh:
+                return
+            self._pending.update(fresh)
+            self.stats['queued'] += len(fresh)
+            pool = self._get_pool()
+        for path in fresh:
+            pool.submit(self._analyze, path)
+
+    # Waveform peaks only, for files whose loudness is known; queued after any analysis
+    def submit_peaks(self, paths: Iterable[str]):
+        if self.waveforms is None:
+            return
+        with self._lock:
+            fresh = [p for p in paths if p not in self._pending and p not in self._peaks_pending]
+            if not fresh:
+                return
+            self._peaks_pending.update(fresh)
+            pool = self._get_pool()
+        for path in fresh:
+            pool.submit(self._build_peaks, path)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="loudness")
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + len(self._peaks_pending)
+
+    def _analyze(self, path: str):
+        started = time.perf_counter()
+        result = None
+        try:
+            st = os.stat(path)
+            result = analyze_file(path, self.waveforms)
+            result.update(path=path, size=st.st_size, mtime=st.st_mtime_ns)
+        except Exception as e:
+            print(f"⚠️ Loudness analysis failed ({os.path.basename(path)}): {e}")
+
+        with self._lock:
+            self._pending.discard(path)
+            self.stats['seconds'] += time.perf_counter() - started
+            if result is None:
+                self.stats['failed'] += 1
+            else:
+                self.stats['analyzed'] += 1
+                self._batch.append(result)
+            if not self._batch or (len(self._batch) < RESULT_BATCH and self._pending):
+                return
+            batch, self._batch = self._batch, []
+
+        try:
+            self._on_results(batch)
+        except Exception as e:
+            print(f"⚠️ Loudness result error: {e}")
+
+    def _build_peaks(self, path: str):
+        try:
+            build_peaks(path, self.waveforms)
+        except Exception as e:
+            print(f"⚠️ Waveform failed ({os.path.basename(path)}): {e}")
+        with self._lock:
+            self._peaks_pending.discard(path)
+
+    # Drop everything still queued (library reset)
+    def cancel(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._pending.clear()
+            self._peaks_pending.clear()
+            self._batch = []
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
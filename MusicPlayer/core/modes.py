@@ -1,6 +1,6 @@
 ### modes.py
 
-import random
+from core.play_order import PlayOrder
 
 # Module to manage playback modes: shuffle and cycle
 
@@ -8,7 +8,9 @@ class Modes:
     def toggle_shuffle(self):
         with self._lock:
             self._shuffle_mode = not self._shuffle_mode
-            return self.apply_shuffle_logic()
+            state = self.apply_shuffle_logic()
+            self._playback_order_changed()
+            return state
 
     def apply_shuffle_logic(self):
         if not getattr(self, "playlist", None):
@@ -19,14 +21,15 @@ class Modes:
             current_path = self.playlist_playback[self.current_index]
 
         if self._shuffle_mode:
-            shuffled = [t.path for t in self.playlist]
-            random.shuffle(shuffled)
-            self.playlist_playback = shuffled
-            if current_path and current_path in self.playlist_playback:
-                self.playlist_playback.remove(current_path)
-                self.playlist_playback.insert(0, current_path)
+            # Current track goes first, the rest in random order
+            order = PlayOrder.shuffled(self._playlist_order, first=current_path)
+            self.playlist_playback = order
+            # Pinned in front: no lookup (the position map is built on first use)
+            if current_path and order and order[0] == current_path:
+                self.current_index = 0
+                return self._shuffle_mode
         else:
-            self.playlist_playback = [t.path for t in self.playlist]
+            self.playlist_playback = self._playlist_order
 
         if current_path and current_path in self.playlist_playback:
             self.current_index = self.playlist_playback.index(current_path)
@@ -38,3 +41,8 @@ class Modes:
     def set_cycle_mode(self, mode: int):
         with self._lock:
             self._cycle_mode = mode
+            self._playback_order_changed()
+
+    # Hook for the playback engine (the next track may have changed)
+    def _playback_order_changed(self):
+        pass
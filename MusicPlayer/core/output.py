@@ -0,0 +1,130 @@
+# output.py
+
+# Output backends the engine's callback renders into
+# "sounddevice" is the sound card (a PortAudio stream). "null" needs no
+# hardware: a thread calls the same callback with buffers of the stream's
+# blocksize and drops the audio, paced like a device or as fast as possible.
+# Both take the OutputStream arguments and offer start/stop/close and latency,
+# so the engine does not care which one it runs on. sounddevice is imported by
+# its backend only, so the engine also runs on a box without PortAudio.
+
+from threading import Thread, Event, current_thread
+from time import perf_counter
+from typing import Optional
+import numpy as np
+
+DEFAULT_OUTPUT_BACKEND = "sounddevice"
+
+
+class SoundDeviceOutput:
+    """PortAudio output stream on the default device."""
+    def __init__(self, **kwargs):
+        import sounddevice as sd
+        self._stream = sd.OutputStream(**kwargs)
+
+    @staticmethod
+    def default_samplerate() -> Optional[int]:
+        import sounddevice as sd
+        return int(sd.query_devices(kind='output')['default_samplerate'])
+
+    @property
+    def latency(self) -> float:
+        return self._stream.latency
+
+    def start(self):
+        self._stream.start()
+
+    def stop(self):
+        self._stream.stop()
+
+    def close(self):
+        self._stream.close()
+
+
+# Callback flags of a null buffer (falsy when nothing happened, like sounddevice's)
+class OutputStatus:
+    __slots__ = ("output_underflow", "output_overflow")
+
+    def __init__(self):
+        self.output_underflow = False
+        self.output_overflow = False
+
+    def __bool__(self):
+        return self.output_underflow or self.output_overflow
+
+
+class NullOutput:
+    """
+    Output without hardware. speed 1.0 paces buffers like a device, higher
+    values run that many times faster than real time, 0 runs them back to
+    back. A buffer due more than one period ago is passed to the callback as
+    an output underflow, as PortAudio would report it.
+    """
+    def __init__(self, samplerate: int, channels: int, dtype: str = 'float32', blocksize: int = 0,
+                 latency=None, callback=None, speed: float = 1.0):
+        self.samplerate = samplerate
+        self.blocksize = blocksize or 1024
+        self.latency = self.blocksize / samplerate
+        self.speed = speed
+        self._callback = callback
+        self._buffer = np.zeros((self.blocksize, channels), dtype=dtype)
+        self._stopped = Event()
+        self._thread = None
+        self.frames = 0 # frames rendered since the stream was opened
+
+    @staticmethod
+    def default_samplerate() -> Optional[int]:
+        return None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, daemon=True, name="null-output")
+        self._thread.start()
+
+    def _run(self):
+        period = self.blocksize / self.samplerate / self.speed if self.speed else 0.0
+        status = OutputStatus()
+        deadline = perf_counter()
+        try:
+            while not self._stopped.is_set():
+                if period:
+                    now = perf_counter()
+                    if now < deadline:
+                        self._stopped.wait(deadline - now)
+                        continue
+                    status.output_underflow = now - deadline > period
+                    deadline = now + period if status.output_underflow else deadline + period
+                self._callback(self._buffer, self.blocksize, None, status)
+                self.frames += self.blocksize
+                if not period:
+                    self._stopped.wait(0) # let decoder threads take the GIL
+        except Exception as e:
+            print(f"⚠️ Null output callback error: {e}")
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        self._stopped.set()
+        if thread is not None and thread is not current_thread():
+            thread.join()
+
+    def close(self):
+        self.stop()
+
+
+OUTPUT_BACKENDS = {
+    "sounddevice": SoundDeviceOutput,
+    "null": NullOutput,
+}
+
+
+# Stream of a backend; options are backend-specific (e.g. speed for "null")
+def open_output(backend: str, options: Optional[dict] = None, **stream_args):
+    if backend not in OUTPUT_BACKENDS:
+        raise ValueError(f"Unknown output backend: {backend}")
+    return OUTPUT_BACKENDS[backend](**stream_args, **(options or {}))
@@ -0,0 +1,276 @@
+# pcm_cache.py
+
+# Decoded PCM of often played tracks, kept on disk and memory-mapped
+# A cached track is one raw file: a small header, then the track as the output
+# callback plays it (stereo, output rate, normalization gain not applied) as
+# int16 or float32 frames. Playback maps it with numpy.memmap and the source
+# slices the map, so no decode runs and no private copy is held: the pages
+# come from the OS file cache. Files are keyed by path, mtime and rate.
+# Plays are counted here (plays.json); a background thread fills the cache
+# with the most played tracks (FILL_MIN_PLAYS or more) and evicts the least
+# recently used files to stay under the size cap.
+
+import os, json, time, struct
+import numpy as np
+import soundfile as sf
+from threading import Thread, Event, Lock
+from typing import Dict, Optional
+from core.database import PCM_CACHE_DIR
+from core.utils import track_cache_name
+from core.audio_source import to_stereo, read_blocks, OUTPUT_CHANNELS
+from core.resampler import PolyphaseResampler
+
+DEFAULT_PCM_CACHE_MB = 1024
+DEFAULT_PCM_FORMAT = "int16"
+PCM_FORMATS = {"int16": (0, np.dtype('<i2')), "float32": (1, np.dtype('<f4'))}
+FILL_MIN_PLAYS = 3 # plays before a track is worth a cached copy
+FILL_BLOCK_FRAMES = 65536
+PLAYS_FILE = "plays.json"
+
+# magic, version, channels, format code, samplerate, frames
+HEADER = struct.Struct('<4sHHHIQ')
+MAGIC = b'PCMC'
+VERSION = 2 # 1: MP3 filled from a corrupt block-wise decode
+
+
+def encode(data: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    if dtype.kind == 'i':
+        return np.clip(np.rint(data * 32768.0), -32768, 32767).astype(dtype)
+    return data.astype(dtype, copy=False)
+
+
+class PcmCache:
+    def __init__(self, cache_dir: str = PCM_CACHE_DIR, max_bytes: int = DEFAULT_PCM_CACHE_MB << 20,
+                 fmt: str = DEFAULT_PCM_FORMAT, min_plays: int = FILL_MIN_PLAYS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self.format = fmt if fmt in PCM_FORMATS else DEFAULT_PCM_FORMAT
+        self.min_plays = min_plays
+        self.samplerate = 0 # output rate the fill job decodes for (last play)
+        self._lock = Lock()
+        self._entries = None # file name -> [bytes, last used], read from the folder on first use
+        self._plays = None # path -> play count, loaded by the fill thread
+        self._new_plays = []
+        self._queue = [] # paths to fill, most played first
+        self._failed = set()
+        self._wake = Event()
+        self._stopped = Event()
+        self._thread = None
+        self.stats = {'hits': 0, 'misses': 0, 'fills': 0, 'evictions': 0}
+
+    def cache_file(self, path: str, mtime: int, samplerate: int) -> str:
+        return os.path.join(self.cache_dir, track_cache_name(path, mtime, f".{samplerate}.pcm"))
+
+    # Read-only map of a cached track, shape (frames, channels); None when not cached
+    def open(self, path: str, samplerate: int) -> Optional[np.memmap]:
+        if not self.max_bytes:
+            return None
+        try:
+            target = self.cache_file(path, os.stat(path).st_mtime_ns, samplerate)
+            with open(target, 'rb') as fh:
+                magic, version, channels, code, rate, frames = HEADER.unpack(fh.read(HEADER.size))
+            dtypes = {c: dtype for c, dtype in PCM_FORMATS.values()}
+            if magic != MAGIC or version != VERSION or rate != samplerate or code not in dtypes or not frames:
+                raise ValueError("stale entry")
+            data = np.memmap(target, dtype=dtypes[code], mode='r', offset=HEADER.size, shape=(frames, channels))
+        except (OSError, ValueError, struct.error):
+            self.stats['misses'] += 1
+            return None
+        self._touch(target)
+        self.stats['hits'] += 1
+        return data
+
+    def _touch(self, target: str):
+        now = time.time()
+        try:
+            os.utime(target, (now, now)) # last use survives restarts
+        except OSError:
+            pass
+        with self._lock:
+            entry = self._index().get(os.path.basename(target))
+            if entry is not None:
+                entry[1] = now
+
+    # Called with the lock held
+    def _index(self) -> Dict:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with os.scandir(self.cache_dir) as it:
+                    for e in it:
+                        if e.name.endswith(".pcm"):
+                            st = e.stat()
+                            self._entries[e.name] = [st.st_size, st.st_mtime]
+            except OSError:
+                pass
+        return self._entries
+
+    # A track started playing: count it, fill its copy once it is played often
+    def record_play(self, path: str, samplerate: int):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            self.samplerate = samplerate
+            self._new_plays.append(path)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True, name="pcm-cache")
+                self._thread.start()
+        self._wake.set()
+
+    # New cap or format (applies to later fills); a smaller cap evicts right away
+    def configure(self, max_bytes: int, fmt: str = DEFAULT_PCM_FORMAT):
+        self.format = fmt if fmt in PCM_FORMATS else DEFAULT_PCM_FORMAT
+        with self._lock:
+            self.max_bytes = max(0, int(max_bytes))
+            self._make_room(0)
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    # ------------------ FILL JOB ------------------
+
+    def _run(self):
+        self._load_plays()
+        # Most played tracks first, as far as they fit without evicting anything
+        try:
+            for path, plays in sorted(self._plays.items(), key=lambda item: -item[1]):
+                if plays < self.min_plays or self._stopped.is_set() or not self._fill(path, evict=False):
+                    break
+        except Exception as e:
+            print(f"⚠️ PCM cache error: {e}")
+        while not self._stopped.is_set():
+            try:
+                self._take_plays()
+                while self._queue and not self._stopped.is_set():
+                    self._fill(self._queue.pop(0))
+            except Exception as e:
+                print(f"⚠️ PCM cache error: {e}")
+            self._wake.wait()
+            self._wake.clear()
+
+    def _load_plays(self):
+        try:
+            with open(os.path.join(self.cache_dir, PLAYS_FILE), encoding='utf-8') as fh:
+                self._plays = {str(k): int(v) for k, v in json.load(fh).items()}
+        except (OSError, ValueError, AttributeError):
+            self._plays = {}
+
+    def _take_plays(self):
+        with self._lock:
+            new, self._new_plays = self._new_plays, []
+        if not new:
+            return
+        for path in new:
+            self._plays[path] = self._plays.get(path, 0) + 1
+            if self._plays[path] >= self.min_plays and path not in self._queue:
+                self._queue.append(path)
+        self._queue.sort(key=lambda p: -self._plays.get(p, 0))
+        self._save_plays()
+
+    def _save_plays(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            target = os.path.join(self.cache_dir, PLAYS_FILE)
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(self._plays, fh)
+            os.replace(tmp_path, target)
+        except OSError as e:
+            print(f"⚠️ Could not save play counts: {e}")
+
+    # Decode one track into its cache file; False when it does not fit
+    def _fill(self, path: str, evict: bool = True) -> bool:
+        samplerate, code, dtype = self.samplerate, *PCM_FORMATS[self.format]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return True
+        target = self.cache_file(path, mtime, samplerate)
+        key = (path, mtime, samplerate)
+        if key in self._failed or os.path.exists(target):
+            return True
+
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            with sf.SoundFile(path) as f:
+                resampler = PolyphaseResampler(f.samplerate, samplerate, OUTPUT_CHANNELS) \
+                    if f.samplerate != samplerate else None
+                frames = resampler.output_length(f.frames) if resampler is not None else f.frames
+                nbytes = HEADER.size + frames * OUTPUT_CHANNELS * dtype.itemsize
+                with self._lock:
+                    if not self._make_room(nbytes, evict):
+                        return False
+                written = 0
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(tmp_path, 'wb') as out:
+                    out.write(HEADER.pack(MAGIC, VERSION, OUTPUT_CHANNELS, code, samplerate, 0))
+                    for block in read_blocks(f, FILL_BLOCK_FRAMES):
+                        if self._stopped.is_set():
+                            raise InterruptedError
+                        data = to_stereo(block)
+                        if resampler is not None:
+                            data = resampler.process(data)
+                        out.write(encode(data, dtype).tobytes())
+                        written += len(data)
+                    if resampler is not None:
+                        tail = resampler.flush()
+                        out.write(encode(tail, dtype).tobytes())
+                        written += len(tail)
+                    # The frame count goes in last: a cut-off file never passes as complete
+                    out.seek(0)
+                    out.write(HEADER.pack(MAGIC, VERSION, OUTPUT_CHANNELS, code, samplerate, written))
+            if os.stat(path).st_mtime_ns != mtime:
+                raise InterruptedError # changed while decoding
+            os.replace(tmp_path, target)
+        except InterruptedError:
+            self._remove(tmp_path)
+            return True
+        except Exception as e:
+            print(f"⚠️ PCM cache fill failed ({os.path.basename(path)}): {e}")
+            self._remove(tmp_path)
+            self._failed.add(key)
+            return True
+        with self._lock:
+            self._index()[os.path.basename(target)] = [os.path.getsize(target), time.time()]
+            self.stats['fills'] += 1
+        return True
+
+    # Called with the lock held: evict least recently used files until nbytes more fit
+    def _make_room(self, nbytes: int, evict: bool = True) -> bool:
+        if nbytes > self.max_bytes:
+            return False
+        entries = self._index()
+        total = sum(size for size, _ in entries.values())
+        if not evict:
+            return total + nbytes <= self.max_bytes
+        for name, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total + nbytes <= self.max_bytes:
+                break
+            # A mapped file cannot be deleted on Windows: it stays until the next pass
+            if self._remove(os.path.join(self.cache_dir, name)):
+                del entries[name]
+                total -= size
+                self.stats['evictions'] += 1
+        return total + nbytes <= self.max_bytes
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries = self._index()
+            stats = dict(self.stats)
+            stats.update(entries=len(entries),
+                         mb=round(sum(size for size, _ in entries.values()) / (1 << 20), 1),
+                         cap_mb=round(self.max_bytes / (1 << 20), 1),
+                         format=self.format,
+                         queued=len(self._queue))
+        return stats
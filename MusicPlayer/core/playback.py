@@ -1,46 +1,102 @@
 # playback.py
 
 # Modified playback module using sounddevice and soundfile with equalizer support
+# The output stream comes from an output backend (see core/output.py): the
+# sound card by default, or a null sink that drives the callback without one.
+# Frames come from an audio source: streamed from disk through a ring buffer
+# (default) or fully decoded into memory (see core/audio_source.py)
+# Recently decoded tracks stay in an LRU cache (core/decoded_cache.py), so prev,
+# replay and cycle-one repeat play them again without decoding. The most played
+# tracks also get a decoded copy on disk that is played memory-mapped
+# (core/pcm_cache.py).
+# Gapless mode prepares the next entry of playlist_playback while the current
+# track plays; the callback switches sources at the exact end sample.
+# One output stream stays open at the device rate: a skip only swaps the source,
+# tracks at other rates are resampled by their source.
+# The stream's blocksize and latency come from a latency profile; the callback
+# counts under/overflows and its own run time, and repeated underflows make the
+# engine step up to the next, larger profile.
+# After every buffer the callback publishes a (position, frames, rate) snapshot
+# in one reference assignment: position queries read it without the lock that
+# play_track holds while it opens a track, and a progress thread pushes it to
+# the UI at progress_hz, only when something changed.
 
-from typing import Optional, List, Dict
+import os
+from typing import Optional, List, Dict, Callable
 from threading import Thread
-import time
-import numpy as np
-import sounddevice as sd
-import soundfile as sf
+from time import perf_counter
 from core.track_info import TrackInfo
+from core.audio_source import MemorySource, StreamDecoder, OUTPUT_CHANNELS, decodes_in_blocks
+from core.database import get_playback_settings, get_lite_mode
+from core.cover_cache import extract_cover
+from core.play_order import PlayOrder
+from core.latency import LATENCY_PROFILES, DEFAULT_LATENCY_PROFILE, next_profile
+from core.loudness import replay_gain, album_loudness
+from core.output import OUTPUT_BACKENDS, open_output
+from core.decoded_cache import DEFAULT_DECODED_CACHE_MB, BYTES_PER_MB
+from core.pcm_cache import DEFAULT_PCM_CACHE_MB, DEFAULT_PCM_FORMAT
+from core.facet_index import UNKNOWN_NAMES
+
+DEFAULT_OUTPUT_RATE = 44100
+DEFAULT_PROGRESS_HZ = 4
 
 class Playback:
     def _audio_callback(self, outdata, frames, time_info, status):
-        if self.is_paused or not self.is_playing:
+        start = perf_counter()
+        if status:
+            self._stats.record_status(status)
+            # Reopening the stream is left to the worker thread
+            if status.output_underflow and self._stats.step_up_requested:
+                self._gapless_wake.set()
+        self._render(outdata, frames)
+        source = self._source
+        self._snapshot = (source.position, source.frames, self._samplerate) if source is not None else None
+        self._stats.record_callback(perf_counter() - start, frames, self._samplerate)
+
+    def _render(self, outdata, frames):
+        source = self._source
+        if self.is_paused or not self.is_playing or source is None:
             outdata.fill(0)
             return
 
-        chunk = self._audio_data[self._pos : self._pos + frames]
-        
+        n = source.read(outdata)
+
         # Equalizer processing
-        if len(chunk) < frames:
-            if len(chunk) > 0:
-                chunk = self.equalizer.process(chunk, self._samplerate)
-                outdata[:len(chunk)] = chunk
-            outdata[len(chunk):].fill(0)
+        if n > 0:
+            self.equalizer.process_into(outdata[:n], self._samplerate, source.gain)
+
+        if n < frames:
+            # Decoder fell behind — play silence and keep going
+            if not source.finished:
+                outdata[n:].fill(0)
+                self._stats.decoder_underruns += 1
+                return
+
+            # Gapless: continue with the prepared next track in the same buffer
+            nxt = self._take_next_source()
+            if nxt is not None:
+                self._source = nxt
+                self._retired_source = source
+                rest = outdata[n:]
+                m = nxt.read(rest)
+                if m > 0:
+                    self.equalizer.process_into(rest[:m], self._samplerate, nxt.gain)
+                rest[m:].fill(0)
+                self._advanced = True
+                self._gapless_wake.set()
+                return
+
+            # Track over: the stream stays open and plays silence
+            outdata[n:].fill(0)
             self.is_playing = False
             self._on_end()
-            raise sd.CallbackStop
-        else:
-            # Apply equalizer
-            processed_chunk = self.equalizer.process(chunk, self._samplerate)
-            outdata[:] = processed_chunk
-            self._pos += frames
 
     def play_track(self, path: Optional[str] = None, index: Optional[int] = None, playlist: Optional[List[str]] = None) -> Optional[Dict]:
         with self._lock:
             if playlist is not None:
-                self.playlist_playback = playlist
+                self.playlist_playback = PlayOrder(playlist)
                 if self._shuffle_mode:
                     self.apply_shuffle_logic()
-                else:
-                    self.playlist_playback = playlist
                 self.current_index = 0
                 path = self.playlist_playback[0]
 
@@ -53,92 +109,404 @@ class Playback:
                 if path in self.playlist_playback:
                     self.current_index = self.playlist_playback.index(path)
                 else:
+                    # Order of the shown playlist is already built by the query
                     if hasattr(self, "playlist") and self.playlist:
-                        self.playlist_playback = [t.path for t in self.playlist]
+                        self.playlist_playback = self._playlist_order
                     else:
-                        self.playlist_playback = [track.path for track in self._library]
+                        self.playlist_playback = PlayOrder(track.path for track in self._library)
                     self.current_index = self.playlist_playback.index(path)
             else: return None
 
-            if self._stream:
-                self._stream.stop()
-                self._stream.close()
-
             try:
-                # Read audio file(float32 for better processing)
-                self._audio_data, self._samplerate = sf.read(path, dtype='float32')
-                
-                # Ensure stereo
-                if len(self._audio_data.shape) == 1:
-                    self._audio_data = np.column_stack((self._audio_data, self._audio_data))
-                
-                self._pos = 0
-                self.current_track = TrackInfo(path)
-                
-                # Start playback stream
-                self._stream = sd.OutputStream(
-                    samplerate=self._samplerate,
-                    channels=self._audio_data.shape[1],
-                    callback=self._audio_callback
-                )
-                self._stream.start()
+                self._ensure_stream()
+
+                # Open the audio source (float32 stereo at the device rate);
+                # a track prepared for gapless playback already has its head decoded
+                source = self._claim_next_source(path)
+                if source is None:
+                    source = self._open_source(path)
+                    source.start()
+
+                # The callback picks the new source up with its next buffer
+                previous, self._source = self._source, source
+                self._snapshot = (0, source.frames, self._samplerate)
+                if previous is not None:
+                    previous.close()
+
+                self.current_track = self._track_record(path)
                 
                 self.is_playing = True
                 self.is_paused = False
 
-                # Callback on track change
-                if callable(self._track_change_callback):
-                    try: self._track_change_callback(self.current_track.as_dict())
-                    except: pass
-                
-                # Shuffle cache update
-                if self._shuffle_mode and self.current_index not in self._shuffle_cache:
-                    self._shuffle_cache[self.current_index] = self.current_track.path
+                self._announce_track()
+                self._schedule_prepare()
+                self._progress_wake.set()
 
                 return self.current_track.as_dict()
             except Exception as e:
                 print(f"Error loading track: {e}")
                 return None
 
+    # Streaming keeps memory bounded per track; "memory" mode decodes it all up front
+    # (see decodes_in_blocks for when it must). A track still in the decoded cache,
+    # or with a copy in the PCM cache, is played from there in either mode.
+    def _open_source(self, path: str):
+        settings = get_playback_settings()
+        gain = self._normalization_gain(path, settings)
+        pcm = self._decoded.get(path, self._samplerate)
+        if pcm is None:
+            pcm = self._pcm_cache.open(path, self._samplerate)
+        if pcm is not None:
+            return MemorySource(path, self._samplerate, gain=gain, pcm=pcm)
+        if settings.get("mode") == "memory" or not decodes_in_blocks(path):
+            return MemorySource(path, self._samplerate, gain=gain, waveforms=self._waveforms,
+                                decoded=self._decoded)
+        return StreamDecoder(path, self._samplerate, gain=gain, waveforms=self._waveforms,
+                             seek_indexes=self._seek_indexes, decoded=self._decoded)
+
+    # Budget of the decoded cache: the "decoded_cache_mb" setting, nothing in lite mode
+    def _decoded_cache_budget(self) -> int:
+        if get_lite_mode():
+            return 0
+        mb = get_playback_settings().get("decoded_cache_mb", DEFAULT_DECODED_CACHE_MB)
+        return int(float(mb or 0) * BYTES_PER_MB)
+
+    # Settings or lite mode changed: a smaller budget or cap evicts at once
+    def update_caches(self):
+        self._decoded.set_budget(self._decoded_cache_budget())
+        settings = get_playback_settings()
+        self._pcm_cache.configure(*self._pcm_cache_settings(settings))
+
+    # (size cap in bytes, sample format) of the on-disk PCM cache
+    @staticmethod
+    def _pcm_cache_settings(settings: Dict):
+        mb = settings.get("pcm_cache_mb", DEFAULT_PCM_CACHE_MB)
+        return int(float(mb or 0) * BYTES_PER_MB), settings.get("pcm_cache_format", DEFAULT_PCM_FORMAT)
+
+    def get_decoded_cache_stats(self) -> Dict:
+        return self._decoded.stats()
+
+    def get_pcm_cache_stats(self) -> Dict:
+        return self._pcm_cache.get_stats()
+
+    # ReplayGain-style gain from the analyzed loudness ("track" or "album"; 1.0 when off or unknown)
+    def _normalization_gain(self, path: str, settings: Dict) -> float:
+        mode = settings.get("normalization", "track")
+        track = self._by_path.get(path)
+        if mode not in ("track", "album") or track is None or track.loudness is None:
+            return 1.0
+        loudness, peak = track.loudness, track.peak or 0.0
+        if mode == "album" and track.album_key and track.album != UNKNOWN_NAMES['album']:
+            # An album is its title and artist: same-titled albums of other artists stay apart
+            facet = self._facets.get("album", track.album)
+            album = None
+            if facet is not None:
+                album = album_loudness(t for t in facet.tracks.values() if t.artist_key == track.artist_key)
+            if album is not None:
+                loudness, peak = album
+        return replay_gain(loudness, peak, float(settings.get("normalization_preamp") or 0.0))
+
+    # ------------------ OUTPUT ENGINE ------------------
+
+    # Device rate: the "output_rate" setting, or the default output device's rate
+    def _output_rate(self) -> int:
+        rate = int(get_playback_settings().get("output_rate") or 0)
+        if rate > 0:
+            return rate
+        try:
+            return OUTPUT_BACKENDS[self.output_backend].default_samplerate() or DEFAULT_OUTPUT_RATE
+        except Exception:
+            return DEFAULT_OUTPUT_RATE
+
+    # Active profile: set by the user or stepped up; otherwise the "latency_profile" setting
+    def _latency_profile_name(self) -> str:
+        name = self._latency_profile or get_playback_settings().get("latency_profile", DEFAULT_LATENCY_PROFILE)
+        return name if name in LATENCY_PROFILES else DEFAULT_LATENCY_PROFILE
+
+    # Open the long-lived output stream once; later tracks only swap the source
+    def _ensure_stream(self):
+        if self._stream is not None:
+            return
+        self._open_stream(self._output_rate())
+
+    def _open_stream(self, samplerate: int):
+        profile = LATENCY_PROFILES[self._latency_profile_name()]
+        self._samplerate = samplerate
+        self.equalizer.set_format(samplerate, OUTPUT_CHANNELS) # designs before the callback runs
+        self._stream = open_output(
+            self.output_backend, self.output_options,
+            samplerate=samplerate,
+            channels=OUTPUT_CHANNELS,
+            dtype='float32',
+            blocksize=profile["blocksize"],
+            latency=profile["latency"],
+            callback=self._audio_callback
+        )
+        self._stats.reset_window()
+        self._stream.start()
+
+    # Reopen the running stream with the current profile; the source keeps playing
+    def _restart_stream(self):
+        with self._lock:
+            if self._stream is None:
+                return
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+            self._open_stream(self._samplerate)
+
+    # Switch latency profile ("low-latency", "balanced", "power-saver")
+    def set_latency_profile(self, name: str) -> bool:
+        if name not in LATENCY_PROFILES:
+            return False
+        self._latency_profile = name
+        self._restart_stream()
+        return True
+
+    # Repeated underflows: move to the next larger buffer (kept for this session)
+    def _step_up_latency(self):
+        current = self._latency_profile_name()
+        name = next_profile(current)
+        if name is None:
+            self._stats.reset_window()
+            return
+        print(f"⚠️ Repeated underruns — latency profile {current} → {name}")
+        self._latency_profile = name
+        self._restart_stream()
+
+    def _engine_info(self) -> Dict:
+        name = self._latency_profile_name()
+        info = {
+            'latency_profile': name,
+            'blocksize': LATENCY_PROFILES[name]["blocksize"],
+            'samplerate': self._samplerate,
+            'latency': float(self._stream.latency) if self._stream is not None else 0.0,
+        }
+        info.update(self._stats.snapshot())
+        return info
+
+    # Close the output device (library reset, app exit)
+    def stop_engine(self):
+        with self._lock:
+            self.stop()
+            if self._stream:
+                self._stream.stop()
+                self._stream.close()
+                self._stream = None
+
+    def _close_source(self):
+        self._snapshot = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        self._progress_wake.set()
+
+    # Library record of a track (tags are parsed only for files outside the library);
+    # the cover is extracted for the UI the first time the track plays
+    def _track_record(self, path: str) -> TrackInfo:
+        track = self._by_path.get(path) or TrackInfo(path)
+        if track.cover_key and not os.path.exists(track.cover_path):
+            extract_cover(path)
+        return track
+
+    def _announce_track(self):
+        # Callback on track change
+        if callable(self._track_change_callback):
+            try: self._track_change_callback(self.current_track.as_dict())
+            except: pass
+
+        # Shuffle cache update
+        if self._shuffle_mode and self.current_index not in self._shuffle_cache:
+            self._shuffle_cache[self.current_index] = self.current_track.path
+
+        # Play count for the PCM cache's fill job
+        self._pcm_cache.record_play(self.current_track.path, self._samplerate)
+
+    # ------------------ GAPLESS ------------------
+
+    # Index and path that play after the current track (cycle and shuffle respected)
+    def _next_entry(self):
+        if not self.playlist_playback or self.current_index < 0:
+            return None
+        if self._cycle_mode == 2:
+            index = self.current_index
+        elif self.current_index + 1 < len(self.playlist_playback):
+            index = self.current_index + 1
+        elif self._cycle_mode == 1:
+            index = 0
+        else:
+            return None
+        return index, self.playlist_playback[index]
+
+    # Wake the gapless worker: prepare (or re-prepare) the next track
+    def _schedule_prepare(self):
+        if self._gapless_thread is None:
+            self._gapless_thread = Thread(target=self._gapless_loop, daemon=True)
+            self._gapless_thread.start()
+        self._gapless_wake.set()
+
+    def _gapless_loop(self):
+        while True:
+            self._gapless_wake.wait()
+            self._gapless_wake.clear()
+            try:
+                if self._advanced:
+                    self._advanced = False
+                    self._finish_transition()
+                if self._stats.step_up_requested:
+                    self._step_up_latency()
+                self._prepare_next()
+            except Exception as e:
+                print(f"⚠️ Gapless error: {e}")
+
+    def _wanted_next(self):
+        if self._source is None or not (self.is_playing or self.is_paused):
+            return None
+        if not get_playback_settings().get("gapless", True):
+            return None
+        return self._next_entry()
+
+    def _prepare_next(self):
+        with self._lock:
+            entry = self._wanted_next()
+            prepared = self._next_source
+            if prepared is not None and entry == (self._next_index, prepared.path):
+                return
+            self._drop_next_source()
+            if entry is None:
+                return
+
+        # Opened outside the lock: "memory" mode decodes the whole file here
+        index, path = entry
+        source = self._open_source(path)
+        source.start()
+
+        with self._lock:
+            # Order or mode changed meanwhile — a new prepare is already scheduled
+            if self._wanted_next() != entry or self._next_source is not None:
+                source.close()
+                return
+            with self._handoff_lock:
+                self._next_index = index
+                self._next_source = source
+
+    # Callback side: grab the prepared source without ever blocking
+    def _take_next_source(self):
+        if not self._handoff_lock.acquire(blocking=False):
+            return None
+        try:
+            source, self._next_source = self._next_source, None
+            return source
+        finally:
+            self._handoff_lock.release()
+
+    # Reuse the prepared source when the user skips to exactly that track
+    def _claim_next_source(self, path: str):
+        with self._handoff_lock:
+            source = self._next_source
+            if source is None or source.path != path or self._next_index != self.current_index:
+                return None
+            self._next_source = None
+        return source
+
+    def _drop_next_source(self):
+        with self._handoff_lock:
+            source, self._next_source = self._next_source, None
+        if source is not None:
+            source.close()
+
+    # Book-keeping after the callback switched tracks (runs off the audio thread)
+    def _finish_transition(self):
+        with self._lock:
+            retired, self._retired_source = self._retired_source, None
+            if retired is not None:
+                retired.close()
+            path = self._source.path
+            if 0 <= self._next_index < len(self.playlist_playback) and self.playlist_playback[self._next_index] == path:
+                self.current_index = self._next_index
+            else:
+                self.current_index = self.playlist_playback.index(path) if path in self.playlist_playback else -1
+            self.current_track = self._track_record(path)
+            self._announce_track()
+
     def toggle_pause(self):
         with self._lock:
-            if not self._stream: return
+            if self._source is None: return
             self.is_paused = not self.is_paused
             self.is_playing = not self.is_paused
             if self.state_callback:
                 self.state_callback(self.is_playing)
+            self._progress_wake.set()
 
+    # Playback stops, the output stream stays open for the next track
     def stop(self):
         with self._lock:
-            if self._stream:
-                self._stream.stop()
-                self._stream.close()
-                self._stream = None
             self.is_playing = False
+            self._close_source()
+            self._drop_next_source()
             self.is_paused = False
 
     def seek(self, seconds: float) -> bool:
         with self._lock:
-            if self._audio_data is None: return False
-            target_pos = int(seconds * self._samplerate)
-            if 0 <= target_pos < len(self._audio_data):
-                self._pos = target_pos
-                return True
-            return False
+            if self._source is None: return False
+            moved = self._source.seek(int(seconds * self._samplerate))
+            self._progress_wake.set()
+            return moved
+
+    # Peak envelope of a track for the seek bar (partial while its decode runs), None if not built yet
+    def get_waveform(self, path: str) -> Optional[Dict]:
+        return self._waveforms.get(path)
+
+    # Position from the callback's snapshot; never waits for the player lock
+    def get_position(self) -> Dict:
+        snapshot = self._snapshot
+        pos = dur = 0.0
+        if snapshot is not None:
+            position, frames, rate = snapshot
+            if rate:
+                pos, dur = position / rate, frames / rate
+        return {
+            'position': float(pos),
+            'duration': float(dur),
+            'is_paused': self.is_paused,
+            'current_index': self.current_index,
+        }
 
     def get_playback_info(self) -> Dict:
-        with self._lock:
-            if self._audio_data is None:
-                return {'position': 0.0, 'duration': 0.0, 'is_paused': self.is_paused, 'current_index': self.current_index}
-            
-            pos = self._pos / self._samplerate
-            dur = len(self._audio_data) / self._samplerate
-            return {
-                'position': float(pos),
-                'duration': float(dur),
-                'is_paused': self.is_paused,
-                'current_index': self.current_index,
-            }
+        info = self.get_position()
+        info['engine'] = self._engine_info()
+        return info
+
+    # ------------------ PROGRESS UPDATES ------------------
+
+    # cb gets get_position() dicts at up to progress_hz, only when they changed
+    def set_progress_callback(self, cb: Callable[[Dict], None]):
+        self._progress_callback = cb
+        if self._progress_thread is None:
+            self._progress_thread = Thread(target=self._progress_loop, daemon=True)
+            self._progress_thread.start()
+
+    def set_progress_rate(self, hz: float):
+        self.progress_hz = max(0.5, min(float(hz or DEFAULT_PROGRESS_HZ), 60.0))
+        self._progress_wake.set()
+
+    def _progress_loop(self):
+        last = None
+        while True:
+            self._progress_wake.wait(1.0 / self.progress_hz)
+            self._progress_wake.clear()
+            info = self.get_position()
+            key = (info['position'], info['duration'], info['is_paused'], info['current_index'])
+            if key != last:
+                last = key
+                try:
+                    self._progress_callback(info)
+                except Exception as e:
+                    print(f"⚠️ Progress callback error: {e}")
+            elif not self.is_playing:
+                # Paused or idle: nothing moves until play, pause, seek or stop wake the loop
+                self._progress_wake.wait()
+                self._progress_wake.clear()
 
     def next_track(self) -> Optional[Dict]:
         with self._lock:
@@ -161,8 +529,8 @@ class Playback:
     def _on_end(self):
         if not self._auto_next_enabled: return
 
+        # The stream stays open, so the next track can follow right away
         def delayed_next():
-            time.sleep(0.2)
             if self._cycle_mode == 2:
                 self.play_track(index=self.current_index)
             elif self.current_index + 1 < len(self.playlist_playback):
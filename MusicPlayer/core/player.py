@@ -2,25 +2,55 @@
 
 # MusicPlayer core module
 
-from threading import RLock
+from threading import RLock, Lock, Event
 from typing import Optional, Callable, List, Dict
 from config import get_music_base_dir
 from core.track_info import TrackInfo
 from core.playlist import PlaylistManager
 from core.playback import Playback
+from core.play_order import PlayOrder
 from core.equalizer import Equalizer
+from core.latency import EngineStats
+from core.output import DEFAULT_OUTPUT_BACKEND
+from core.loudness import LoudnessAnalyzer
+from core.waveform import WaveformStore
+from core.seek_index import SeekIndexStore
+from core.decoded_cache import DecodedCache
+from core.pcm_cache import PcmCache
+from core.library_index import LibraryIndex
+from core.search_index import SearchIndex
+from core.facet_index import FacetIndex
+from core.database import get_sort_order, get_playback_settings
 
 class MusicPlayer(PlaylistManager, Playback):
     def __init__(self):
         self.base_dir = get_music_base_dir()
         
+        self.output_backend = DEFAULT_OUTPUT_BACKEND # "null" renders without a sound card
+        self.output_options = {}
         self._stream = None 
-        self._audio_data = None
-        self._pos = 0
+        self._source = None
+        self._samplerate = 0
+        self._latency_profile = None # None: the "latency_profile" setting
+        self._stats = EngineStats()
+        self._snapshot = None # (position, frames, samplerate), published by the audio callback
+        self._progress_callback: Optional[Callable[[Dict], None]] = None
+        self._progress_thread = None
+        self._progress_wake = Event()
+        # Gapless playback: next source prepared while the current one plays
+        self._next_source = None
+        self._next_index = -1
+        self._retired_source = None
+        self._advanced = False
+        self._handoff_lock = Lock()
+        self._gapless_wake = Event()
+        self._gapless_thread = None
         
         self.current_track: Optional[TrackInfo] = None 
-        self.playlist: List[str] = []
-        self.playlist_playback: List[str] = []
+        self.playlist: List[TrackInfo] = []
+        self.playlist_playback = PlayOrder()
+        self._playlist_order = PlayOrder()
+        self._playlist_groups = None
         self.current_index = -1
         self.is_paused = False
         self.is_playing = False
@@ -38,12 +68,31 @@ class MusicPlayer(PlaylistManager, Playback):
         self.current_folder = None
         
         self._library = []
-        self._by_author = {}
+        self._facets = FacetIndex()
         self._by_playlist = {}
+        self._by_path = {}
         self._library_ready = False 
+        self._library_watcher = None
+        self._library_change_callback: Optional[Callable[[Dict], None]] = None
+        self._index_store = LibraryIndex()
+        self._waveforms = WaveformStore()
+        self._seek_indexes = SeekIndexStore()
+        self._decoded = DecodedCache(self._decoded_cache_budget())
+        pcm_cache_bytes, pcm_format = self._pcm_cache_settings(get_playback_settings())
+        self._pcm_cache = PcmCache(max_bytes=pcm_cache_bytes, fmt=pcm_format)
+        self.set_progress_rate(get_playback_settings().get("progress_hz"))
+        self._loudness = LoudnessAnalyzer(self._store_loudness, waveforms=self._waveforms)
+        self._search_index = SearchIndex()
+        self._query_before_search = None
+        self._sorted_runs = {}
+        self.sort_order = get_sort_order()
 
         self.equalizer = Equalizer()
 
+    # Playback order or cycle mode changed — re-prepare the gapless next track
+    def _playback_order_changed(self):
+        self._schedule_prepare()
+
     def set_track_change_callback(self, cb: Callable[[Dict], None]):
         self._track_change_callback = cb
     
@@ -56,14 +105,20 @@ class MusicPlayer(PlaylistManager, Playback):
             self.current_query = None
             
             self.stop_engine()
+            self._loudness.cancel()
+            self._decoded.clear()
 
             self.current_track = None
             self.current_index = -1
             self.is_playing = False
             self.is_paused = False
             self.playlist.clear()
-            self.playlist_playback.clear()
+            self.playlist_playback = PlayOrder()
+            self._playlist_order = PlayOrder()
             self._library.clear()
-            self._by_author.clear()
+            self._facets.clear()
             self._by_playlist.clear()
+            self._by_path.clear()
+            self._search_index.clear()
+            self._sorted_runs.clear()
             self._library_ready = False
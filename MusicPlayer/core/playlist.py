@@ -1,9 +1,34 @@
 # Playlist management module (single-scan, query-based, simplified)
 
-import os
-from typing import List, Dict
+import os, sys, time
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Optional, Set, Callable, Tuple, Iterable
 from core.track_info import TrackInfo
+from core.library_index import make_row, is_fresh
+from core.watcher import LibraryWatcher, is_track_file
+from core.database import get_scan_settings, set_sort_order
+from core.sort_orders import SORT_KEYS, sort_key
 from core.modes import Modes
+from core.play_order import PlayOrder
+from core.facet_index import FACETS
+
+# Below this many files a pool costs more than it saves
+PARALLEL_SCAN_MIN_FILES = 64
+
+# Max tracks a search playlist shows
+SEARCH_LIMIT = 500
+
+# Tracks per window sent to the UI
+PAGE_SIZE = 200
+
+
+# Top-level so it can be pickled for a process pool
+def _parse_track(path: str) -> Optional[Dict]:
+    try:
+        return TrackInfo(path).as_dict()
+    except Exception:
+        return None
 
 
 class PlaylistManager(Modes):
@@ -12,12 +37,23 @@ class PlaylistManager(Modes):
     def build_library_index(self):
         """
         One-time scan. Builds in-memory index.
+        Unchanged files (same size and mtime) are restored from the
+        persistent index, the rest are parsed on a worker pool.
         """
+        started = time.perf_counter()
         self._library.clear()
         self._by_playlist.clear()
+        self._by_path.clear()
+        self._search_index.clear()
+        self._facets.clear()
+        self._sorted_runs.clear()
 
-        for root, _, files in os.walk(self.base_dir):
-            mp3s = [f for f in files if f.lower().endswith(".mp3")]
+        cached = self._index_store.load(self.base_dir)
+        entries = []
+
+        for root, dirs, files in os.walk(self.base_dir):
+            dirs.sort()
+            mp3s = sorted(f for f in files if f.lower().endswith(".mp3"))
             if not mp3s:
                 continue
 
@@ -32,17 +68,269 @@ class PlaylistManager(Modes):
             for f in mp3s:
                 path = os.path.join(root, f)
                 try:
-                    track = TrackInfo(path)
-                except Exception:
+                    entries.append((path, playlist, os.stat(path)))
+                except OSError:
                     continue
 
-                track.playlist = playlist
-                self._library.append(track)
-
-                if playlist:
-                    self._by_playlist.setdefault(playlist, []).append(track)
+        to_parse = [path for path, _, st in entries
+                    if not (path in cached and is_fresh(cached[path], st))]
+        parsed = self._parse_tracks(to_parse)
+
+        seen = set()
+        fresh_rows = []
+        for path, playlist, st in entries:
+            seen.add(path)
+            if path in parsed:
+                data = parsed[path]
+                if data is None:
+                    continue
+                data = make_row(data, st)
+                fresh_rows.append(data)
+            else:
+                data = cached[path]
+
+            self._add_track(TrackInfo.from_dict(data), playlist)
+
+        removed = [path for path in cached if path not in seen]
+        try:
+            self._index_store.update(fresh_rows, removed)
+        except Exception as e:
+            print(f"⚠️ Could not save library index: {e}")
+
+        elapsed = time.perf_counter() - started
+        self.scan_stats = {
+            'files': len(entries),
+            'parsed': len(to_parse),
+            'seconds': elapsed,
+            'files_per_sec': len(entries) / elapsed if elapsed > 0 else 0.0,
+        }
+        print(f"📚 Library indexed: {len(entries)} files ({len(to_parse)} parsed) "
+              f"in {elapsed:.2f} s — {self.scan_stats['files_per_sec']:.0f} files/s")
 
         self._library_ready = True
+        # Tracks without loudness get it in the background (waveform peaks come with it);
+        # analyzed tracks whose peaks are not cached are decoded for the peaks alone
+        self.analyze_loudness(t.path for t in self._library if t.loudness is None)
+        self._loudness.submit_peaks(t.path for t in self._library
+                                    if t.loudness is not None and not self._waveforms.has(t.path, t.added))
+
+    # Parse tags for paths on a thread/process pool, {path: dict or None}
+    def _parse_tracks(self, paths: List[str]) -> Dict[str, Optional[Dict]]:
+        settings = get_scan_settings()
+        workers = int(settings.get("workers") or 0) or min(32, (os.cpu_count() or 1) + 4)
+
+        if workers <= 1 or len(paths) < PARALLEL_SCAN_MIN_FILES:
+            return {path: _parse_track(path) for path in paths}
+
+        pool_cls = ProcessPoolExecutor if settings.get("mode") == "process" else ThreadPoolExecutor
+        chunksize = max(1, len(paths) // (workers * 8))
+        with pool_cls(max_workers=workers) as pool:
+            # map() keeps input order, so the merge stays deterministic
+            return dict(zip(paths, pool.map(_parse_track, paths, chunksize=chunksize)))
+
+    def _add_track(self, track: TrackInfo, playlist: Optional[str]):
+        track.playlist = sys.intern(playlist) if playlist else None
+        self._library.append(track)
+        self._by_path[track.path] = track
+        self._search_index.add(track)
+        self._facets.add(track)
+
+        if playlist:
+            self._by_playlist.setdefault(playlist, []).append(track)
+
+    # Top-level folder of a path inside base_dir (None for base_dir itself)
+    def _playlist_of(self, path: str) -> Optional[str]:
+        rel = os.path.relpath(os.path.dirname(path), self.base_dir)
+        return None if rel == "." else rel.split(os.sep)[0]
+
+    # ------------------ LOUDNESS ------------------
+
+    # Queue tracks for background loudness analysis (new files, downloads)
+    def analyze_loudness(self, paths: Iterable[str]):
+        self._loudness.submit(paths)
+
+    # Analyzer batches (worker thread): update the records and the persistent index
+    def _store_loudness(self, results: List[Dict]):
+        with self._lock:
+            for result in results:
+                track = self._by_path.get(result['path'])
+                if track is not None and track.added == result['mtime']:
+                    track.loudness = result['loudness']
+                    track.peak = result['peak']
+        try:
+            self._index_store.set_loudness(results)
+        except Exception as e:
+            print(f"⚠️ Could not save loudness: {e}")
+
+    def get_loudness_stats(self) -> Dict:
+        stats = dict(self._loudness.stats)
+        stats['pending'] = self._loudness.pending
+        return stats
+
+    # ------------------ LIVE UPDATES ------------------
+
+    def set_library_change_callback(self, cb: Callable[[Dict], None]):
+        self._library_change_callback = cb
+
+    def start_library_watcher(self):
+        self.stop_library_watcher()
+        self._library_watcher = LibraryWatcher(self.base_dir, self.apply_library_changes)
+        self._library_watcher.start()
+
+    def stop_library_watcher(self):
+        if self._library_watcher:
+            self._library_watcher.stop()
+            self._library_watcher = None
+
+    def apply_library_changes(self, paths: Set[str]) -> Optional[Dict]:
+        """
+        Apply added / removed / renamed / retagged files to the in-memory
+        index without a full rescan, then re-run the active query and push
+        the playlist delta to the UI.
+        """
+        with self._lock:
+            if not self._library_ready:
+                return None
+
+            # Directories (created, moved, deleted, or the whole tree after an
+            # event overflow) expand to the tracks on disk plus the known ones
+            files = set()
+            cached = {}
+            for path in paths:
+                if is_track_file(path) and not os.path.isdir(path):
+                    files.add(path)
+                    continue
+                prefix = os.path.join(path, "")
+                files.update(p for p in self._by_path if p.startswith(prefix))
+                if os.path.isdir(path):
+                    cached.update(self._index_store.load(path))
+                    for root, _, names in os.walk(path):
+                        files.update(os.path.join(root, f) for f in names if is_track_file(f))
+
+            removed = set()
+            changed = set()
+            fresh_rows = []
+            for path in sorted(files):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    if path in self._by_path:
+                        removed.add(path)
+                    continue
+
+                # Known and untouched since it was indexed — nothing to do
+                row = cached.get(path)
+                if row and path in self._by_path and is_fresh(row, st):
+                    continue
+
+                data = _parse_track(path)
+                if data is None:
+                    continue
+                row = make_row(data, st)
+                track = self._by_path.get(path)
+                # Same audio as before (only the event was repeated): keep its loudness
+                if track is not None and track.added == st.st_mtime_ns and track.loudness is not None:
+                    row['loudness'], row['peak'] = track.loudness, track.peak
+                fresh_rows.append(row)
+                changed.add(path)
+
+                if track is not None:
+                    # Retagged in place — keep the same object so every list sees it
+                    fresh = TrackInfo.from_dict(row)
+                    for key in TrackInfo.__slots__:
+                        if key not in ('path', 'playlist'):
+                            setattr(track, key, getattr(fresh, key))
+                    self._search_index.add(track)
+                    self._facets.add(track)
+                else:
+                    self._add_track(TrackInfo.from_dict(row), self._playlist_of(path))
+
+            if removed:
+                for path in removed:
+                    del self._by_path[path]
+                    self._search_index.remove(path)
+                    self._facets.remove(path)
+                self._library[:] = [t for t in self._library if t.path not in removed]
+                for name in list(self._by_playlist):
+                    kept = [t for t in self._by_playlist[name] if t.path not in removed]
+                    if kept:
+                        self._by_playlist[name] = kept
+                    else:
+                        del self._by_playlist[name]
+
+            try:
+                self._index_store.update(fresh_rows, removed)
+            except Exception as e:
+                print(f"⚠️ Could not save library index: {e}")
+
+            if not changed and not removed:
+                return None
+            self.analyze_loudness(p for p in changed if self._by_path[p].loudness is None)
+
+            # Ranks shift with any change — orders are rebuilt lazily on the next query
+            self._sorted_runs.clear()
+
+            queue, index = self.playlist_playback, self.current_index
+            follows_shown = queue is self._playlist_order
+            delta = self._requery_delta(changed, removed)
+            self._update_queue(queue, index, follows_shown, removed)
+            self._playback_order_changed()
+
+        if delta and callable(self._library_change_callback):
+            try: self._library_change_callback(delta)
+            except Exception as e: print(f"⚠️ Library change callback error: {e}")
+        return delta
+
+    # Re-run only the active query and describe how the visible list changed
+    def _requery_delta(self, changed: Set[str], removed: Set[str]) -> Optional[Dict]:
+        if not self.current_query:
+            return None
+
+        old_paths = {t.path for t in self.playlist}
+        tracks = self._run_query()
+        new_paths = {t.path for t in tracks}
+
+        added, updated = [], []
+        for i, t in enumerate(tracks):
+            if t.path not in changed:
+                continue
+            item = t.as_dict()
+            if t.path in old_paths:
+                updated.append(item)
+            else:
+                # Neighbours let the UI insert the row without re-rendering the list
+                item['after'] = tracks[i - 1].path if i > 0 else None
+                item['before'] = tracks[i + 1].path if i + 1 < len(tracks) else None
+                added.append(item)
+        gone = sorted((old_paths - new_paths) | (removed & old_paths))
+
+        if not (added or updated or gone):
+            return None
+        return {"added": added, "removed": gone, "updated": updated}
+
+    # The library changed under the play queue: a queue in the shown order follows the
+    # re-run query, any other queue drops deleted files (never handed to the engine).
+    # current_index points into the queue again; when the current track is gone,
+    # the track that came after it plays next.
+    def _update_queue(self, queue: PlayOrder, index: int, follows_shown: bool, removed: Set[str]):
+        if follows_shown:
+            self.playlist_playback = self._playlist_order
+        elif removed and queue:
+            self.playlist_playback = queue.without(removed)
+        new_queue = self.playlist_playback
+
+        current_path = self.current_track.path if self.current_track else None
+        if current_path in new_queue:
+            self.current_index = new_queue.index(current_path)
+            return
+        if index < 0:
+            self.current_index = -1
+            return
+        for i in range(index + 1, len(queue)):
+            if queue[i] in new_queue:
+                self.current_index = new_queue.index(queue[i]) - 1
+                return
+        self.current_index = len(new_queue) - 1
 
     # ------------------ PUBLIC API ------------------
 
@@ -80,28 +368,196 @@ class PlaylistManager(Modes):
         }
         return self._apply_query()
 
+    def set_sort_order(self, order: str) -> List[Dict]:
+        if order not in SORT_KEYS:
+            raise ValueError(f"Unknown sort order: {order}")
+        with self._lock:
+            self.sort_order = order
+            set_sort_order(order)
+            return self._apply_query()
+
+    # Search the whole library; an empty text restores the list shown before
+    def set_search_playlist(self, text: str) -> List[Dict]:
+        with self._lock:
+            self._set_search_query(text)
+            return self._apply_query()
+
+    def _set_search_query(self, text: str):
+        text = (text or "").strip()
+        searching = bool(self.current_query) and self.current_query["type"] == "search"
+
+        if not text:
+            if searching:
+                self.current_query = self._query_before_search
+            return
+
+        if not searching:
+            self._query_before_search = self.current_query
+        self.current_query = {
+            "type": "search",
+            "value": text,
+        }
+
+    # Ranked paths (track ids) matching text across the whole library
+    def search_library(self, text: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        with self._lock:
+            if not self._library_ready:
+                self.build_library_index()
+            return self._search_index.search(text, limit)
+
     def get_playlist_dicts(self) -> List[Dict]:
         with self._lock:
             return [t.as_dict() for t in self.playlist]
 
-    # ------------------ CORE QUERY PIPELINE ------------------
+    # ------------------ BROWSE ------------------
 
-    def _apply_query(self) -> List[Dict]:
+    # Artists with track count and total duration: [{"name", "count", "duration"}]
+    def get_artists(self) -> List[Dict]:
         with self._lock:
             if not self._library_ready:
                 self.build_library_index()
+            return self._facets.values("artist")
+
+    # Albums (optionally only those of one artist) with count and duration
+    def get_albums(self, artist: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            if not self._library_ready:
+                self.build_library_index()
+            if artist:
+                return self._facets.values_within("album", "artist", artist)
+            return self._facets.values("album")
+
+    # ------------------ WINDOWED API ------------------
+
+    def select_playlist(self, query: Dict, limit: int = PAGE_SIZE) -> Dict:
+        """
+        Make query ({"type": "global" | "playlist" | "custom" | "search" |
+        "artist" | "album" | "facets", "value": ...}) the active playlist and return only its first window
+        plus the album groups, instead of serializing every track.
+        """
+        with self._lock:
+            if query.get("type") == "search":
+                self._set_search_query(query.get("value", ""))
+            else:
+                self.current_query = dict(query)
+            self._refresh_query()
+            return self.get_playlist_window(0, limit, with_groups=True)
 
-            tracks = self._resolve_query(self.current_query)
-            
-            tracks.sort(key=lambda t: (
-                (t.album if t.album and t.album.strip() else "ZZZZZ"), 
-                (t.title if t.title else "")
-            ))
+    # Re-sort the active playlist with a new order and return its first window
+    def select_sort_order(self, order: str, limit: int = PAGE_SIZE) -> Dict:
+        with self._lock:
+            self.set_sort_order(order)
+            return self.get_playlist_window(0, limit, with_groups=True)
 
-            self.playlist = tracks
-            self.current_index = self._sync_current_index(tracks)
+    def get_playlist_window(self, offset: int, limit: int = PAGE_SIZE, with_groups: bool = False) -> Dict:
+        with self._lock:
+            offset = max(0, offset)
+            window = {
+                "total": len(self.playlist),
+                "offset": offset,
+                "current_index": self.current_index,
+                "tracks": [t.as_dict() for t in self.playlist[offset:offset + max(0, limit)]],
+            }
+            if with_groups:
+                window["groups"] = self.get_playlist_groups()
+            return window
+
+    # Window that starts at a given track id (path); empty if it is not in the playlist
+    def get_playlist_window_from(self, path: str, limit: int = PAGE_SIZE) -> Dict:
+        with self._lock:
+            if path not in self._playlist_order:
+                return {"total": len(self.playlist), "offset": -1, "current_index": self.current_index, "tracks": []}
+            return self.get_playlist_window(self._playlist_order.index(path), limit)
 
-            return [t.as_dict() for t in tracks]
+    # Album boundaries of the active playlist: [{"index", "album", "count"}]
+    # (only when sorted by album — other orders are not grouped)
+    def get_playlist_groups(self) -> List[Dict]:
+        with self._lock:
+            if self._playlist_groups is None:
+                groups = []
+                if self.sort_order == "album":
+                    for i, t in enumerate(self.playlist):
+                        album = t.album or "Unknown Album"
+                        if not groups or groups[-1]["album"] != album:
+                            groups.append({"index": i, "album": album, "count": 0})
+                        groups[-1]["count"] += 1
+                self._playlist_groups = groups
+            return self._playlist_groups
+
+    # ------------------ CORE QUERY PIPELINE ------------------
+
+    def _apply_query(self) -> List[Dict]:
+        with self._lock:
+            return [t.as_dict() for t in self._refresh_query()]
+
+    def _refresh_query(self) -> List[TrackInfo]:
+        if not self._library_ready:
+            self.build_library_index()
+        return self._run_query()
+
+    # Resolve + sort the current query and make it the active playlist
+    def _run_query(self) -> List[TrackInfo]:
+        query = self.current_query
+        ranks = self._query_ranks(query)
+
+        if ranks is not None:
+            # Folder queries: merge of presorted rank runs, no re-sort by key
+            ordered = self._sorted_library()[0]
+            if isinstance(ranks, range):
+                tracks = ordered[ranks.start:ranks.stop]
+            else:
+                tracks = [ordered[r] for r in ranks]
+        else:
+            tracks = self._resolve_query(query)
+            # Search results keep their relevance order
+            if query and query["type"] != "search":
+                tracks.sort(key=sort_key(self.sort_order))
+
+        self.playlist = tracks
+        self._playlist_order = PlayOrder(t.path for t in tracks)
+        self._playlist_groups = None
+        self.current_index = self._sync_current_index()
+        return tracks
+
+    # Positions in the sorted library answering a folder-based query
+    # (None for queries that are not made of folders)
+    def _query_ranks(self, query: Dict) -> Optional[List[int]]:
+        if not query or not self._library_ready:
+            return None
+
+        qtype = query["type"]
+
+        if qtype == "global":
+            return range(len(self._sorted_library()[0]))
+
+        if qtype == "playlist":
+            return self._sorted_run(query["value"])
+
+        if qtype == "custom":
+            runs = [self._sorted_run(pl) for pl in dict.fromkeys(query["value"])]
+            if len(runs) == 1:
+                return runs[0]
+            # k-way merge: timsort detects the presorted runs and only merges them
+            return sorted(chain.from_iterable(runs))
+
+        return None
+
+    # Whole library in the current order + rank of every path, built once per order
+    def _sorted_library(self) -> Tuple[List[TrackInfo], Dict[str, int], Dict[str, List[int]]]:
+        cached = self._sorted_runs.get(self.sort_order)
+        if cached is None:
+            ordered = sorted(self._library, key=sort_key(self.sort_order))
+            ranks = {t.path: i for i, t in enumerate(ordered)}
+            cached = self._sorted_runs[self.sort_order] = (ordered, ranks, {})
+        return cached
+
+    # Sorted ranks of one folder's tracks, cached per order
+    def _sorted_run(self, folder: str) -> List[int]:
+        _, ranks, runs = self._sorted_library()
+        run = runs.get(folder)
+        if run is None:
+            run = runs[folder] = sorted(ranks[t.path] for t in self._by_playlist.get(folder, []))
+        return run
 
     def _resolve_query(self, query: Dict) -> List[TrackInfo]:
         if not query or not self._library_ready:
@@ -121,13 +577,24 @@ class PlaylistManager(Modes):
                 result.extend(self._by_playlist.get(pl, []))
             return result
 
+        if qtype == "search":
+            paths = self._search_index.search(query["value"], SEARCH_LIMIT)
+            return [self._by_path[p] for p in paths]
+
+        # Facets: {"type": "artist" | "album", "value": name}
+        # or {"type": "facets", "value": {"artist": name, "album": name}}
+        if qtype in FACETS:
+            facet = self._facets.get(qtype, query["value"])
+            return list(facet.tracks.values()) if facet else []
+
+        if qtype == "facets":
+            return self._facets.intersect(query["value"])
+
         return []
 
     # ------------------ HELPERS ------------------
 
-    def _sync_current_index(self, playlist: List[TrackInfo]) -> int:
-        if self.current_track:
-            for i, t in enumerate(playlist):
-                if t.path == self.current_track.path:
-                    return i
+    def _sync_current_index(self) -> int:
+        if self.current_track and self.current_track.path in self._playlist_order:
+            return self._playlist_order.index(self.current_track.path)
         return -1
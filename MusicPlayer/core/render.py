@@ -0,0 +1,155 @@
+# render.py
+
+# Offline render: bake the equalizer and volume into audio files
+# Each file is decoded in large blocks, run through an Equalizer restored from
+# a saved state (the playback chain, process_into) and written block by block,
+# so memory stays flat whatever the length (see read_blocks in
+# core/audio_source.py). Files are spread over a process pool; the report
+# gives the throughput in multiples of real time.
+# CLI: python -m core.render OUTPUT_DIR FILE_OR_FOLDER... [--format FLAC]
+#      [--volume 100] [--workers N] [--flat]
+# (or MusicPlayer --render ... for the packaged app)
+
+import os, sys, time, argparse
+import numpy as np
+import soundfile as sf
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+from mutagen.id3 import ID3
+from core.equalizer import Equalizer
+from core.database import get_equalizer_settings
+from core.audio_source import read_blocks
+
+RENDER_BLOCK_FRAMES = 65536
+RENDER_WORKERS = os.cpu_count() or 1
+AUDIO_EXTENSIONS = ('.mp3', '.flac', '.wav', '.ogg', '.aiff')
+
+
+# Files as given, folders expanded to the audio files inside them
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(AUDIO_EXTENSIONS))
+        elif os.path.isfile(item):
+            paths.append(item)
+    return paths
+
+
+# Output file for a source: same name, extension of the output format
+def output_path(src: str, out_dir: str, fmt: Optional[str]) -> str:
+    base, ext = os.path.splitext(os.path.basename(src))
+    return os.path.join(out_dir, base + (f".{fmt.lower()}" if fmt else ext))
+
+
+# One file through the chain; runs in a pool worker
+def render_file(src: str, dst: str, eq_state: Dict, volume: int = 100,
+                fmt: Optional[str] = None, block_frames: int = RENDER_BLOCK_FRAMES) -> Dict:
+    started = time.perf_counter()
+    eq = Equalizer()
+    eq.set_all(eq_state)
+    eq.set_volume(volume)
+    eq.settle()
+
+    with sf.SoundFile(src) as fin:
+        samplerate, channels = fin.samplerate, fin.channels
+        eq.set_format(samplerate, channels)
+        fmt = (fmt or fin.format).upper()
+        subtype = fin.subtype if fmt == fin.format else None
+        block = np.zeros((block_frames, channels), dtype=np.float32)
+        delay = eq.latency # convolution modes delay the output by one partition
+        frames = 0
+        with sf.SoundFile(dst, 'w', samplerate, channels, format=fmt, subtype=subtype) as fout:
+            def write(buf):
+                np.clip(buf, -1.0, 1.0, out=buf)
+                fout.write(buf)
+
+            for buf in read_blocks(fin, block_frames, out=block):
+                n = len(buf)
+                eq.process_into(buf, samplerate)
+                frames += n
+                skip = min(delay, n)
+                delay -= skip
+                write(buf[skip:])
+
+            # Push the delayed tail out with silence
+            if eq.latency:
+                tail = np.zeros((eq.latency, channels), dtype=np.float32)
+                eq.process_into(tail, samplerate)
+                write(tail[delay:])
+
+    if fmt == 'MP3':
+        copy_tags(src, dst)
+    return {'path': src, 'output': dst, 'seconds': frames / samplerate,
+            'elapsed': time.perf_counter() - started}
+
+
+# Keep title/artist/album/cover on rendered MP3s
+def copy_tags(src: str, dst: str):
+    try:
+        ID3(src).save(dst)
+    except Exception:
+        pass
+
+
+def render_files(paths: List[str], out_dir: str, eq_state: Dict, volume: int = 100,
+                 fmt: Optional[str] = None, workers: int = RENDER_WORKERS,
+                 progress: Optional[Callable[[int, int, str], None]] = None) -> Dict:
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, min(workers, len(paths)))
+    started = time.perf_counter()
+    results, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_file, src, output_path(src, out_dir, fmt), eq_state, volume, fmt): src
+                   for src in paths}
+        for future in as_completed(futures):
+            src = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Render failed ({os.path.basename(src)}): {e}")
+                failed.append(src)
+            if progress is not None:
+                progress(len(results) + len(failed), len(paths), src)
+
+    elapsed = time.perf_counter() - started
+    seconds = sum(r['seconds'] for r in results)
+    return {
+        'rendered': len(results),
+        'failed': len(failed),
+        'seconds': seconds,
+        'elapsed': elapsed,
+        'realtime': seconds / elapsed if elapsed > 0 else 0.0,
+        'workers': workers,
+        'output': out_dir,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="render", description="Render audio files through the equalizer and volume.")
+    parser.add_argument("output", help="folder for the rendered files")
+    parser.add_argument("inputs", nargs="+", help="audio files or folders")
+    parser.add_argument("--format", help="output format: WAV, FLAC, OGG, MP3 (default: same as the input)")
+    parser.add_argument("--volume", type=int, default=100, help="volume in percent (default: 100)")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="processes (default: one per CPU)")
+    parser.add_argument("--flat", action="store_true", help="ignore the saved equalizer settings")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("⚠️ No audio files found")
+        return 1
+    state = {} if args.flat else get_equalizer_settings()
+
+    def progress(done, total, path):
+        print(f"🎛️ {done}/{total} {os.path.basename(path)}")
+
+    report = render_files(paths, args.output, state, args.volume, args.format, args.workers, progress)
+    print(f"✅ {report['rendered']} files ({report['seconds'] / 60:.1f} min of audio) in {report['elapsed']:.1f} s "
+          f"— {report['realtime']:.0f}x realtime on {report['workers']} workers")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# resampler.py
+
+# Streaming polyphase resampler
+# Same Kaiser-windowed FIR and alignment as scipy.signal.resample_poly, but fed
+# block by block: the filter history is kept between calls, so a decoder can
+# convert a track to the device rate while it streams (e.g. 48 kHz -> 44.1 kHz).
+
+from math import gcd
+import numpy as np
+from scipy.signal import firwin, resample_poly
+
+KAISER_BETA = 5.0
+HALF_LEN_PER_RATE = 10 # filter half length per unit of max(up, down)
+
+
+def resample_whole(data: np.ndarray, in_rate: int, out_rate: int) -> np.ndarray:
+    if in_rate == out_rate:
+        return data
+    g = gcd(in_rate, out_rate)
+    return resample_poly(data, out_rate // g, in_rate // g, axis=0).astype(np.float32)
+
+
+class PolyphaseResampler:
+    def __init__(self, in_rate: int, out_rate: int, channels: int):
+        g = gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+
+        max_rate = max(self.up, self.down)
+        half_len = HALF_LEN_PER_RATE * max_rate
+        h = firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', KAISER_BETA)) * self.up
+
+        # Pre-pad so the filter delay is a whole number of output samples
+        pre_pad = (self.down - half_len % self.down) % self.down
+        taps = (len(h) + pre_pad + self.up - 1) // self.up
+        padded = np.zeros(taps * self.up)
+        padded[pre_pad:pre_pad + len(h)] = h
+        # bank[phase, j] = h[phase + j * up]; taps reversed against the input window
+        self._bank = padded.reshape(taps, self.up).T.astype(np.float32)
+        self._taps = taps
+        self._delay = (half_len + pre_pad) // self.down
+        self._offsets = np.arange(taps)
+        self.channels = channels
+        self.reset()
+
+    # Forget all history (track start or seek)
+    def reset(self):
+        self._history = np.zeros((self._taps - 1, self.channels), dtype=np.float32)
+        self._in_count = 0 # input frames consumed
+        self._next_k = self._delay # next output sample to compute (before delay removal)
+        self._emitted = 0
+
+    def output_length(self, in_frames: int) -> int:
+        return -(-in_frames * self.up // self.down)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        x = np.concatenate((self._history, block)) if len(block) else self._history
+        in_count = self._in_count + len(block)
+
+        last_k = (in_count * self.up - 1) // self.down
+        ks = np.arange(self._next_k, last_k + 1)
+        if len(ks):
+            n0 = ks * self.down // self.up
+            phase = ks * self.down % self.up
+            # Position of x[n0] inside the history + block buffer
+            idx = (n0 - self._in_count + self._taps - 1)[:, None] - self._offsets[None, :]
+            out = np.einsum('kt,ktc->kc', self._bank[phase], x[idx]).astype(np.float32)
+            self._next_k = last_k + 1
+        else:
+            out = np.zeros((0, self.channels), dtype=np.float32)
+
+        self._history = x[len(x) - (self._taps - 1):]
+        self._in_count = in_count
+        self._emitted += len(out)
+        return out
+
+    # End of input: push the filter tail out, trimmed to the exact output length
+    def flush(self) -> np.ndarray:
+        remaining = self.output_length(self._in_count) - self._emitted
+        tail = self.process(np.zeros((self._taps, self.channels), dtype=np.float32))
+        return tail[:max(0, remaining)]
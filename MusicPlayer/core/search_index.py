@@ -0,0 +1,105 @@
+# search_index.py
+
+# In-memory full-text index over title, artist and album
+# Text is case- and diacritic-folded (works for Latin and Cyrillic alike),
+# every query term matches whole tokens or token prefixes, all terms must match.
+
+import re, heapq
+from bisect import bisect_left
+from typing import Dict, Iterable, List
+from core.utils import fold
+
+# Field weights: a hit in the title ranks above the same hit in the album
+FIELD_WEIGHTS = (('title', 3), ('artist', 2), ('album', 1))
+EXACT_BONUS = 2 # whole-token match beats a prefix match
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(fold(text)) if text else []
+
+
+class SearchIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {} # token -> {path: weight}
+        self._doc_tokens: Dict[str, List[str]] = {} # path -> its tokens (for removal)
+        self._sorted_tokens: List[str] = []
+        self._dirty = False
+
+    def clear(self):
+        self._postings.clear()
+        self._doc_tokens.clear()
+        self._sorted_tokens = []
+        self._dirty = False
+
+    def rebuild(self, tracks: Iterable):
+        self.clear()
+        for track in tracks:
+            self.add(track)
+
+    def add(self, track):
+        if track.path in self._doc_tokens:
+            self.remove(track.path)
+
+        weights: Dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(getattr(track, field) or ''):
+                if weights.get(token, 0) < weight:
+                    weights[token] = weight
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._dirty = True
+            postings[track.path] = weight
+        self._doc_tokens[track.path] = list(weights)
+
+    def remove(self, path: str):
+        for token in self._doc_tokens.pop(path, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(path, None)
+            if not postings:
+                del self._postings[token]
+                self._dirty = True
+
+    # All indexed tokens starting with prefix (sorted list + bisect)
+    def _expand(self, prefix: str) -> Iterable[str]:
+        if self._dirty:
+            self._sorted_tokens = sorted(self._postings)
+            self._dirty = False
+        tokens = self._sorted_tokens
+        i = bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            yield tokens[i]
+            i += 1
+
+    # Ranked track paths (best first) matching every term of the query
+    def search(self, query: str, limit: int = 200) -> List[str]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        # Rarest-looking (longest) terms first shrink the candidate set fastest
+        for term in sorted(set(terms), key=len, reverse=True):
+            term_scores: Dict[str, int] = {}
+            for token in self._expand(term):
+                bonus = EXACT_BONUS if token == term else 1
+                for path, weight in self._postings[token].items():
+                    score = weight * bonus
+                    if score > term_scores.get(path, 0):
+                        term_scores[path] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {path: s + term_scores[path] for path, s in scores.items() if path in term_scores}
+            if not scores:
+                return []
+
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [path for path, _ in ranked]
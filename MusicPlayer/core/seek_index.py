@@ -0,0 +1,299 @@
+# seek_index.py
+
+# Seek index for MPEG audio (MP3) streams
+# libsndfile seeks an MP3 by walking frame headers from the furthest point its
+# decoder has seen, and every new decoder starts from scratch, so a jump into
+# a long mix reads the whole file up to the target. The index records the byte
+# offset of every CHECKPOINT_FRAMES-th audio frame, found by walking the frame
+# headers once (no decoding). A seek then opens a decoder on the byte stream at
+# the checkpoint a few frames before the target and drops the samples up to it:
+# constant time wherever the target is, and sample-exact. Indexes are cached
+# per file (path and mtime) as a small binary file of uint32 offsets.
+
+import os, struct
+import numpy as np
+import soundfile as sf
+from typing import Callable, Optional, Tuple
+from core.database import SEEK_INDEX_DIR
+from core.utils import track_cache_name
+
+CHECKPOINT_FRAMES = 8 # ~0.2 s between checkpoints at 44.1 kHz
+WARMUP_FRAMES = 3 # decoded and dropped before the target (bit reservoir, overlap)
+RESERVOIR_BYTES = 511 # main data may start this far back in earlier frames
+DECODER_DELAY = 529 # samples the decoder adds in front (removed with the encoder delay)
+SCAN_STEP_BYTES = 1 << 20 # read per scan step
+RESYNC_BYTES = 1 << 16 # junk skipped looking for the next frame before giving up
+VIEW_LENGTH = 1 << 40 # length a ByteRange reports (see ByteRange)
+
+# Bitrates (kbps) for MPEG-1 / MPEG-2 and 2.5, Layer III
+BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLERATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+# magic, version, samples per frame, delay, checkpoint frames, audio frames, checkpoints
+HEADER = struct.Struct('<4sHIIIQI')
+MAGIC = b'SKIX'
+VERSION = 1
+
+
+# (frame length in bytes, samples per frame, samplerate) of a Layer III header, None if invalid
+def parse_header(data: bytes, pos: int) -> Optional[Tuple[int, int, int]]:
+    if pos + 4 > len(data):
+        return None
+    h = int.from_bytes(data[pos:pos + 4], 'big')
+    version, layer = (h >> 19) & 3, (h >> 17) & 3
+    bitrate_index, rate_index = (h >> 12) & 15, (h >> 10) & 3
+    if h >> 21 != 0x7FF or version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    samplerate = SAMPLERATES[version][rate_index]
+    samples = 1152 if mpeg1 else 576
+    length = samples // 8 * bitrate // samplerate + ((h >> 9) & 1)
+    return length, samples, samplerate
+
+
+# Encoder delay from a Xing/Info frame's LAME tag; None if the frame is not a Xing/Info frame
+def xing_delay(frame: bytes) -> Optional[int]:
+    pos = max(frame.find(b'Xing'), frame.find(b'Info'))
+    if pos < 0 or pos > 40:
+        return None
+    flags = int.from_bytes(frame[pos + 4:pos + 8], 'big')
+    tag = pos + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    if len(frame) < tag + 24:
+        return 0
+    delay = frame[tag + 21:tag + 24]
+    return (delay[0] << 4) | (delay[1] >> 4)
+
+
+class ByteRange:
+    """
+    Read-only view of a file from a byte offset on (what the decoder sees after
+    an indexed seek). Its length reads as VIEW_LENGTH: libsndfile stops at a
+    frame count guessed from the length and the first frame's bitrate, which
+    cuts a VBR stream short, and for an unknown length (0) it scans the whole
+    stream on open. Reads still end at the end of the file.
+    """
+    def __init__(self, path: str, start: int):
+        self._fh = open(path, 'rb')
+        self._start = start
+        self._fh.seek(start)
+        self._length_query = False
+
+    def read(self, size: int = -1) -> bytes:
+        return self._fh.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        # pysoundfile asks the length as seek(0, SEEK_END) then tell()
+        self._length_query = whence == os.SEEK_END and offset == 0
+        if whence == os.SEEK_SET:
+            self._fh.seek(self._start + offset)
+        else:
+            self._fh.seek(offset, whence)
+        return self.tell()
+
+    def tell(self) -> int:
+        if self._length_query:
+            return VIEW_LENGTH
+        return self._fh.tell() - self._start
+
+    def close(self):
+        self._fh.close()
+
+
+class SeekIndex:
+    def __init__(self, offsets: np.ndarray, samples_per_frame: int, delay: int, frames: int):
+        self.offsets = offsets # byte offset of audio frame i * CHECKPOINT_FRAMES
+        self.samples_per_frame = samples_per_frame
+        self.delay = delay # decoded samples in front of track sample 0
+        self.frames = frames # audio frames in the file
+
+    # Decoder positioned before track sample `frame`: (SoundFile, byte view, samples to drop)
+    def open_at(self, path: str, frame: int) -> Tuple[sf.SoundFile, ByteRange, int]:
+        spf = self.samples_per_frame
+        target = frame + self.delay
+        first = max(0, target // spf - WARMUP_FRAMES)
+        checkpoint = min(first // CHECKPOINT_FRAMES, len(self.offsets) - 1)
+        # Low bitrates: step back until the bit reservoir is covered too
+        limit = int(self.offsets[min(target // spf // CHECKPOINT_FRAMES, len(self.offsets) - 1)]) - RESERVOIR_BYTES
+        while checkpoint > 0 and self.offsets[checkpoint] > limit:
+            checkpoint -= 1
+        view = ByteRange(path, int(self.offsets[checkpoint]))
+        try:
+            handle = sf.SoundFile(view)
+        except Exception:
+            view.close()
+            raise
+        return handle, view, target - checkpoint * CHECKPOINT_FRAMES * spf
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes
+
+
+class IndexScanner:
+    """
+    Walks the frame headers of one file a step at a time, so the decoder
+    thread can build the index in its idle time. on_done gets the finished
+    SeekIndex, or None when the file is not a walkable Layer III stream.
+    """
+    def __init__(self, path: str, on_done: Optional[Callable[[Optional[SeekIndex]], None]] = None):
+        self.path = path
+        self._fh = open(path, 'rb')
+        self._buf = b''
+        self._base = 0 # file offset of _buf[0]
+        self._pos = 0 # next frame header, relative to _buf
+        self._eof = False
+        self._checkpoints = []
+        self._frames = 0
+        self._samples = 0
+        self._delay = None # unknown until the first frame is seen
+        self._on_done = on_done
+        self.done = False
+        self.index: Optional[SeekIndex] = None
+
+    # Scan the next chunk; True once finished
+    def step(self, budget: int = SCAN_STEP_BYTES) -> bool:
+        if self.done:
+            return True
+        try:
+            self._scan(budget)
+        except Exception as e:
+            print(f"⚠️ Seek index error ({os.path.basename(self.path)}): {e}")
+            self._finish(False)
+        return self.done
+
+    def _scan(self, budget: int):
+        chunk = b'' if self._eof else self._fh.read(budget)
+        self._eof = len(chunk) < budget
+        self._buf = self._buf[self._pos:] + chunk
+        self._base += self._pos
+        self._pos = 0
+        if self._delay is None and not self._start():
+            return
+
+        data, pos, end = self._buf, self._pos, len(self._buf)
+        checkpoints, frames = self._checkpoints, self._frames
+        resynced = False
+        while True:
+            header = parse_header(data, pos)
+            if header is None:
+                if pos + 4 > end:
+                    break
+                # Junk between frames (or a trailing tag): look for the next sync
+                skip = data.find(b'\xff', pos + 1, pos + RESYNC_BYTES)
+                if skip < 0:
+                    if end - pos >= RESYNC_BYTES:
+                        self._finish(False)
+                        return
+                    break
+                pos, resynced = skip, True
+                continue
+            length, samples, _ = header
+            if pos + length + 4 > end and not self._eof:
+                break
+            # A sync found in junk must be followed by another frame
+            if resynced and pos + length < end and parse_header(data, pos + length) is None:
+                pos += 1
+                continue
+            if samples != self._samples:
+                self._finish(False)
+                return
+            if frames % CHECKPOINT_FRAMES == 0:
+                checkpoints.append(self._base + pos)
+            frames += 1
+            pos += length
+            resynced = False
+        self._pos, self._frames = pos, frames
+        if self._eof:
+            self._finish(frames > 0)
+
+    # First frame: skip an ID3v2 tag, read the delay from a Xing/Info frame
+    def _start(self) -> bool:
+        data = self._buf
+        if data[:3] == b'ID3' and len(data) >= 10:
+            size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+            self._fh.seek(10 + size)
+            self._buf, self._base = b'', 10 + size
+            data = self._buf = self._fh.read(SCAN_STEP_BYTES)
+        header = parse_header(data, 0)
+        if header is None:
+            self._finish(False)
+            return False
+        length, self._samples, _ = header
+        delay = xing_delay(data[:length])
+        if delay is None:
+            self._delay = 0 # no gapless info: nothing is trimmed from the decode
+        else:
+            self._delay = delay + DECODER_DELAY
+            self._pos = length # the Xing frame holds no audio
+        return True
+
+    def _finish(self, ok: bool):
+        self._fh.close()
+        self._buf = b''
+        self.done = True
+        if ok and self._checkpoints and self._checkpoints[-1] < 1 << 32:
+            self.index = SeekIndex(np.array(self._checkpoints, dtype=np.uint32), self._samples,
+                                   self._delay, self._frames)
+        if self._on_done is not None:
+            self._on_done(self.index)
+
+    def abandon(self):
+        if not self.done:
+            self._fh.close()
+            self.done = True
+
+
+class SeekIndexStore:
+    """Persistent seek indexes, one binary file per track."""
+    def __init__(self, cache_dir: str = SEEK_INDEX_DIR):
+        self.cache_dir = cache_dir
+
+    def cache_file(self, path: str, mtime: int) -> str:
+        return os.path.join(self.cache_dir, track_cache_name(path, mtime, ".skix"))
+
+    def load(self, path: str) -> Optional[SeekIndex]:
+        try:
+            with open(self.cache_file(path, os.stat(path).st_mtime_ns), 'rb') as fh:
+                magic, version, spf, delay, step, frames, count = HEADER.unpack(fh.read(HEADER.size))
+                offsets = np.frombuffer(fh.read(count * 4), dtype=np.uint32)
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or version != VERSION or step != CHECKPOINT_FRAMES or len(offsets) != count:
+            return None
+        return SeekIndex(offsets, spf, delay, frames)
+
+    # Scanner that saves the index once it is built
+    def scanner(self, path: str) -> Optional[IndexScanner]:
+        try:
+            target = self.cache_file(path, os.stat(path).st_mtime_ns)
+            return IndexScanner(path, on_done=lambda index: index is not None and self._save(target, index))
+        except OSError:
+            return None
+
+    # Build (or load) an index right away, e.g. for a seek that cannot wait
+    def build(self, path: str) -> Optional[SeekIndex]:
+        index = self.load(path)
+        if index is None:
+            scanner = self.scanner(path)
+            if scanner is not None:
+                while not scanner.step():
+                    pass
+                index = scanner.index
+        return index
+
+    def _save(self, target: str, index: SeekIndex):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp name first so a half-written index is never read
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as fh:
+                fh.write(HEADER.pack(MAGIC, VERSION, index.samples_per_frame, index.delay,
+                                     CHECKPOINT_FRAMES, index.frames, len(index.offsets)))
+                fh.write(index.offsets.tobytes())
+            os.replace(tmp_path, target)
+        except OSError as e:
+            print(f"⚠️ Could not cache seek index: {e}")
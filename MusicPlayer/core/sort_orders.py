@@ -0,0 +1,23 @@
+# sort_orders.py
+
+# Playlist sort orders
+# Keys are built from the folded fields precomputed on every TrackInfo,
+# the path at the end keeps the order total (merges give the same result as a sort)
+
+from typing import Callable, Dict
+
+DEFAULT_SORT_ORDER = "album"
+
+SORT_KEYS: Dict[str, Callable] = {
+    # Album, then title; tracks without an album go last
+    "album": lambda t: (t.album_key is None, t.album_key or "", t.title_key, t.path),
+    "title": lambda t: (t.title_key, t.artist_key, t.path),
+    "artist": lambda t: (t.artist_key, t.album_key is None, t.album_key or "", t.title_key, t.path),
+    # Recently added first (file mtime)
+    "added": lambda t: (-t.added, t.title_key, t.path),
+    "duration": lambda t: (t.duration, t.title_key, t.path),
+}
+
+
+def sort_key(order: str) -> Callable:
+    return SORT_KEYS.get(order, SORT_KEYS[DEFAULT_SORT_ORDER])
@@ -3,26 +3,79 @@
 # Core module to read track metadata using mutagen
 # There is only TrackInfo class here
 
-import os
+import os, sys
 from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC
+from mutagen.id3 import ID3
 from typing import Optional, Dict
+from core.cover_cache import find_apic, cover_key, cover_file
+from core.utils import fold
+
+# Repeated values (artist, album, cover, folder) share one string object
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
 
 # Helper class to read metadata from an MP3 file
+# __slots__ keeps each record small: a library holds one per file
 class TrackInfo:
+    __slots__ = ('path', 'title', 'artist', 'album', 'cover_key', 'playlist',
+                 'duration', 'added', 'title_key', 'artist_key', 'album_key',
+                 'loudness', 'peak')
+
     def __init__(self, path: str):
         self.path = path
         self.title = None
         self.artist = None
         self.album = None
-        self.cover_path: Optional[str] = None
+        self.cover_key: Optional[str] = None
+        self.playlist: Optional[str] = None
+        self.duration = 0.0
+        self.loudness: Optional[float] = None # integrated LUFS, None until analyzed
+        self.peak: Optional[float] = None
+        try:
+            self.added = os.stat(path).st_mtime_ns
+        except OSError:
+            self.added = 0
         self._read_metadata()
+        self.artist = _intern(self.artist)
+        self.album = _intern(self.album)
+        self.cover_key = _intern(self.cover_key)
+        self._compute_sort_keys()
+
+    # Restore a TrackInfo from cached metadata without parsing the file
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TrackInfo':
+        track = cls.__new__(cls)
+        track.path = data['path']
+        track.title = data.get('title')
+        track.artist = _intern(data.get('artist'))
+        track.album = _intern(data.get('album'))
+        track.cover_key = _intern(data.get('cover_key'))
+        track.playlist = None
+        track.duration = data.get('duration') or 0.0
+        track.added = data.get('mtime') or 0
+        track.loudness = data.get('loudness')
+        track.peak = data.get('peak')
+        track._compute_sort_keys()
+        return track
+
+    # Folded sort keys, computed once per record instead of on every query
+    def _compute_sort_keys(self):
+        self.title_key = fold(self.title or '')
+        self.artist_key = _intern(fold(self.artist or ''))
+        # Blank album sorts after every named one
+        self.album_key = _intern(fold(self.album)) if self.album and self.album.strip() else None
+
+    # Cached cover image path; the file is extracted lazily (see cover_cache)
+    @property
+    def cover_path(self) -> Optional[str]:
+        return cover_file(self.cover_key) if self.cover_key else None
 
     def _read_metadata(self):
         # Read ID3 tags
         try:
             audio = MP3(self.path, ID3=ID3)
             tags = audio.tags or {}
+            self.duration = float(audio.info.length)
         except Exception:
             tags = {}
 
@@ -47,22 +100,12 @@ class TrackInfo:
         except Exception:
             self.album = 'Unknown Album'
 
-        # Cover (APIC)
+        # Cover (APIC) — only hashed here, never written during a scan
         try:
-            for frame in tags.values():
-                if isinstance(frame, APIC):
-                    mime = getattr(frame, 'mime', 'image/jpeg') or 'image/jpeg'
-                    ext = '.jpg' if 'jpeg' in mime.lower() or 'jpg' in mime.lower() else '.png'
-                    cover_path = os.path.splitext(self.path)[0] + ext
-                    try:
-                        with open(cover_path, 'wb') as fh:
-                            fh.write(frame.data)
-                        self.cover_path = cover_path
-                    except Exception:
-                        self.cover_path = None
-                    break
+            frame = find_apic(tags)
+            self.cover_key = cover_key(frame) if frame is not None else None
         except Exception:
-            self.cover_path = None
+            self.cover_key = None
 
     def as_dict(self) -> Dict:
         return {
@@ -71,4 +114,6 @@ class TrackInfo:
             'artist': self.artist,
             'album': self.album,
             'cover_path': self.cover_path,
+            'cover_key': self.cover_key,
+            'duration': self.duration,
         }
@@ -1,8 +1,17 @@
-import os, re
+import os, re, hashlib, unicodedata
 
 def sanitize_filename(name: str) -> str:
     return re.sub(r'[\/:*?"<>|\\]', '_', name)
 
+# Case- and diacritic-folded text for searching and sorting (Latin and Cyrillic)
+def fold(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+# File name of a per-track cache entry: changes whenever the file is modified
+def track_cache_name(path: str, mtime: int, ext: str) -> str:
+    return hashlib.sha1(f"{path}\0{mtime}".encode('utf-8', 'surrogatepass')).hexdigest() + ext
+
 def find_ffmpeg_path() -> str | None:
     base_dir = os.path.dirname(os.path.abspath(__file__))
     ffmpeg_dir = os.path.normpath(os.path.join(base_dir, '..', 'bin'))
@@ -0,0 +1,218 @@
+# watcher.py
+
+# Filesystem watcher for the music library
+# Uses inotify on Linux (through ctypes, no extra dependency) and falls back
+# to periodic snapshot polling everywhere else. Changed paths are collected,
+# debounced and handed over in batches to a callback.
+
+import os, sys, time, struct, select, ctypes, ctypes.util
+from threading import Thread, Event
+from typing import Callable, Dict, Set, Tuple
+
+POLL_INTERVAL = 5.0 # seconds between snapshots in polling mode
+SETTLE_DELAY = 1.0 # wait until no new events for this long before flushing
+MAX_BATCH_DELAY = 5.0 # flush at least this often while events keep coming
+
+# inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_track_file(path: str) -> bool:
+    return path.lower().endswith('.mp3')
+
+
+# inotify backend: one watch per directory, new directories are watched on the fly.
+# A directory keeps its watches when it is moved, so a move inside the tree
+# rewrites their paths and a move out of the tree removes them.
+class _InotifyBackend:
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        self._watch_tree(base_dir)
+
+    @staticmethod
+    def available() -> bool:
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+            return hasattr(libc, 'inotify_init1')
+        except OSError:
+            return False
+
+    def _watch_tree(self, top: str):
+        for root, _, _ in os.walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = root
+
+    # Watches of a directory and everything below it
+    def _watches_under(self, top: str) -> Dict[int, str]:
+        prefix = os.path.join(top, '')
+        return {wd: path for wd, path in self._dirs.items() if path == top or path.startswith(prefix)}
+
+    def _move_tree(self, old: str, new: str):
+        for wd, path in self._watches_under(old).items():
+            self._dirs[wd] = new + path[len(old):]
+
+    def _unwatch_tree(self, top: str):
+        for wd in self._watches_under(top):
+            self._libc.inotify_rm_watch(self._fd, wd)
+            del self._dirs[wd]
+
+    def wait(self, timeout: float) -> Set[str]:
+        changed = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        moved_out = {} # cookie -> old path of directories moved away, until their IN_MOVED_TO
+        offset = 0
+        while offset < len(buf):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost — let the consumer rescan the whole tree
+                changed.add(self.base_dir)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            parent = self._dirs.get(wd)
+            if parent is None:
+                continue
+            path = os.path.join(parent, os.fsdecode(name)) if name else parent
+
+            if mask & IN_ISDIR:
+                if mask & IN_MOVED_FROM:
+                    moved_out[cookie] = path
+                elif mask & IN_MOVED_TO and cookie in moved_out:
+                    self._move_tree(moved_out.pop(cookie), path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                changed.add(path)
+            elif mask & IN_DELETE_SELF:
+                changed.add(path)
+            elif is_track_file(path):
+                changed.add(path)
+
+        # Moved out of the tree: its events would name paths that are gone
+        for path in moved_out.values():
+            self._unwatch_tree(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+# Polling backend: compares (size, mtime) snapshots of all track files
+class _PollingBackend:
+    def __init__(self, base_dir: str, stopped: Event, interval: float = POLL_INTERVAL):
+        self.base_dir = base_dir
+        self.interval = interval
+        self._stopped = stopped
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for root, _, files in os.walk(self.base_dir):
+            for f in files:
+                path = os.path.join(root, f)
+                if not is_track_file(path):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        if self._stopped.wait(max(timeout, self.interval)):
+            return set()
+        current = self._scan()
+        previous, self._snapshot = self._snapshot, current
+        changed = {path for path in previous.keys() - current.keys()}
+        changed.update(path for path, stamp in current.items() if previous.get(path) != stamp)
+        return changed
+
+    def close(self):
+        pass
+
+
+class LibraryWatcher:
+    def __init__(self, base_dir: str, on_changes: Callable[[Set[str]], None]):
+        self.base_dir = base_dir
+        self.on_changes = on_changes
+        self._backend = None
+        self._stopped = Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        try:
+            self._backend = _InotifyBackend(self.base_dir) if _InotifyBackend.available() else None
+        except OSError as e:
+            print(f"⚠️ inotify unavailable ({e}) — falling back to polling.")
+            self._backend = None
+        if self._backend is None:
+            self._backend = _PollingBackend(self.base_dir, self._stopped)
+
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._backend:
+            self._backend.close()
+        self._thread = None
+        self._backend = None
+
+    def _run(self):
+        pending = set()
+        first_event = last_event = 0.0
+
+        while not self._stopped.is_set():
+            changed = self._backend.wait(SETTLE_DELAY / 2)
+
+            now = time.monotonic()
+            if changed:
+                if not pending:
+                    first_event = now
+                pending.update(changed)
+                last_event = now
+
+            # Debounce: downloads and taggers touch a file several times in a row
+            if pending and (now - last_event >= SETTLE_DELAY or now - first_event >= MAX_BATCH_DELAY):
+                batch, pending = pending, set()
+                try:
+                    self.on_changes(batch)
+                except Exception as e:
+                    print(f"⚠️ Library watcher error: {e}")
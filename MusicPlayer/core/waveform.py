@@ -0,0 +1,236 @@
+# waveform.py
+
+# Min/max peak envelopes of a track for the seek bar
+# PeakBuilder reduces decoded blocks into fixed-size bins with numpy (one
+# reshape and min/max per block, whatever the block size). It is fed by a
+# decode that happens anyway — the playing source or the background loudness
+# pass — so a track is never decoded a second time for its waveform, and the
+# part decoded so far can be served while the rest is still coming.
+# Finished envelopes are cached as int8 min/max pairs, one small binary file
+# per track keyed by path and mtime; coarser levels are reduced from it on load.
+
+import os, struct, base64
+import numpy as np
+from threading import Lock
+from typing import Callable, Dict, Optional
+from core.database import WAVEFORM_CACHE_DIR
+from core.utils import track_cache_name
+
+MIN_BIN_FRAMES = 256
+MAX_BINS = 16384 # finest level; longer tracks get wider bins
+LEVEL_FACTOR = 4 # each coarser level merges this many bins
+MIN_LEVEL_BINS = 256
+
+# magic, version, samplerate, frames per bin, frames, bins
+HEADER = struct.Struct('<4sHIIQI')
+MAGIC = b'WFPK'
+VERSION = 1
+
+
+# Envelope floats in [-1, 1] to int8 (clipped tracks are shown at full scale)
+def quantize(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(values * 127), -127, 127).astype(np.int8)
+
+
+# Finest level first; every level is an int8 array of (bins, 2) min/max pairs
+def build_levels(peaks: np.ndarray, frames_per_bin: int) -> list:
+    levels = [(frames_per_bin, peaks)]
+    while len(peaks) > MIN_LEVEL_BINS:
+        pad = -len(peaks) % LEVEL_FACTOR
+        if pad:
+            peaks = np.concatenate((peaks, np.repeat(peaks[-1:], pad, axis=0)))
+        groups = peaks.reshape(-1, LEVEL_FACTOR, 2)
+        peaks = np.stack((groups[:, :, 0].min(axis=1), groups[:, :, 1].max(axis=1)), axis=1)
+        frames_per_bin *= LEVEL_FACTOR
+        levels.append((frames_per_bin, peaks))
+    return levels
+
+
+# What get_waveform hands to the UI: every level at once, peaks as base64 of int8 min,max pairs
+def waveform_dict(peaks: np.ndarray, frames_per_bin: int, samplerate: int, frames: int, progress: float) -> Dict:
+    return {
+        'samplerate': samplerate,
+        'duration': frames / samplerate if samplerate else 0.0,
+        'complete': progress >= 1.0,
+        'progress': round(progress, 4),
+        'levels': [{'frames_per_bin': fpb, 'bins': len(level),
+                    'peaks': base64.b64encode(np.ascontiguousarray(level).tobytes()).decode('ascii')}
+                   for fpb, level in build_levels(peaks, frames_per_bin)],
+    }
+
+
+class PeakBuilder:
+    """
+    Min/max envelope of one file, fed with consecutive decoded blocks (file
+    frames, any channel count). A seek moves the feed position; bins only
+    partly seen stay uncovered, and the envelope is complete once every bin
+    was covered. on_done runs once, when the file ended or was abandoned.
+    """
+    def __init__(self, frames: int, samplerate: int, on_done: Optional[Callable[['PeakBuilder'], None]] = None):
+        self.frames = frames
+        self.samplerate = samplerate
+        self.frames_per_bin = max(MIN_BIN_FRAMES, -(-frames // MAX_BINS))
+        self.bins = max(1, -(-frames // self.frames_per_bin))
+        self._min = np.zeros(self.bins, dtype=np.float32)
+        self._max = np.zeros(self.bins, dtype=np.float32)
+        self._covered = np.zeros(self.bins, dtype=bool)
+        self._pos = 0
+        self._clean = True # the bin in progress was fed from its first frame
+        self._on_done = on_done
+        self.done = False
+
+    def feed(self, block: np.ndarray):
+        n = len(block)
+        if not n or self.done:
+            return
+        fpb = self.frames_per_bin
+        pos, i = self._pos, 0
+        self._pos += n
+
+        # Finish the bin the previous block started
+        offset = pos % fpb
+        if offset:
+            take = min(fpb - offset, n)
+            self._merge(pos // fpb, block[:take], fresh=False)
+            if offset + take == fpb:
+                self._close_bin(pos // fpb)
+            i, pos = take, pos + take
+
+        # Whole bins: one reduction for all of them
+        whole = (n - i) // fpb
+        if whole:
+            first = pos // fpb
+            last = min(first + whole, self.bins)
+            if last > first:
+                chunk = block[i:i + (last - first) * fpb].reshape(last - first, -1)
+                self._min[first:last] = chunk.min(axis=1)
+                self._max[first:last] = chunk.max(axis=1)
+                self._covered[first:last] = True
+            i, pos = i + whole * fpb, pos + whole * fpb
+
+        # Start of the next bin
+        if i < n:
+            self._clean = True
+            self._merge(pos // fpb, block[i:], fresh=True)
+
+    def _merge(self, index: int, data: np.ndarray, fresh: bool):
+        if index >= self.bins:
+            return
+        lo, hi = data.min(), data.max()
+        if fresh:
+            self._min[index], self._max[index] = lo, hi
+        else:
+            self._min[index] = min(self._min[index], lo)
+            self._max[index] = max(self._max[index], hi)
+
+    def _close_bin(self, index: int):
+        if self._clean and index < self.bins:
+            self._covered[index] = True
+        self._clean = True
+
+    # The decoder jumped to another file frame
+    def seek(self, frame: int):
+        self._pos = frame
+        self._clean = frame % self.frames_per_bin == 0
+
+    @property
+    def progress(self) -> float:
+        return float(self._covered.mean())
+
+    @property
+    def complete(self) -> bool:
+        return bool(self._covered.all())
+
+    # int8 (bins, 2) envelope of what has been covered so far
+    def peaks(self) -> np.ndarray:
+        return quantize(np.stack((self._min, self._max), axis=1))
+
+    # End of file: the last partial bin counts, bins past the real end are empty
+    def finish(self):
+        if self.done:
+            return
+        fpb = self.frames_per_bin
+        if self._pos % fpb:
+            self._close_bin(self._pos // fpb)
+        self._covered[-(-self._pos // fpb):] = True
+        self._release()
+
+    # Decode stopped before the end (skip, stop, error)
+    def abandon(self):
+        if not self.done:
+            self._release()
+
+    def _release(self):
+        self.done = True
+        if self._on_done is not None:
+            self._on_done(self)
+
+
+class WaveformStore:
+    """
+    Binary peak cache plus the builders currently fed by a decode.
+    At most one builder exists per file: whoever decodes it first builds it.
+    """
+    def __init__(self, cache_dir: str = WAVEFORM_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._live: Dict[str, PeakBuilder] = {}
+        self._lock = Lock()
+
+    def cache_file(self, path: str, mtime: int) -> str:
+        return os.path.join(self.cache_dir, track_cache_name(path, mtime, ".peaks"))
+
+    def has(self, path: str, mtime: int) -> bool:
+        return os.path.exists(self.cache_file(path, mtime))
+
+    # A builder for a decode that is about to start, or None when cached or already being built
+    def builder(self, path: str, frames: int, samplerate: int) -> Optional[PeakBuilder]:
+        try:
+            target = self.cache_file(path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return None
+        with self._lock:
+            if path in self._live or os.path.exists(target):
+                return None
+            builder = PeakBuilder(frames, samplerate, on_done=lambda b: self._finished(path, target, b))
+            self._live[path] = builder
+        return builder
+
+    def _finished(self, path: str, target: str, builder: PeakBuilder):
+        with self._lock:
+            if self._live.get(path) is builder:
+                del self._live[path]
+        if builder.complete:
+            self._save(target, builder)
+
+    def _save(self, target: str, builder: PeakBuilder):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp name first so a half-written file is never read
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as fh:
+                fh.write(HEADER.pack(MAGIC, VERSION, builder.samplerate, builder.frames_per_bin,
+                                     builder.frames, builder.bins))
+                fh.write(builder.peaks().tobytes())
+            os.replace(tmp_path, target)
+        except OSError as e:
+            print(f"⚠️ Could not cache waveform: {e}")
+
+    def _load(self, path: str) -> Optional[Dict]:
+        try:
+            with open(self.cache_file(path, os.stat(path).st_mtime_ns), 'rb') as fh:
+                magic, version, samplerate, frames_per_bin, frames, bins = HEADER.unpack(fh.read(HEADER.size))
+                peaks = np.frombuffer(fh.read(bins * 2), dtype=np.int8)
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or version != VERSION or len(peaks) != bins * 2:
+            return None
+        return waveform_dict(peaks.reshape(bins, 2), frames_per_bin, samplerate, frames, 1.0)
+
+    # Cached envelope, or the partial one of a decode in progress; None if neither
+    def get(self, path: str) -> Optional[Dict]:
+        with self._lock:
+            builder = self._live.get(path)
+        if builder is not None:
+            return waveform_dict(builder.peaks(), builder.frames_per_bin, builder.samplerate,
+                                 builder.frames, min(builder.progress, 0.9999))
+        return self._load(path)
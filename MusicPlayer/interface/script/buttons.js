@@ -24,24 +24,11 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    // Shuffle toggle
-    function refreshTrackList(tracks) {
-        UI.trackList.innerHTML = '';
-
-        requestAnimationFrame(() => {
-            populateTracks(tracks);
-            if (Backend.currentTrackPath) {
-                markPlaying(Backend.currentTrackPath);
-            }
-        });
-    }
-
+    // Shuffle toggle (only the playback order changes, the shown list stays)
     UI.randomBtn.addEventListener('click', () => {
         Backend.backend.toggle_shuffle().then(shuffle_on => {
-            Backend.backend.get_playlist().then(tracks => {
-                refreshTrackList(tracks);
-                UI.randomBtn.textContent = shuffle_on ? '⤭' : '⇉';
-            });
+            UI.randomBtn.textContent = shuffle_on ? '⤭' : '⇉';
+            if (Backend.currentTrackPath) markPlaying(Backend.currentTrackPath);
         });
     });
 
@@ -49,46 +36,28 @@ document.addEventListener('DOMContentLoaded', () => {
     UI.globalBtn.addEventListener('click', () => {
         Array.from(UI.folderSelect.children).forEach(child => child.classList.remove('selected'));
         UI.globalBtn.classList.add('selected');
-        Backend.backend.set_global_playlist().then(tracks => populateTracks(tracks));
+        selectPlaylist({ type: 'global' });
     });
 
-    // Search input filtering for both Tracks and Folders
+    // Sort order
+    UI.sortSelect.addEventListener('change', () => {
+        Backend.sortOrder = UI.sortSelect.value;
+        Backend.backend.set_sort_order(Backend.sortOrder, Backend.pageSize).then(showPlaylist);
+    });
+
+    // Search input: tracks are searched across the whole library by the
+    // backend index (debounced), folders are filtered in place
+    let searchTimer = null;
+
     UI.searchInput.addEventListener('input', () => {
         const query = UI.searchInput.value.trim().toLowerCase();
-        const trackItems = Array.from(UI.trackList.children);
         const folderContainers = [UI.foldersList, UI.folderSelect];
-        
-        // Track
-        trackItems.forEach(div => {
-            if (div.classList.contains('album-separator')) return;
 
-            const content = div.textContent.toLowerCase();
-            const album = div.dataset.album ? div.dataset.album.toLowerCase() : '';
-
-            const isVisible = content.includes(query) || album.includes(query);
-            div.style.display = isVisible ? '' : 'none';
-        });
-
-        // Album
-        let lastHeader = null;
-        let hasVisibleTracksInAlbum = false;
-
-        trackItems.forEach(div => {
-            if (div.classList.contains('album-separator')) {
-                if (lastHeader && !hasVisibleTracksInAlbum) {
-                    lastHeader.style.display = 'none';
-                }
-                lastHeader = div;
-                lastHeader.style.display = ''; 
-                hasVisibleTracksInAlbum = false;
-            } else if (div.style.display !== 'none') {
-                hasVisibleTracksInAlbum = true;
-            }
-        });
-        
-        if (lastHeader && !hasVisibleTracksInAlbum) {
-            lastHeader.style.display = 'none';
-        }
+        // Tracks
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => {
+            Backend.backend.search_tracks(UI.searchInput.value.trim(), Backend.pageSize).then(showPlaylist);
+        }, 150);
 
         // Folders
         folderContainers.forEach(container => {
@@ -136,9 +105,7 @@ document.addEventListener('DOMContentLoaded', () => {
             Backend.selectedPlaylists.clear();
 
             if (selected.length > 0) {
-                Backend.backend.create_temp_playlist(selected).then(tracks => {
-                    populateTracks(tracks);
-                });
+                selectPlaylist({ type: 'custom', value: selected });
             }
 
             document.querySelectorAll('.playlist-item.selected-set')
@@ -16,52 +16,197 @@ function populateFolders(folders) {
     });
 }
 
-function populateTracks(tracks) {
+// The track list is rendered in windows: the backend keeps the playlist and
+// precomputed album boundaries, the UI appends the next page on scroll
+function showPlaylist(page) {
     UI.trackList.innerHTML = '';
-    let lastAlbum = null;
-
-    tracks.forEach(track => {
-        const currentAlbum = track.album || 'Unknown Album';
-        if (currentAlbum !== lastAlbum) {
-            const albumHeader = document.createElement('div');
-            albumHeader.classList.add('album-separator');
-            albumHeader.innerHTML = `<span>${currentAlbum}</span>`;
-            UI.trackList.appendChild(albumHeader);
-            lastAlbum = currentAlbum;
-        }
+    UI.trackList.scrollTop = 0;
+    Backend.playlistGeneration++;
+    Backend.playlistTotal = page.total || 0;
+    setPlaylistGroups(page.groups || []);
+    appendTracks(page.tracks || [], page.offset || 0);
+}
 
-        const div = document.createElement('div');
-        div.classList.add('track-item');
-        div.dataset.path = track.path;
-        div.dataset.album = (track.album || '').toLowerCase();
-        const cover = track.cover_path 
-            ? `<img src="${track.cover_path.startsWith('file://') ? track.cover_path : 'file://' + track.cover_path}" 
-                    style="width:3rem;height:3rem;margin-right:0.5rem;border-radius:0.5rem;vertical-align:middle;">` 
-            : '';
-        div.innerHTML = `${cover} <span>${track.title || '—'} — ${track.artist || '—'}</span>`;
+// Select a playlist on the backend ({type, value}) and show its first window
+function selectPlaylist(query) {
+    return Backend.backend.select_playlist(query, Backend.pageSize).then(showPlaylist);
+}
 
-        div.addEventListener('click', () => {
-            Backend.backend.play_track(track.path).then(info => {
-                if (info) {
-                    updateTrackInfo(info);
-                    Backend.currentTrackPath = track.path;
-                    Backend.isPlaying = true;
-                    UI.playBtn.textContent = '||';
-                    markPlaying(track.path);
-                }
-
-                if (Backend.isPlaying) {
-                    UI.trackCover.classList.add('rotating');
-                    UI.trackCover.classList.remove('reset');
-                } else {
-                    UI.trackCover.classList.remove('rotating');
-                    UI.trackCover.classList.add('reset');
-                }
-            });
+function setPlaylistGroups(groups) {
+    // Album separators only make sense when the list is sorted by album
+    Backend.playlistGroups = new Map(
+        Backend.sortOrder === 'album' ? groups.map(group => [group.index, group.album]) : []
+    );
+}
+
+function renderedTrackCount() {
+    return UI.trackList.querySelectorAll('.track-item').length;
+}
+
+function appendTracks(tracks, offset) {
+    const fragment = document.createDocumentFragment();
+    tracks.forEach((track, i) => {
+        const album = Backend.playlistGroups.get(offset + i);
+        if (album !== undefined) fragment.appendChild(createAlbumHeader(album));
+        fragment.appendChild(createTrackRow(track));
+    });
+    UI.trackList.appendChild(fragment);
+
+    if (Backend.currentTrackPath) markPlaying(Backend.currentTrackPath, false);
+}
+
+// Fetch the next window once the user scrolls close to the end
+function loadMoreTracks() {
+    const offset = renderedTrackCount();
+    if (Backend.loadingPage || offset >= Backend.playlistTotal) return;
+
+    Backend.loadingPage = true;
+    const generation = Backend.playlistGeneration;
+    Backend.backend.get_playlist_window(offset, Backend.pageSize).then(page => {
+        Backend.loadingPage = false;
+        // A different playlist was selected meanwhile
+        if (generation !== Backend.playlistGeneration || !page.tracks) return;
+        Backend.playlistTotal = page.total;
+        appendTracks(page.tracks, page.offset);
+    });
+}
+
+UI.trackList.addEventListener('scroll', () => {
+    const list = UI.trackList;
+    if (list.scrollTop + list.clientHeight >= list.scrollHeight - list.clientHeight) {
+        loadMoreTracks();
+    }
+});
+
+function createAlbumHeader(album) {
+    const albumHeader = document.createElement('div');
+    albumHeader.classList.add('album-separator');
+    albumHeader.innerHTML = `<span>${album}</span>`;
+    return albumHeader;
+}
+
+function coverUrl(path) {
+    return path.startsWith('file://') ? path : 'file://' + path;
+}
+
+// Covers live in a lazy cache: if the image is not extracted yet,
+// ask the backend once and retry with the returned file
+function bindCover(img, track) {
+    if (!img) return;
+    img.addEventListener('error', () => {
+        Backend.backend.get_cover(track.path).then(path => {
+            if (path) img.src = coverUrl(path) + '?' + Date.now();
+            else img.remove();
         });
-        UI.trackList.appendChild(div);
+    }, { once: true });
+}
+
+function trackRowHtml(track) {
+    const cover = track.cover_path 
+        ? `<img src="${coverUrl(track.cover_path)}" loading="lazy"
+                style="width:3rem;height:3rem;margin-right:0.5rem;border-radius:0.5rem;vertical-align:middle;">` 
+        : '';
+    return `${cover} <span>${track.title || '—'} — ${track.artist || '—'}</span>`;
+}
+
+function createTrackRow(track) {
+    const div = document.createElement('div');
+    div.classList.add('track-item');
+    div.dataset.path = track.path;
+    div.dataset.album = (track.album || '').toLowerCase();
+    div.innerHTML = trackRowHtml(track);
+    bindCover(div.querySelector('img'), track);
+
+    div.addEventListener('click', () => {
+        Backend.backend.play_track(track.path).then(info => {
+            if (info) {
+                updateTrackInfo(info);
+                Backend.currentTrackPath = track.path;
+                Backend.isPlaying = true;
+                UI.playBtn.textContent = '||';
+                markPlaying(track.path);
+            }
+
+            if (Backend.isPlaying) {
+                UI.trackCover.classList.add('rotating');
+                UI.trackCover.classList.remove('reset');
+            } else {
+                UI.trackCover.classList.remove('rotating');
+                UI.trackCover.classList.add('reset');
+            }
+        });
+    });
+    return div;
+}
+
+function findTrackRow(path) {
+    if (!path) return null;
+    return Array.from(UI.trackList.children).find(div => div.dataset.path === path) || null;
+}
+
+// Drop an album header that has no tracks left under it
+function pruneAlbumHeader(header) {
+    if (!header || !header.classList.contains('album-separator')) return;
+    const next = header.nextElementSibling;
+    if (!next || next.classList.contains('album-separator')) header.remove();
+}
+
+// Apply a playlist delta pushed by the library watcher without re-rendering
+function applyLibraryDelta(delta) {
+    // Tracks past the loaded window are picked up by the next page
+    const complete = renderedTrackCount() >= Backend.playlistTotal;
+    Backend.playlistTotal += (delta.added || []).length - (delta.removed || []).length;
+
+    (delta.removed || []).forEach(path => {
+        const row = findTrackRow(path);
+        if (!row) return;
+        const header = row.previousElementSibling;
+        row.remove();
+        pruneAlbumHeader(header);
+    });
+
+    (delta.updated || []).forEach(track => {
+        const row = findTrackRow(track.path);
+        if (!row) return;
+        row.dataset.album = (track.album || '').toLowerCase();
+        row.innerHTML = trackRowHtml(track);
+        bindCover(row.querySelector('img'), track);
     });
 
+    (delta.added || []).forEach(track => {
+        const album = (track.album || '').toLowerCase();
+        const row = createTrackRow(track);
+        const after = findTrackRow(track.after);
+        const before = findTrackRow(track.before);
+
+        if (!after && !before && !complete) {
+            return;
+        } else if (Backend.sortOrder !== 'album') {
+            if (after) after.after(row);
+            else if (before) before.before(row);
+            else UI.trackList.append(row);
+        } else if (after && after.dataset.album === album) {
+            after.after(row);
+        } else if (before && before.dataset.album === album) {
+            before.before(row);
+        } else {
+            // First track of its album in this list
+            let anchor = before;
+            if (anchor && anchor.previousElementSibling && anchor.previousElementSibling.classList.contains('album-separator')) {
+                anchor = anchor.previousElementSibling;
+            }
+            const header = createAlbumHeader(track.album || 'Unknown Album');
+            if (anchor) {
+                anchor.before(header, row);
+            } else {
+                UI.trackList.append(header, row);
+            }
+        }
+    });
+
+    // Group indices shifted — refresh them for the windows still to come
+    Backend.backend.get_playlist_groups().then(groups => setPlaylistGroups(groups));
+
     if (Backend.currentTrackPath) markPlaying(Backend.currentTrackPath);
 }
 
@@ -73,21 +218,19 @@ function updateTrackInfo(track) {
     UI.trackArtist.textContent = track.artist || '—';
     UI.trackCover.classList.add('change');
     setTimeout(() => {
-        UI.trackCover.src = track.cover_path 
-            ? (track.cover_path.startsWith('file://') ? track.cover_path : 'file://' + track.cover_path)
-            : '';
+        UI.trackCover.src = track.cover_path ? coverUrl(track.cover_path) : '';
         UI.trackCover.classList.remove('change');
     }, 300);
     loadLyrics(track.path);
 }
 
 // Highlight currently playing track
-function markPlaying(path) {
-    Array.from(UI.trackList.children).forEach(div => div.classList.remove('playing'));
+function markPlaying(path, scroll = true) {
+    UI.trackList.querySelectorAll('.playing').forEach(div => div.classList.remove('playing'));
     if (!path) return;
-    const el = Array.from(UI.trackList.children).find(div => div.dataset.path === path);
+    const el = findTrackRow(path);
     if (el) {
         el.classList.add('playing');
-        el.scrollIntoView({ block: 'nearest', behavior: 'smooth' });
+        if (scroll) el.scrollIntoView({ block: 'nearest', behavior: 'smooth' });
     }
 }
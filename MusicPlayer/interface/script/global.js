@@ -29,6 +29,7 @@ window.UI = {
     backBtn: document.getElementById('back-btn'),
     nextBtn: document.getElementById('next-btn'),
     progressBar: document.getElementById('progress-bar'),
+    waveformCanvas: document.getElementById('waveform'),
     currentTimeText: document.getElementById('current-time'),
     totalTimeText: document.getElementById('total-time'),
     
@@ -47,6 +48,7 @@ window.UI = {
 
     globalBtn: document.getElementById('open-global-btn'),
     setPlaylistBtn: document.getElementById('open-set-btn'),
+    sortSelect: document.getElementById('sort-select'),
 
     themeBtnGrass: document.getElementById('theme-btn-grass'),
     themeBtnSun: document.getElementById('theme-btn-sun'),
@@ -94,6 +96,12 @@ window.Backend = {
     setMode: false,
     selectedPlaylists: new Set(),
     cycleMode: 0,
+    sortOrder: "album",
+    pageSize: 200,
+    playlistTotal: 0,
+    playlistGroups: new Map(),
+    playlistGeneration: 0,
+    loadingPage: false,
     currentBaseTheme: "dark", 
     isLiteMode: false
 };
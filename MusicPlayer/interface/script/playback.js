@@ -52,46 +52,101 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // ==== Track progress update ====
 
-    // Update progress bar every second
-    setInterval(() => {
-        if (!Backend.backend || !Backend.currentTrackPath) return;
-        Backend.backend.get_playback_info().then(info => {
-            const pos = info.position || 0;
-            const dur = info.duration || 0;
-
-            UI.progressBar.max = Math.floor(dur);
-            UI.progressBar.value = Math.floor(pos);
-
-            UI.currentTimeText.textContent = formatTime(pos);
-            UI.totalTimeText.textContent = formatTime(dur);
-
-            // Lyrics synchronisation
-            if (currentLyrics.length > 0 && currentLyrics[0].time !== -1) {
-                let activeIndex = -1;
-                for (let i = 0; i < currentLyrics.length; i++) {
-                    if (pos >= currentLyrics[i].time) {
-                        activeIndex = i;
-                    } else {
-                        break;
-                    }
-                }
+    // Pushed by the backend (playback_progress) while playing; nothing arrives when paused or idle
+    function updateProgress(info) {
+        if (!Backend.currentTrackPath) return;
+        const pos = info.position || 0;
+        const dur = info.duration || 0;
 
-                if (activeIndex !== -1) {
-                    document.querySelectorAll('.lyric-line').forEach(l => l.classList.remove('current'));
-                    
-                    const activeLine = document.getElementById(`lyric-line-${activeIndex}`);
-                    if (activeLine) {
-                        activeLine.classList.add('current');
-                        
-                        UI.lyricsPanel.scrollTo({
-                            top: activeLine.offsetTop - UI.lyricsPanel.offsetHeight / 2,
-                            behavior: 'smooth'
-                        });
-                    }
+        UI.progressBar.max = Math.floor(dur);
+        UI.progressBar.value = Math.floor(pos);
+
+        // Fetch the waveform until it is complete (at most once a second), redraw the played part
+        const now = Date.now();
+        if ((waveform.path !== Backend.currentTrackPath || !waveform.complete) && now - waveform.requestedAt >= 1000) {
+            waveform.requestedAt = now;
+            loadWaveform(Backend.currentTrackPath);
+        }
+        drawWaveform(dur ? pos / dur : 0);
+
+        UI.currentTimeText.textContent = formatTime(pos);
+        UI.totalTimeText.textContent = formatTime(dur);
+
+        // Lyrics synchronisation
+        if (currentLyrics.length > 0 && currentLyrics[0].time !== -1) {
+            let activeIndex = -1;
+            for (let i = 0; i < currentLyrics.length; i++) {
+                if (pos >= currentLyrics[i].time) {
+                    activeIndex = i;
+                } else {
+                    break;
                 }
             }
+
+            // Updates come several times a second: only touch the DOM when the line changes
+            const activeLine = document.getElementById(`lyric-line-${activeIndex}`);
+            if (activeIndex !== -1 && activeLine && !activeLine.classList.contains('current')) {
+                document.querySelectorAll('.lyric-line').forEach(l => l.classList.remove('current'));
+                activeLine.classList.add('current');
+
+                UI.lyricsPanel.scrollTo({
+                    top: activeLine.offsetTop - UI.lyricsPanel.offsetHeight / 2,
+                    behavior: 'smooth'
+                });
+            }
+        }
+    }
+    Backend.updateProgress = updateProgress;
+
+    // ==== Waveform ====
+
+    // Peaks of the current track: levels of int8 min,max pairs, finest first
+    const waveform = { path: null, complete: false, levels: [], requestedAt: 0 };
+
+    function loadWaveform(path) {
+        Backend.backend.get_waveform(path).then(data => {
+            if (path !== Backend.currentTrackPath) return;
+            waveform.path = path;
+            waveform.complete = !!data.complete;
+            waveform.levels = (data.levels || []).map(level => ({
+                bins: level.bins,
+                peaks: new Int8Array(Uint8Array.from(atob(level.peaks), c => c.charCodeAt(0)).buffer)
+            }));
         });
-    }, 1000);
+    }
+
+    function drawWaveform(played) {
+        const canvas = UI.waveformCanvas;
+        const width = canvas.clientWidth, height = canvas.clientHeight;
+        if (canvas.width !== width || canvas.height !== height) {
+            canvas.width = width;
+            canvas.height = height;
+        }
+        const ctx = canvas.getContext('2d');
+        ctx.clearRect(0, 0, width, height);
+        if (waveform.path !== Backend.currentTrackPath || !waveform.levels.length || !width) return;
+
+        // Coarsest level that still has a bin per pixel
+        let level = waveform.levels[0];
+        for (const candidate of waveform.levels) {
+            if (candidate.bins >= width) level = candidate;
+        }
+
+        const style = getComputedStyle(document.documentElement);
+        const playedColor = style.getPropertyValue('--highlight') || '#ffffff';
+        const middle = height / 2, scale = middle / 127;
+        for (let x = 0; x < width; x++) {
+            const start = Math.floor(x * level.bins / width);
+            const end = Math.max(start + 1, Math.floor((x + 1) * level.bins / width));
+            let lo = 0, hi = 0;
+            for (let i = start; i < end; i++) {
+                lo = Math.min(lo, level.peaks[2 * i]);
+                hi = Math.max(hi, level.peaks[2 * i + 1]);
+            }
+            ctx.fillStyle = x < played * width ? playedColor : 'rgba(255, 255, 255, 0.25)';
+            ctx.fillRect(x, middle - hi * scale, 1, Math.max(1, (hi - lo) * scale));
+        }
+    }
 
     // Seek when user changes the progress bar
     UI.progressBar.addEventListener('change', () => {
@@ -21,6 +21,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
         Backend.backend.get_folders().then(folders => populateFolders(folders));
 
+        Backend.backend.get_sort_order().then(order => {
+            Backend.sortOrder = order;
+            UI.sortSelect.value = order;
+        });
+
         // Temporary cache for tracks to be downloaded
         let preDownloadCache = [];
 
@@ -139,16 +144,12 @@ document.addEventListener('DOMContentLoaded', () => {
                             Backend.selectedPlaylists.add(folder);
                             div.classList.add('selected-set');
                         }
-                        Backend.backend.set_playlist(folder).then(tracks => {
-                            populateTracks(tracks);
-                        });
+                        selectPlaylist({ type: 'playlist', value: folder });
                     } else {
                         Array.from(UI.folderSelect.children).forEach(child => child.classList.remove('selected'));
                         div.classList.add('selected');
 
-                        Backend.backend.set_playlist(folder).then(tracks => {
-                            populateTracks(tracks);
-                        });
+                        selectPlaylist({ type: 'playlist', value: folder });
 
                         UI.folderInput.value = folder;
                     }
@@ -159,6 +160,9 @@ document.addEventListener('DOMContentLoaded', () => {
         });
 
         Backend.backend.track_changed.connect(track => {
+            // Playback order changed (shuffle) — the shown list stays as is
+            if (track && track.playlist_updated) return;
+
             if (track) {
                 updateTrackInfo(track);
                 markPlaying(track.path);
@@ -173,6 +177,12 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         });
 
+        Backend.backend.library_changed.connect(delta => applyLibraryDelta(delta));
+
+        // Position is pushed while playing; one request covers a track already paused
+        Backend.backend.playback_progress.connect(info => Backend.updateProgress(info));
+        Backend.backend.get_playback_info().then(info => Backend.updateProgress(info));
+
         Backend.backend.playback_state_changed.connect((isPlaying) => {
             UI.playBtn.textContent = isPlaying ? '||' : '►';
 
@@ -272,30 +282,7 @@ document.addEventListener('DOMContentLoaded', () => {
         });
 
         // ==== Equalizer ====
-        Backend.backend.get_equalizer_settings().then(eq => {
-            sliders[0].value = eq["60"];
-            sliders[1].value = eq["150"];
-            sliders[2].value = eq["400"];
-            sliders[3].value = eq["1000"];
-            sliders[4].value = eq["2400"];
-            sliders[5].value = eq["15000"];
-            updateCurve();
-        });
-
-        function saveEqSettings() {
-            const eq = {
-                "60": parseFloat(sliders[0].value),
-                "150": parseFloat(sliders[1].value),
-                "400": parseFloat(sliders[2].value),
-                "1000": parseFloat(sliders[3].value),
-                "2400": parseFloat(sliders[4].value),
-                "15000": parseFloat(sliders[5].value),
-            };
-            Backend.backend.set_equalizer_settings(eq);
-        }
-
-        dots.forEach(dot => dot.addEventListener("pointerup", saveEqSettings));
-        resetBtn.addEventListener("click", saveEqSettings);
+        Backend.backend.get_equalizer_settings().then(applyEqState);
 
         // ==== Shortcut key capture ====
 
@@ -34,17 +34,13 @@ document.getElementById('set-download-path-btn')
                                 Backend.selectedPlaylists.add(folder);
                                 div.classList.add('selected-set');
                             }
-                            Backend.backend.set_playlist(folder).then(tracks => {
-                                populateTracks(tracks);
-                            });
+                            selectPlaylist({ type: 'playlist', value: folder });
                         } else {
                             Array.from(UI.folderSelect.children).forEach(
                                 child => child.classList.remove('selected'));
                             div.classList.add('selected');
 
-                            Backend.backend.set_playlist(folder).then(tracks => {
-                                populateTracks(tracks);
-                            });
+                            selectPlaylist({ type: 'playlist', value: folder });
 
                             UI.folderInput.value = folder;
                         }
@@ -119,19 +115,18 @@ document.getElementById("set-language-btn").addEventListener("click", () => {
 
 // ==== Equalizer settings ====
 
-const sliders = [
-  document.getElementById("eq-60"),
-  document.getElementById("eq-150"),
-  document.getElementById("eq-400"),
-  document.getElementById("eq-1000"),
-  document.getElementById("eq-2400"),
-  document.getElementById("eq-15000"),
-];
+// Sliders and dots are built per band set (6 parametric, 10 or 31 graphic bands)
+let sliders = [];
+let dots = [];
+let eqMode = "parametric";
 
 const path = document.getElementById("eq-path");
-const dots = document.querySelectorAll(".eq-dot");
 const resetBtn = document.getElementById("reset-equalizer-btn");
 const svg = document.getElementById("eq-curve");
+const eqLabels = document.getElementById("eq-labels");
+const eqSliders = document.getElementById("eq-sliders");
+const eqModeSelect = document.getElementById("eq-mode");
+const eqFirPath = document.getElementById("eq-fir-path");
 
 const MIN_DB = -12;
 const MAX_DB = 12;
@@ -147,7 +142,11 @@ function yToDb(y) {
   return MIN_DB + ratio * (MAX_DB - MIN_DB);
 }
 
-function updateCurve() {
+function formatBand(freq) {
+  return freq >= 1000 ? `${freq / 1000}kHz` : `${freq}Hz`;
+}
+
+function updateCurve(save = true) {
   const values = sliders.map(s => parseFloat(s.value));
   const step = WIDTH / (values.length - 1);
 
@@ -170,17 +169,60 @@ function updateCurve() {
   }
 
   path.setAttribute("d", d);
-  saveEqSettings();
+  if (save) saveEqSettings();
 }
 
 let activeDot = null;
 
-dots.forEach((dot, index) => {
-  dot.addEventListener("pointerdown", e => {
-    activeDot = index;
-    svg.setPointerCapture(e.pointerId);
+// Rebuild the editor from an equalizer state: {mode, fir, "<freq>": gain, ...}
+function applyEqState(eq) {
+  eqMode = eq.mode || "parametric";
+  eqModeSelect.value = eqMode;
+  eqFirPath.textContent = eq.fir ? eq.fir.split(/[\\/]/).pop() : "—";
+  eqFirPath.title = eq.fir || "";
+
+  const bands = Object.keys(eq).filter(k => !isNaN(k)).map(Number).sort((a, b) => a - b);
+  const dense = bands.length > 10;
+
+  eqSliders.innerHTML = "";
+  eqLabels.innerHTML = "";
+  dots.forEach(dot => dot.remove());
+
+  sliders = bands.map(freq => {
+    const slider = document.createElement("input");
+    slider.type = "range";
+    slider.min = MIN_DB;
+    slider.max = MAX_DB;
+    slider.step = 0.1;
+    slider.value = eq[freq];
+    slider.dataset.band = freq;
+    eqSliders.appendChild(slider);
+    return slider;
   });
-});
+
+  bands.forEach((freq, i) => {
+    const label = document.createElement("span");
+    // The 31-band set only labels every other band
+    label.textContent = dense && i % 2 ? "" : formatBand(freq);
+    eqLabels.appendChild(label);
+  });
+  eqLabels.style.gridTemplateColumns = `repeat(${bands.length}, 1fr)`;
+
+  dots = bands.map((freq, i) => {
+    const dot = document.createElementNS("http://www.w3.org/2000/svg", "circle");
+    dot.classList.add("eq-dot");
+    dot.dataset.band = i;
+    dot.addEventListener("pointerdown", e => {
+      activeDot = i;
+      svg.setPointerCapture(e.pointerId);
+    });
+    svg.appendChild(dot);
+    return dot;
+  });
+  svg.classList.toggle("eq-dense", dense);
+
+  updateCurve(false);
+}
 
 svg.addEventListener("pointermove", e => {
   if (activeDot === null) return;
@@ -203,14 +245,20 @@ resetBtn.addEventListener("click", () => {
   updateCurve();
 });
 
+eqModeSelect.addEventListener("change", () => {
+  Backend.backend.set_equalizer_mode(eqModeSelect.value).then(applyEqState);
+});
+
+document.getElementById("eq-fir-load-btn").addEventListener("click", () => {
+  Backend.backend.choose_equalizer_fir().then(applyEqState);
+});
+
+document.getElementById("eq-fir-clear-btn").addEventListener("click", () => {
+  Backend.backend.clear_equalizer_fir().then(applyEqState);
+});
+
 function saveEqSettings() {
-    const eq = {
-        "60": parseFloat(sliders[0].value),
-        "150": parseFloat(sliders[1].value),
-        "400": parseFloat(sliders[2].value),
-        "1000": parseFloat(sliders[3].value),
-        "2400": parseFloat(sliders[4].value),
-        "15000": parseFloat(sliders[5].value),
-    };
+    const eq = { mode: eqMode };
+    sliders.forEach(s => eq[s.dataset.band] = parseFloat(s.value));
     Backend.backend.set_equalizer_settings(eq);
 }
@@ -39,7 +39,9 @@ from core.database import (get_theme, set_theme,
     get_equalizer_settings, set_equalizer_settings,
     get_shortcuts, set_shortcuts,
     get_lite_mode, set_lite_mode,
-    get_tray_mode, set_tray_mode)
+    get_tray_mode, set_tray_mode,
+    get_scan_settings, set_scan_settings,
+    get_playback_settings, set_playback_settings)
 
 def check_graphics_and_setup():
     probe_code = "from PySide6.QtWidgets import QApplication; import sys; app = QApplication(sys.argv); sys.exit(0)"
@@ -64,6 +66,8 @@ def check_graphics_and_setup():
 
 from core.downloader import download_audio
 from core.player import MusicPlayer
+from core.equalizer import MODES as EQ_MODES
+from core.cover_cache import extract_cover
 from config import get_music_base_dir
 from core.global_hotkeys import GlobalHotkeys
 
@@ -190,10 +194,40 @@ class Worker(QRunnable):
             self.backend.log_signal.emit("❌ Error during download.")
         else:
             self.backend.log_signal.emit("✅ Download complete.")
+            # Index the new files right away; new tracks are queued for loudness analysis
+            entries = result if isinstance(result, list) else [result]
+            paths = {entry['path'] for entry in entries if entry and entry.get('path')}
+            if paths:
+                self.backend.player.apply_library_changes(paths)
         
         # Reset playlist progress
         self.backend.playlist_progress_signal.emit(0, 0, "")
 
+# Worker for offline rendering (EQ and volume baked into new files)
+class RenderWorker(QRunnable):
+    def __init__(self, paths, folder, eq_state, volume, backend):
+        super().__init__()
+        self.paths = paths
+        self.folder = folder
+        self.eq_state = eq_state
+        self.volume = volume
+        self.backend = backend
+
+    def run(self):
+        from core.render import render_files
+
+        def progress(done, total, path):
+            self.backend.log_signal.emit(f"🎛️ Rendered {done}/{total}: {os.path.basename(path)}")
+
+        self.backend.log_signal.emit(f"🎛️ Rendering {len(self.paths)} tracks...")
+        try:
+            report = render_files(self.paths, self.folder, self.eq_state, self.volume, progress=progress)
+        except Exception as e:
+            self.backend.log_signal.emit(f"❌ Render error: {e}")
+            return
+        self.backend.log_signal.emit(f"✅ Rendered {report['rendered']} tracks at {report['realtime']:.0f}x realtime.")
+        self.backend.render_finished.emit(report)
+
 # Backend class for JS interaction
 class Backend(QObject):
     log_signal = Signal(str) # Log messages to JS
@@ -207,6 +241,9 @@ class Backend(QObject):
     language_changed = Signal(str) # Language change signal
     lite_mode_changed = Signal(bool) # Lite mode change signal
     tray_mode_changed = Signal(bool) # Tray mode change signal
+    library_changed = Signal(dict) # Playlist delta from the library watcher
+    render_finished = Signal(dict) # Report of an offline render
+    playback_progress = Signal(dict) # Position pushed while playing (get_playback_info without engine)
 
     def __init__(self):
         super().__init__()
@@ -215,6 +252,10 @@ class Backend(QObject):
         self.player = MusicPlayer()
         self.player.set_track_change_callback(lambda track: self.track_changed.emit(track))
         self.player.set_state_callback(lambda is_playing: self.playback_state_changed.emit(is_playing))
+        self.player.set_library_change_callback(lambda delta: self.library_changed.emit(delta))
+        self.player.set_progress_callback(lambda info: self.playback_progress.emit(info))
+        self.player.start_library_watcher()
+        self.player.equalizer.set_all(get_equalizer_settings())
         self.current_theme = get_theme()
         self.shortcuts = get_shortcuts()
         self.hotkeys = GlobalHotkeys(self.player, self.shortcuts)
@@ -237,48 +278,103 @@ class Backend(QObject):
             self.log_signal.emit(f"❌ Error: {e}")
             return []
 
-    @Slot(result='QVariantList')
-    # List all music files from all folders (Global Playlist)
-    def list_all_files(self):
-        return self.player.list_files()
-
-    @Slot(str, result='QVariantList')
-    # List music files from a specific folder
-    def list_files(self, folder):
-        return self.player.list_files(folder)
+    @Slot(result=str)
+    # Get playlist sort order
+    def get_sort_order(self):
+        return self.player.sort_order
+
+    @Slot(str, int, result='QVariantMap')
+    # Set playlist sort order (album, title, artist, added, duration),
+    # re-sort and return the first window
+    def set_sort_order(self, order, limit):
+        try:
+            return self.player.select_sort_order(order, limit)
+        except Exception as e:
+            self.log_signal.emit(f"❌ set_sort_order error: {e}")
+            return {}
+    
+    @Slot(str, int, result='QVariantMap')
+    # Search the whole library and show the results as the playlist
+    # (empty text restores the previous playlist); returns the first window
+    def search_tracks(self, text, limit):
+        try:
+            return self.player.select_playlist({"type": "search", "value": text}, limit)
+        except Exception as e:
+            self.log_signal.emit(f"❌ search error: {e}")
+            return {}
 
     @Slot(result='QVariantList')
-    # Get current playlist as list of dicts
-    def get_playlist(self):
+    # Artists with track count and total duration: [{name, count, duration}]
+    def get_artists(self):
         try:
-            return self.player.get_playlist_dicts()
+            return self.player.get_artists()
         except Exception as e:
-            self.log_signal.emit(f"❌ get_playlist error: {e}")
+            self.log_signal.emit(f"❌ get_artists error: {e}")
             return []
 
     @Slot(str, result='QVariantList')
-    # Set playlist from a specific folder
-    def set_playlist(self, folder):
+    # Albums with track count and total duration (only one artist's if given)
+    def get_albums(self, artist):
         try:
-            return self.player.set_playlist_from_folder(folder)
+            return self.player.get_albums(artist or None)
         except Exception as e:
-            self.log_signal.emit(f"❌ set_playlist_from_folder error: {e}")
+            self.log_signal.emit(f"❌ get_albums error: {e}")
             return []
-    
+
+    @Slot('QVariantMap', int, result='QVariantMap')
+    # Make a playlist active and return its first window:
+    # {"type": "global"} / {"type": "playlist", "value": folder} /
+    # {"type": "custom", "value": [folders]} / {"type": "search", "value": text} /
+    # {"type": "artist" | "album", "value": name} / {"type": "facets", "value": {"artist": .., "album": ..}}
+    # -> {total, offset, current_index, tracks, groups}
+    def select_playlist(self, query, limit):
+        try:
+            return self.player.select_playlist(query, limit)
+        except Exception as e:
+            self.log_signal.emit(f"❌ select_playlist error: {e}")
+            return {}
+
+    @Slot(int, int, result='QVariantMap')
+    # Slice of the active playlist: {total, offset, current_index, tracks}
+    def get_playlist_window(self, offset, limit):
+        try:
+            return self.player.get_playlist_window(offset, limit)
+        except Exception as e:
+            self.log_signal.emit(f"❌ get_playlist_window error: {e}")
+            return {}
+
+    @Slot(str, int, result='QVariantMap')
+    # Slice of the active playlist starting at a track id (path)
+    def get_playlist_window_from(self, path, limit):
+        try:
+            return self.player.get_playlist_window_from(path, limit)
+        except Exception as e:
+            self.log_signal.emit(f"❌ get_playlist_window error: {e}")
+            return {}
+
     @Slot(result='QVariantList')
-    # Set playlist to all files (Global Playlist)
-    def set_global_playlist(self):
+    # Album boundaries of the active playlist: [{index, album, count}]
+    def get_playlist_groups(self):
+        return self.player.get_playlist_groups()
+
+    @Slot(str, int, result='QStringList')
+    # Ranked track ids (paths) for a search across the whole library
+    def search_library(self, text, limit):
         try:
-            return self.player.set_global_playlist()
+            return self.player.search_library(text, limit)
         except Exception as e:
-            self.log_signal.emit(f"❌ set_global_playlist error: {e}")
+            self.log_signal.emit(f"❌ search error: {e}")
             return []
 
-    @Slot(list, result='QVariantList')
-    # Set custom playlist from list of folder names
-    def create_temp_playlist(self, playlist_names):
-        return self.player.set_custom_playlist(playlist_names)
-    
+    @Slot(str, result=str)
+    # Extract (once) and return the cached cover image of a track
+    def get_cover(self, track_path):
+        try:
+            return extract_cover(track_path) or ""
+        except Exception as e:
+            print(f"Error extracting cover: {e}")
+            return ""
+
     @Slot(str, result=str)
     # Load lycic using original file name
     def get_lyrics(self, track_path):
@@ -389,7 +485,7 @@ class Backend(QObject):
         return getattr(self.player, "is_active", lambda: False)()
 
     @Slot(result='QVariantMap')
-    # Get current playback info
+    # Get current playback info (position is also pushed through playback_progress)
     def get_playback_info(self):
         try:
             return self.player.get_playback_info()
@@ -397,6 +493,15 @@ class Backend(QObject):
             self.log_signal.emit(f"❌ get_playback_info error: {e}")
             return {'position': 0, 'duration': 0, 'is_paused': False, 'current_index': -1}
 
+    @Slot(str, result='QVariantMap')
+    # Get the waveform peaks of a track (every resolution, partial while it is decoded)
+    def get_waveform(self, path):
+        try:
+            return self.player.get_waveform(path) or {}
+        except Exception as e:
+            self.log_signal.emit(f"❌ get_waveform error: {e}")
+            return {}
+
 
     # === Other playback buttons ===
 
@@ -411,8 +516,7 @@ class Backend(QObject):
     def toggle_shuffle(self):
         try:
             state = self.player.toggle_shuffle()
-            updated = self.player.get_playlist_dicts()
-            self.track_changed.emit({"playlist_updated": True, "tracks": updated})
+            self.track_changed.emit({"playlist_updated": True, "total": len(self.player.playlist)})
             return state
         except Exception as e:
             self.log_signal.emit(f"❌ toggle_shuffle error: {e}")
@@ -512,6 +616,58 @@ class Backend(QObject):
     def clear_library_index(self):
         self.player.clear_library_index()
         self.player.build_library_index()
+        self.player.start_library_watcher()
+
+    @Slot(result='QVariantMap')
+    # Get library scan settings (worker count and pool type)
+    def get_scan_settings(self):
+        return get_scan_settings()
+
+    @Slot('QVariantMap')
+    # Set library scan settings
+    def set_scan_settings(self, settings):
+        set_scan_settings(settings)
+
+    @Slot(result='QVariantMap')
+    # Get playback settings (mode, gapless, output_rate, latency_profile, normalization, caches, progress_hz)
+    def get_playback_settings(self):
+        return get_playback_settings()
+
+    @Slot('QVariantMap')
+    # Set playback settings (applied from the next track;
+    # a new output rate reopens the output stream, a new latency profile
+    # reopens it without interrupting the track)
+    def set_playback_settings(self, settings):
+        previous = get_playback_settings()
+        rate_changed = settings.get("output_rate") != previous.get("output_rate")
+        profile = settings.get("latency_profile")
+        set_playback_settings(settings)
+        if rate_changed:
+            self.player.stop_engine()
+        if profile and profile != previous.get("latency_profile"):
+            self.player.set_latency_profile(profile)
+        self.player.update_caches()
+        self.player.set_progress_rate(settings.get("progress_hz"))
+
+    @Slot(result='QVariantMap')
+    # Get loudness analysis progress (queued, analyzed, failed, pending, seconds)
+    def get_loudness_stats(self):
+        return self.player.get_loudness_stats()
+
+    @Slot(result='QVariantMap')
+    # Get decoded-track cache stats (entries, mb, budget_mb, hits, misses, hit_rate, evictions)
+    def get_decoded_cache_stats(self):
+        return self.player.get_decoded_cache_stats()
+
+    @Slot(result='QVariantMap')
+    # Get PCM disk cache stats (entries, mb, cap_mb, format, hits, misses, fills, evictions, queued)
+    def get_pcm_cache_stats(self):
+        return self.player.get_pcm_cache_stats()
+
+    @Slot(result='QVariantMap')
+    # Get stats of the last library scan (files, parsed, seconds, files_per_sec)
+    def get_scan_stats(self):
+        return getattr(self.player, "scan_stats", {})
     
     @Slot(result=str)
     # Get current language
@@ -525,19 +681,68 @@ class Backend(QObject):
         self.language_changed.emit(lang)
     
     @Slot(result='QVariantMap')
+    # Get equalizer state: mode, loaded FIR path and band gains keyed by frequency
     def get_equalizer_settings(self):
-        state = self.player.equalizer.get_state()
-        {str(k): float(v) for k, v in state.items()}
-        return get_equalizer_settings()
+        return self.player.equalizer.get_state()
 
     @Slot('QVariantMap')
     def set_equalizer_settings(self, eq_settings):
         try:
             self.player.equalizer.set_all(eq_settings)
-            set_equalizer_settings(eq_settings)
+            set_equalizer_settings(self.player.equalizer.get_state())
         except Exception as e:
             print(f"Error saving EQ: {e}")
 
+    @Slot(result='QVariantMap')
+    # Get the band frequencies of every equalizer mode
+    def get_equalizer_modes(self):
+        return {mode: list(bands) for mode, bands in EQ_MODES.items()}
+
+    @Slot(str, result='QVariantMap')
+    # Switch equalizer mode (parametric, graphic10, graphic31); the curve is carried over
+    def set_equalizer_mode(self, mode):
+        self.player.equalizer.set_mode(mode)
+        state = self.player.equalizer.get_state()
+        set_equalizer_settings(state)
+        return state
+
+    @Slot(result='QVariantMap')
+    # Load a room-correction FIR filter (impulse response stored as audio)
+    def choose_equalizer_fir(self):
+        path, _ = QFileDialog.getOpenFileName(
+            None,
+            "Select FIR filter",
+            "",
+            "Impulse responses (*.wav *.flac *.aiff *.ogg)"
+        )
+        if path and not self.player.equalizer.load_fir(path):
+            self.log_signal.emit(f"❌ Cannot load FIR filter: {path}")
+        state = self.player.equalizer.get_state()
+        set_equalizer_settings(state)
+        return state
+
+    @Slot(result='QVariantMap')
+    # Remove the loaded FIR filter
+    def clear_equalizer_fir(self):
+        self.player.equalizer.clear_fir()
+        state = self.player.equalizer.get_state()
+        set_equalizer_settings(state)
+        return state
+
+    @Slot(list, str, result=bool)
+    # Render tracks through the current EQ and volume into a folder (asked for when empty)
+    def render_tracks(self, paths, folder):
+        paths = [path for path in paths if os.path.isfile(path)]
+        if not paths:
+            return False
+        if not folder:
+            folder = QFileDialog.getExistingDirectory(None, "Select Render Folder")
+            if not folder:
+                return False
+        eq = self.player.equalizer
+        self.thread_pool.start(RenderWorker(paths, folder, eq.get_state(), eq.volume, self))
+        return True
+
     @Slot(int)
     def set_volume(self, value):
         """Sets the volume (0-100) via the player's equalizer."""
@@ -575,6 +780,7 @@ class Backend(QObject):
     def set_lite_mode(self, state):
         from core.database import set_lite_mode
         set_lite_mode(state)
+        self.player.update_caches()
         self.lite_mode_changed.emit(state)
     
     @Slot(result=bool)
@@ -695,10 +901,17 @@ def main():
 
     tray_icon.activated.connect(on_tray_icon_activated)
 
+    app.aboutToQuit.connect(backend.player.stop_engine)
+
     view.resize(1100, 700)
     view.setMinimumSize(800, 550)
     view.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support() # render pool workers of the packaged app
+    if sys.argv[1:2] == ["--render"]:
+        from core.render import main as render_main
+        sys.exit(render_main(sys.argv[2:]))
     main()
@@ -0,0 +1,83 @@
+# conftest.py
+
+# Shared fixtures: short generated tracks, and a MusicPlayer on the null output
+# backend whose index and caches live in a temporary folder and whose playback settings
+# come from a dict (the user's settings.json is never read or written)
+
+import os, sys
+import numpy as np
+import soundfile as sf
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import playback, player as player_module
+from core.player import MusicPlayer
+from core.library_index import LibraryIndex
+from core.waveform import WaveformStore
+from core.seek_index import SeekIndexStore
+from core.pcm_cache import PcmCache
+from core.loudness import LoudnessAnalyzer
+
+PLAYBACK_SETTINGS = {
+    "mode": "stream",
+    "gapless": True,
+    "output_rate": 0,
+    "latency_profile": "balanced",
+    "normalization": "off",
+    "normalization_preamp": 0.0,
+    "decoded_cache_mb": 0,
+    "pcm_cache_mb": 0,
+    "pcm_cache_format": "int16",
+    "progress_hz": 4,
+}
+
+
+# Stereo tone whose pitch changes every 0.1 s, so a misplaced or garbled block shows
+def tone(seconds: float, samplerate: int = 44100, channels: int = 2) -> np.ndarray:
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    freq = 220 + 110 * (np.floor(t * 10) % 7)
+    data = 0.3 * np.sin(2 * np.pi * np.cumsum(freq) / samplerate)
+    return np.repeat(data[:, None], channels, axis=1).astype(np.float32)
+
+
+@pytest.fixture
+def make_track(tmp_path):
+    def make(name: str, seconds: float = 3.0, samplerate: int = 44100, channels: int = 2) -> str:
+        path = str(tmp_path / name)
+        fmt = 'MP3' if name.endswith('.mp3') else None
+        sf.write(path, tone(seconds, samplerate, channels), samplerate, format=fmt)
+        return path
+    return make
+
+
+# MP3 library of one playlist folder, indexed by the player
+@pytest.fixture
+def library(tmp_path, player, make_track):
+    base = tmp_path / "music"
+    (base / "mix").mkdir(parents=True)
+    paths = [make_track(f"music/mix/{name}.mp3", seconds=5.0) for name in "abcde"]
+    player.base_dir = str(base)
+    player.build_library_index()
+    return paths
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    values = dict(PLAYBACK_SETTINGS)
+    monkeypatch.setattr(playback, "get_playback_settings", lambda: values)
+    return values
+
+
+@pytest.fixture
+def player(tmp_path, settings, monkeypatch):
+    monkeypatch.setattr(player_module, "LibraryIndex", lambda: LibraryIndex(str(tmp_path / "library.db")))
+    player = MusicPlayer()
+    player.output_backend = "null"
+    player.output_options = {"speed": 1.0}
+    player._waveforms = WaveformStore(str(tmp_path / "waveforms"))
+    player._seek_indexes = SeekIndexStore(str(tmp_path / "seek_index"))
+    player._pcm_cache = PcmCache(str(tmp_path / "pcm_cache"), max_bytes=0)
+    player._loudness = LoudnessAnalyzer(player._store_loudness, waveforms=player._waveforms)
+    yield player
+    player.stop_engine()
@@ -0,0 +1,93 @@
+# test_equalizer.py
+
+# The convolution response is designed before audio flows, never in the callback;
+# the parametric cascade filters in place, on the buffers it was given
+
+import numpy as np
+import pytest
+from core import convolver, equalizer
+from core.equalizer import Equalizer, MODES
+
+
+def graphic_eq() -> Equalizer:
+    eq = Equalizer()
+    eq.set_mode("graphic10")
+    eq.set_all({str(freq): 3.0 for freq in MODES["graphic10"]})
+    return eq
+
+
+# Any design from here on fails
+def forbid_design(monkeypatch):
+    monkeypatch.setattr(convolver, "combined_response", None)
+
+
+def test_nothing_designed_before_the_format_is_known():
+    assert graphic_eq().latency == 0
+
+
+def test_callback_only_swaps_spectra(monkeypatch):
+    eq = graphic_eq()
+    eq.set_format(44100, 2)
+    assert eq.latency == convolver.PARTITION_FRAMES
+    forbid_design(monkeypatch)
+    buf = np.full((1024, 2), 0.1, dtype=np.float32)
+    eq.process_into(buf, 44100)
+    assert not buf[:eq.latency].any() and buf[eq.latency:].any()
+
+
+def test_other_format_passes_through(monkeypatch):
+    eq = graphic_eq()
+    eq.set_format(44100, 2)
+    forbid_design(monkeypatch)
+    buf = np.full((1024, 2), 0.1, dtype=np.float32)
+    eq.process_into(buf, 48000)
+    assert np.all(buf == np.float32(0.1))
+
+
+def test_engine_sets_the_stream_format(player, make_track):
+    player.equalizer.set_mode("graphic10")
+    player.play_track(playlist=[make_track("tone.flac", samplerate=48000)])
+    conv = player.equalizer._convolver
+    assert (conv.samplerate, conv.channels) == (player._samplerate, 2)
+
+
+# Parametric cascade gliding between curves (bands switching on and off), block by block
+def glide_output(blocks: int = 40) -> np.ndarray:
+    eq = Equalizer()
+    eq.set_format(44100, 2)
+    noise = np.random.default_rng(0).standard_normal((blocks * 512, 2)).astype(np.float32) * 0.1
+    out = []
+    for i, block in enumerate(np.split(noise, blocks)):
+        if i % 10 == 0:
+            eq.set_all({str(freq): (-1) ** (i // 10 + k) * 2.0 * (k % 3) for k, freq in enumerate(Equalizer.BANDS)})
+        eq.process_into(block, 44100)
+        out.append(block)
+    return np.concatenate(out)
+
+
+def test_private_kernel_filters_like_sosfilt(monkeypatch):
+    if equalizer._sosfilt is None:
+        pytest.skip("SciPy's private sosfilt kernel is not in use")
+    assert equalizer.kernel_matches(equalizer._sosfilt)
+    fast = glide_output()
+    monkeypatch.setattr(equalizer, "_sosfilt", None)
+    np.testing.assert_allclose(fast, glide_output(), atol=1e-6)
+
+
+def test_kernel_that_differs_is_rejected():
+    assert not equalizer.kernel_matches(lambda sos, x, zi: None)
+
+
+# Gliding rewrites the preallocated coefficient rows and state in place
+def test_glide_keeps_the_buffers():
+    eq = Equalizer()
+    eq.set_format(44100, 2)
+    eq.set_all({str(freq): 6.0 for freq in Equalizer.BANDS[:3]})
+    buf = np.zeros((512, 2), dtype=np.float32)
+    eq.process_into(buf, 44100)
+    sos_buf, zi_buf = eq._sos_buf, eq._zi_buf
+    eq.set_all({str(freq): -6.0 if i % 2 else 0.0 for i, freq in enumerate(Equalizer.BANDS)})
+    for _ in range(40):
+        eq.process_into(buf, 44100)
+        assert np.shares_memory(eq._sos, sos_buf) and np.shares_memory(eq._zi, zi_buf)
+    assert not eq._gliding
@@ -0,0 +1,69 @@
+# test_gapless.py
+
+# The prepared next track follows the current one in the same stream with no
+# gap and no lost or repeated frames
+
+import time
+import numpy as np
+import soundfile as sf
+import pytest
+from core import output, playback
+from core.output import NullOutput
+
+
+# Null output that keeps a copy of every buffer the engine rendered, across the
+# streams it opens (underflows may make it reopen with larger buffers)
+class RecordingOutput(NullOutput):
+    recorded = None
+
+    def __init__(self, *args, callback=None, **kwargs):
+        recorded = self.recorded
+
+        def record(outdata, frames, time_info, status):
+            callback(outdata, frames, time_info, status)
+            recorded.append(outdata.copy())
+        super().__init__(*args, callback=record, **kwargs)
+
+
+@pytest.fixture
+def recording(player, monkeypatch):
+    monkeypatch.setattr(RecordingOutput, "recorded", [])
+    monkeypatch.setitem(output.OUTPUT_BACKENDS, "recording", RecordingOutput)
+    player.output_backend = "recording"
+    player.output_options = {"speed": 4.0}
+    return player
+
+
+def wait_finished(player, path, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if player.current_track.path == path and not player.is_playing:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.mark.parametrize("ext", ["flac", "mp3"])
+def test_handoff_is_seamless(recording, make_track, ext):
+    first = make_track(f"first.{ext}", seconds=1.0)
+    second = make_track(f"second.{ext}", seconds=1.5)
+    recording.play_track(playlist=[first, second])
+    assert wait_finished(recording, second)
+    assert recording.current_index == 1
+
+    recording.stop_engine() # joins the output thread: the last buffer is recorded
+    buffers = RecordingOutput.recorded
+    start = next(i for i, buf in enumerate(buffers) if buf.any())
+    played = np.concatenate(buffers[start:])
+    expected = np.concatenate([sf.read(p, dtype='float32', always_2d=True)[0] for p in (first, second)])
+    np.testing.assert_array_equal(played[:len(expected)], expected)
+    assert not played[len(expected):].any()
+
+
+# Both sides of a handoff are the library's records, the files are not parsed again
+def test_tracks_come_from_the_library(recording, library, monkeypatch):
+    monkeypatch.setattr(playback, "TrackInfo", None)
+    recording.play_track(playlist=library[:2])
+    assert recording.current_track is recording._by_path[library[0]]
+    assert wait_finished(recording, library[1])
+    assert recording.current_track is recording._by_path[library[1]]
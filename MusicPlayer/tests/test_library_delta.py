@@ -0,0 +1,83 @@
+# test_library_delta.py
+
+# Live library changes keep the play queue, current_index and the gapless
+# next track consistent with what is shown
+
+import os, time
+from core.track_info import TrackInfo
+
+
+def shown(player):
+    return [t.path for t in player.playlist]
+
+
+def queue(player):
+    return list(player.playlist_playback)
+
+
+# The gapless worker prepares asynchronously
+def wait_prepared(player, path, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        source = player._next_source
+        if source is not None and source.path == path:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def assert_consistent(player):
+    current = player.current_track.path
+    assert player.playlist_playback[player.current_index] == current
+    index, path = player._next_entry()
+    assert index == player.current_index + 1
+    assert path == player.playlist_playback[index]
+    assert wait_prepared(player, path)
+
+
+def test_added_track_joins_queue_in_shown_order(player, library, make_track):
+    player.set_global_playlist()
+    player.play_track(path=shown(player)[1])
+    added = make_track("music/mix/aa.mp3", seconds=5.0)
+
+    delta = player.apply_library_changes({added})
+    assert [item['path'] for item in delta['added']] == [added]
+    assert queue(player) == shown(player)
+    assert added in queue(player)
+    assert_consistent(player)
+
+
+def test_removed_next_track_is_skipped(player, library):
+    player.set_global_playlist()
+    order = shown(player)
+    player.play_track(path=order[1])
+    os.remove(order[2])
+
+    player.apply_library_changes({order[2]})
+    assert order[2] not in queue(player)
+    assert queue(player) == shown(player)
+    assert_consistent(player)
+    assert player._next_entry()[1] == order[3]
+
+
+def test_removed_current_track_plays_the_one_after(player, library):
+    player.set_global_playlist()
+    order = shown(player)
+    player.play_track(path=order[1])
+    os.remove(order[1])
+
+    player.apply_library_changes({order[1]})
+    assert player._next_entry()[1] == order[2]
+
+
+def test_shuffled_queue_drops_removed_tracks(player, library):
+    player.set_global_playlist()
+    player.play_track(path=shown(player)[0])
+    player.toggle_shuffle()
+    before = queue(player)
+    gone = before[-1]
+    os.remove(gone)
+
+    player.apply_library_changes({gone})
+    assert queue(player) == before[:-1]
+    assert_consistent(player)
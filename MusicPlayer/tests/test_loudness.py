@@ -0,0 +1,68 @@
+# test_loudness.py
+
+# Loudness and peak are measured on the same decode playback uses
+
+import os, shutil, time
+import numpy as np
+import soundfile as sf
+import pytest
+from core import library_index
+from core.library_index import LibraryIndex
+from core.loudness import analyze_file, replay_gain
+from core.track_info import TrackInfo
+
+
+@pytest.mark.parametrize("name", ["tone.flac", "tone.mp3"])
+def test_peak_matches_whole_read(make_track, name):
+    path = make_track(name)
+    data = sf.read(path, dtype='float32', always_2d=True)[0]
+    assert analyze_file(path)['peak'] == float(np.abs(data).max())
+
+
+# Album gain pools the album's own tracks, not a same-titled album of another artist
+def test_album_gain_is_per_artist(player):
+    for path, artist, loudness in (('a.mp3', 'A', -10.0), ('b.mp3', 'A', -10.0), ('c.mp3', 'B', -30.0)):
+        track = TrackInfo.from_dict({'path': path, 'title': path, 'artist': artist, 'album': 'Greatest Hits',
+                                     'duration': 60.0, 'loudness': loudness, 'peak': 0.01})
+        player._by_path[path] = track
+        player._facets.add(track)
+    settings = {"normalization": "album", "normalization_preamp": 0.0}
+    assert player._normalization_gain('a.mp3', settings) == replay_gain(-10.0, 0.01)
+    assert player._normalization_gain('c.mp3', settings) == replay_gain(-30.0, 0.01)
+
+
+def wait_until(condition, timeout=10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+# Analyzed tracks whose waveform is gone are decoded for the peaks, not analyzed again
+def test_missing_waveform_is_not_reanalyzed(player, library):
+    stored = lambda: all(row['loudness'] is not None for row in player._index_store.load(player.base_dir).values())
+    assert wait_until(stored)
+    queued = player._loudness.stats['queued']
+    shutil.rmtree(player._waveforms.cache_dir)
+    player.build_library_index()
+    cached = lambda: all(player._waveforms.has(p, os.stat(p).st_mtime_ns) for p in library)
+    assert wait_until(lambda: cached() and not player._loudness.pending)
+    assert player._loudness.stats['queued'] == queued
+
+
+def test_new_analysis_version_clears_results(tmp_path, monkeypatch):
+    db = str(tmp_path / "library.db")
+    index = LibraryIndex(db)
+    index.update([{'path': 'a.mp3', 'size': 1, 'mtime': 2, 'title': 'a', 'artist': '', 'album': '',
+                   'cover_key': None, 'duration': 1.0, 'loudness': None, 'peak': None}])
+    index.set_loudness([{'path': 'a.mp3', 'size': 1, 'mtime': 2, 'loudness': -20.0, 'peak': 0.5}])
+    LibraryIndex(db)
+    assert index.load("")['a.mp3']['loudness'] == -20.0
+
+    monkeypatch.setattr(library_index, "ANALYSIS_VERSION", library_index.ANALYSIS_VERSION + 1)
+    LibraryIndex(db)
+    row = index.load("")['a.mp3']
+    assert row['loudness'] is None and row['peak'] is None
+    assert row['title'] == 'a'
@@ -0,0 +1,52 @@
+# test_pcm_cache.py
+
+# A filled PCM cache file maps back to the decode it was made from
+
+import os
+import numpy as np
+import soundfile as sf
+import pytest
+from core.pcm_cache import PcmCache, HEADER, MAGIC
+
+
+@pytest.fixture
+def cache(tmp_path):
+    def make(fmt: str) -> PcmCache:
+        cache = PcmCache(str(tmp_path / "pcm_cache"), fmt=fmt, min_plays=1)
+        cache.samplerate = 44100
+        return cache
+    return make
+
+
+@pytest.mark.parametrize("name", ["tone.flac", "tone.mp3"])
+def test_float32_round_trip(make_track, cache, name):
+    path = make_track(name)
+    pcm = cache("float32")
+    assert pcm._fill(path)
+    data = pcm.open(path, 44100)
+    np.testing.assert_array_equal(data, sf.read(path, dtype='float32', always_2d=True)[0])
+
+
+@pytest.mark.parametrize("name", ["tone.flac", "tone.mp3"])
+def test_int16_round_trip(make_track, cache, name):
+    path = make_track(name)
+    pcm = cache("int16")
+    assert pcm._fill(path)
+    data = pcm.open(path, 44100)
+    assert data.dtype == np.int16
+    expected = sf.read(path, dtype='float32', always_2d=True)[0]
+    np.testing.assert_allclose(data / 32768.0, expected, atol=1 / 32768)
+
+
+def test_other_version_is_a_miss(make_track, cache):
+    path = make_track("tone.flac")
+    pcm = cache("int16")
+    pcm._fill(path)
+    target = pcm.cache_file(path, os.stat(path).st_mtime_ns, 44100)
+    with open(target, 'r+b') as fh:
+        header = list(HEADER.unpack(fh.read(HEADER.size)))
+        header[1] -= 1
+        fh.seek(0)
+        fh.write(HEADER.pack(*header))
+    assert header[0] == MAGIC
+    assert pcm.open(path, 44100) is None
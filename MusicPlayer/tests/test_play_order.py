@@ -0,0 +1,18 @@
+# test_play_order.py
+
+from core.play_order import PlayOrder
+
+PATHS = [f"/music/mix/{i:03d}.mp3" for i in range(50)]
+
+
+def test_shuffled_pins_first():
+    for source in (PlayOrder(PATHS), iter(PATHS), PATHS):
+        order = PlayOrder.shuffled(source, first=PATHS[17])
+        assert order[0] == PATHS[17]
+        assert sorted(order) == PATHS
+        assert order.index(PATHS[17]) == 0
+
+
+def test_shuffled_without_first():
+    assert sorted(PlayOrder.shuffled(PATHS, first="/elsewhere.mp3")) == PATHS
+    assert len(PlayOrder.shuffled([], first=PATHS[0])) == 0
@@ -0,0 +1,44 @@
+# test_watcher.py
+
+# Events below a moved directory name where the files are now
+
+import os
+import pytest
+from core.watcher import _InotifyBackend
+
+pytestmark = pytest.mark.skipif(not _InotifyBackend.available(), reason="inotify is Linux only")
+
+
+# Everything reported until the watch goes quiet
+def drain(backend) -> set:
+    changed = set()
+    while True:
+        batch = backend.wait(0.2)
+        if not batch:
+            return changed
+        changed |= batch
+
+
+@pytest.fixture
+def backend(tmp_path):
+    os.makedirs(tmp_path / "music" / "a" / "sub")
+    backend = _InotifyBackend(str(tmp_path / "music"))
+    yield backend
+    backend.close()
+
+
+def test_move_inside_the_tree_renames_the_watches(backend, tmp_path):
+    music = tmp_path / "music"
+    os.rename(music / "a", music / "b")
+    drain(backend)
+    (music / "b" / "sub" / "x.mp3").touch()
+    assert drain(backend) == {str(music / "b" / "sub" / "x.mp3")}
+
+
+def test_move_out_of_the_tree_drops_the_watches(backend, tmp_path):
+    music = tmp_path / "music"
+    os.rename(music / "a", tmp_path / "out")
+    drain(backend)
+    (tmp_path / "out" / "sub" / "x.mp3").touch()
+    assert drain(backend) == set()
+    assert sorted(backend._dirs.values()) == [str(music)]